@@ -1,31 +1,63 @@
+import json
 import sys
-from esp_flasher.cli.commands import parse_args
-from esp_flasher.cli.logging import show_logs
-from esp_flasher.core.flasher import run_esp_flasher
-from esp_flasher.cli.chip_info import dump_info
-from esp_flasher.helpers.serial_utils import select_port
-from PyQt5.QtWidgets import QMessageBox
+from esp_flasher.cli.commands import STATION_COMMAND, parse_args
+
+# esptool, PyQt5 and the other heavy modules are imported where they are
+# first needed, so each entry point only loads what it uses.
 
 
 def run(argv):
     args = parse_args(argv)
+    if args.config_dir:
+        from esp_flasher.helpers.utils import set_config_dir
+
+        set_config_dir(args.config_dir)
+
+    if args.command == STATION_COMMAND:
+        from esp_flasher.cli.station import run_station
+
+        return run_station(args)
+
+    if not (args.info_dump or args.show_logs):
+        # Fail on a bad config before touching the board
+        from esp_flasher.core.config_loader import get_config
+
+        get_config()
+
+    if args.info_dump and args.all_ports:
+        from esp_flasher.core.chip_utils import sweep_ports
+
+        ports = sweep_ports(
+            max_workers=args.probe_workers, port_timeout=args.probe_timeout
+        )
+        print(json.dumps(ports, indent=4))
+        return
+
+    from esp_flasher.helpers.serial_utils import select_port
+
     port = select_port(args)
 
     if args.show_logs:
+        from esp_flasher.cli.logging import show_logs
+
         show_logs(port)
         return
 
     if args.info_dump:
+        from esp_flasher.cli.chip_info import dump_info
+
         dump_info(port)
         return
 
+    from esp_flasher.core.flasher import run_esp_flasher
+
     run_esp_flasher(port, args.firmware, args.upload_baud_rate, args.no_erase)
 
 
 def main():
     try:
         if len(sys.argv) <= 1:
-            from esp_flasher.gui.main_window import MainWindow, show_popup
+            from esp_flasher.gui.main_window import MainWindow
             from PyQt5.QtWidgets import QApplication
 
             app = QApplication(sys.argv)
@@ -37,6 +69,9 @@ def main():
             return run(sys.argv)
     except Exception as err:
         if len(sys.argv) <= 1:
+            from esp_flasher.gui.main_window import show_popup
+            from PyQt5.QtWidgets import QMessageBox
+
             show_popup("Error", f"An error occurred: {str(err)}", QMessageBox.Critical)
         else:
             print(f"An error occurred: {str(err)}")
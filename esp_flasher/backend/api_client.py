@@ -2,43 +2,168 @@ import requests
 from requests.exceptions import RequestException, HTTPError
 
 
-def publish_mac_address(
-    api_endpoint: str, api_key: str, api_secret: str, mac_address: str
-):
-    """Send MAC address to the API endpoint with authentication."""
-    headers = {
+def _auth_headers(api_key: str, api_secret: str):
+    return {
         "Content-Type": "application/json",
         "X-API-KEY": api_key,
         "X-API-SECRET": api_secret,
     }
-    payload = {"mac_address": mac_address}
 
+
+def _http_error_message(http_err):
+    """Builds an error message from an HTTPError, preferring the JSON message."""
+    response = http_err.response
     try:
-        with requests.Session() as session:
-            response = session.post(api_endpoint, headers=headers, json=payload)
-            response.raise_for_status()  # Raises HTTPError for 4xx/5xx responses
+        response_data = response.json()
+        message = response_data.get("message", str(response_data))
+    except Exception:
+        message = response.text if response is not None else "No response body"
 
-            if response.status_code == 201:
-                return response.json().get("device_name", "Unknown Device"), None
+    return f"HTTP error: {response.status_code} {response.reason} - {message}"
 
-            return (
-                None,
-                f"Unexpected status code: {response.status_code} {response.reason} - {response_data['message']}",
-            )
 
-    except HTTPError as http_err:
-        # Try to get JSON error message, fallback to text or default message
-        response = http_err.response
-        try:
-            response_data = response.json()
-            message = response_data.get("message", str(response_data))
-        except Exception:
-            message = response.text if response is not None else "No response body"
+def _post_json(session, url, headers, payload, timeout):
+    """Posts JSON on the given session, or on a short-lived one if none is given."""
+    if session is not None:
+        return session.post(url, headers=headers, json=payload, timeout=timeout)
+    with requests.Session() as short_lived:
+        return short_lived.post(url, headers=headers, json=payload, timeout=timeout)
+
+
+def publish_mac_address(
+    api_endpoint: str,
+    api_key: str,
+    api_secret: str,
+    mac_address: str,
+    session=None,
+    timeout=10,
+):
+    """Send MAC address to the API endpoint with authentication."""
+    headers = _auth_headers(api_key, api_secret)
+    payload = {"mac_address": mac_address}
+
+    try:
+        response = _post_json(session, api_endpoint, headers, payload, timeout)
+        response.raise_for_status()  # Raises HTTPError for 4xx/5xx responses
+
+        if response.status_code == 201:
+            return response.json().get("device_name", "Unknown Device"), None
 
         return (
             None,
-            f"HTTP error: {response.status_code} {response.reason} - {message}",
+            f"Unexpected status code: {response.status_code} {response.reason}",
         )
+
+    except HTTPError as http_err:
+        return None, _http_error_message(http_err)
+    except RequestException as req_err:
+        return None, f"Request failed: {req_err}"
+    except Exception as err:
+        return None, f"An unexpected error occurred: {err}"
+
+
+def publish_batch(
+    batch_endpoint: str,
+    api_key: str,
+    api_secret: str,
+    mac_addresses,
+    session=None,
+    timeout=10,
+):
+    """Register several MAC addresses with one request.
+
+    Returns:
+        tuple: (dict, None) mapping each MAC address to its device name on
+        success, (None, str) with an error message otherwise.
+    """
+    headers = _auth_headers(api_key, api_secret)
+    payload = {"mac_addresses": list(mac_addresses)}
+
+    try:
+        response = _post_json(session, batch_endpoint, headers, payload, timeout)
+        response.raise_for_status()
+
+        devices = response.json().get("devices")
+        if not isinstance(devices, list):
+            return None, "Batch response does not contain devices"
+        return {
+            device.get("mac_address"): device.get("device_name") for device in devices
+        }, None
+
+    except HTTPError as http_err:
+        return None, _http_error_message(http_err)
+    except RequestException as req_err:
+        return None, f"Request failed: {req_err}"
+    except Exception as err:
+        return None, f"An unexpected error occurred: {err}"
+
+
+def lease_device_names(
+    lease_endpoint: str,
+    api_key: str,
+    api_secret: str,
+    count: int,
+    session=None,
+    timeout=10,
+):
+    """Lease a block of unbound device names from the API endpoint.
+
+    Returns:
+        tuple: (dict, None) with `lease_id` and `device_names` on success,
+        (None, str) with an error message otherwise.
+    """
+    headers = _auth_headers(api_key, api_secret)
+    payload = {"count": count}
+
+    try:
+        response = _post_json(session, lease_endpoint, headers, payload, timeout)
+        response.raise_for_status()
+
+        data = response.json()
+        if not isinstance(data.get("device_names"), list):
+            return None, "Lease response does not contain device names"
+        return data, None
+
+    except HTTPError as http_err:
+        return None, _http_error_message(http_err)
+    except RequestException as req_err:
+        return None, f"Request failed: {req_err}"
+    except Exception as err:
+        return None, f"An unexpected error occurred: {err}"
+
+
+def confirm_device_names(
+    confirm_endpoint: str,
+    api_key: str,
+    api_secret: str,
+    bindings,
+    session=None,
+    timeout=10,
+):
+    """Confirm a batch of locally made device name to MAC address bindings.
+
+    Args:
+        bindings (list): Dicts with `lease_id`, `device_name` and `mac_address`.
+
+    Returns:
+        tuple: (dict, None) with `confirmed` and `rejected` lists on success,
+        (None, str) with an error message otherwise.
+    """
+    headers = _auth_headers(api_key, api_secret)
+    payload = {"bindings": bindings}
+
+    try:
+        response = _post_json(session, confirm_endpoint, headers, payload, timeout)
+        response.raise_for_status()
+
+        data = response.json()
+        return {
+            "confirmed": data.get("confirmed", []),
+            "rejected": data.get("rejected", []),
+        }, None
+
+    except HTTPError as http_err:
+        return None, _http_error_message(http_err)
     except RequestException as req_err:
         return None, f"Request failed: {req_err}"
     except Exception as err:
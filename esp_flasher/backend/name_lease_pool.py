@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+
+from esp_flasher.backend.api_client import lease_device_names, confirm_device_names
+
+
+class DeviceNameLeasePool:
+    """Client-side pool of device names leased from the backend in blocks.
+
+    Names are pre-fetched in the background, bound to MAC addresses locally and
+    the bindings are confirmed with the backend in batches, so registering a
+    board on the critical path is a local lookup.
+    """
+
+    def __init__(
+        self,
+        lease_endpoint,
+        confirm_endpoint,
+        api_key,
+        api_secret,
+        block_size=20,
+        low_watermark=5,
+        confirm_batch_size=10,
+        confirm_interval=5.0,
+    ):
+        self._lease_endpoint = lease_endpoint
+        self._confirm_endpoint = confirm_endpoint
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self.block_size = block_size
+        self.low_watermark = low_watermark
+        self.confirm_batch_size = confirm_batch_size
+        self.confirm_interval = confirm_interval
+
+        self._names = deque()  # (lease_id, device_name) not bound yet
+        self._bindings = {}  # mac_address -> device_name
+        self._pending = []  # bindings waiting for backend confirmation
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._session = None
+        self._worker = None
+
+    def start(self):
+        """Starts the background refill and confirmation worker."""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._session = requests.Session()
+        self._worker = threading.Thread(
+            target=self._run, name="DeviceNameLeasePool", daemon=True
+        )
+        self._worker.start()
+
+    def stop(self, timeout=10):
+        """Stops the worker, confirming any bindings that are still pending."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout)
+            self._worker = None
+        if self._session:
+            self._session.close()
+            self._session = None
+
+    def bind(self, mac_address):
+        """Binds a leased device name to the MAC address.
+
+        Returns the device name, or None if the pool is currently empty.
+        A MAC address that is already bound keeps its device name.
+        """
+        with self._lock:
+            device_name = self._bindings.get(mac_address)
+            if device_name:
+                return device_name
+            if not self._names:
+                self._wakeup.set()
+                return None
+
+            lease_id, device_name = self._names.popleft()
+            self._bindings[mac_address] = device_name
+            self._pending.append(
+                {
+                    "lease_id": lease_id,
+                    "device_name": device_name,
+                    "mac_address": mac_address,
+                }
+            )
+            if (
+                len(self._names) <= self.low_watermark
+                or len(self._pending) >= self.confirm_batch_size
+            ):
+                self._wakeup.set()
+            return device_name
+
+    def available(self):
+        """Returns the number of leased names that are not bound yet."""
+        with self._lock:
+            return len(self._names)
+
+    def pending(self):
+        """Returns the number of bindings not yet confirmed by the backend."""
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            stopping = self._stopping.is_set()
+            if not stopping and self.available() <= self.low_watermark:
+                self._refill()
+
+            flush_due = time.monotonic() - last_flush >= self.confirm_interval
+            if stopping or flush_due or self.pending() >= self.confirm_batch_size:
+                self._flush()
+                last_flush = time.monotonic()
+
+            if stopping:
+                return
+
+            self._wakeup.wait(self.confirm_interval)
+            self._wakeup.clear()
+
+    def _refill(self):
+        lease, error_message = lease_device_names(
+            self._lease_endpoint,
+            self._api_key,
+            self._api_secret,
+            self.block_size,
+            session=self._session,
+        )
+        if lease is None:
+            logging.error(f"Leasing device names failed: {error_message}")
+            return
+
+        lease_id = lease.get("lease_id")
+        with self._lock:
+            self._names.extend((lease_id, name) for name in lease["device_names"])
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        result, error_message = confirm_device_names(
+            self._confirm_endpoint,
+            self._api_key,
+            self._api_secret,
+            batch,
+            session=self._session,
+        )
+        if result is None:
+            logging.error(f"Confirming device names failed: {error_message}")
+            with self._lock:
+                self._pending = batch + self._pending
+            return
+
+        for rejected in result["rejected"]:
+            logging.error(
+                f"Backend rejected {rejected.get('device_name')} for "
+                f"{rejected.get('mac_address')}: {rejected.get('message', '')}"
+            )
+            # Forget the local binding so the board gets a fresh name next time
+            with self._lock:
+                mac_address = rejected.get("mac_address")
+                if self._bindings.get(mac_address) == rejected.get("device_name"):
+                    del self._bindings[mac_address]
+
+
+def create_lease_pool(api_settings, api_key, api_secret):
+    """Creates and starts a lease pool if the API settings enable it."""
+    lease_endpoint = api_settings.get("lease_endpoint", "")
+    confirm_endpoint = api_settings.get("confirm_endpoint", "")
+    if not lease_endpoint or not confirm_endpoint:
+        return None
+
+    pool = DeviceNameLeasePool(
+        lease_endpoint,
+        confirm_endpoint,
+        api_key,
+        api_secret,
+        block_size=api_settings.get("lease_block_size", 20),
+        low_watermark=api_settings.get("lease_low_watermark", 5),
+        confirm_batch_size=api_settings.get("confirm_batch_size", 10),
+        confirm_interval=api_settings.get("confirm_interval_seconds", 5.0),
+    )
+    pool.start()
+    return pool
@@ -0,0 +1,378 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from esp_flasher.backend.printers.base_printer import PartialPrintError
+from esp_flasher.backend.printers.label_layout import LabelData, LabelLayout
+
+DEFAULT_SPOOL_DIR = "print_spool"
+
+JOB_HELD = "held"
+JOB_QUEUED = "queued"
+JOB_PRINTING = "printing"
+JOB_RETRYING = "retrying"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+def is_transient_error(err):
+    """Tells whether retrying may fix a print error.
+
+    The printer being off, unplugged, out of labels or timing out goes away
+    eventually. Anything else, e.g. an unknown printer model, a label that
+    doesn't fit or a missing barcode library, fails the same way every time.
+    """
+    return isinstance(err, (OSError, PartialPrintError))
+
+
+def error_message(err):
+    return str(err) or type(err).__name__
+
+
+def open_printer(printer_name):
+    """Default printer factory; the backends load with the first print job."""
+    from esp_flasher.backend.printer import get_printer
+
+    return get_printer(printer_name)
+
+
+class PrintJob:
+    """A label print job and its current status."""
+
+    def __init__(
+        self, printer_name, label, layout, job_id=None, created=None, held=False
+    ):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.printer_name = printer_name
+        self.label = LabelData.coerce(label)
+        self.layout = layout or LabelLayout()
+        self.created = created or time.time()
+        self.status = JOB_HELD if held else JOB_QUEUED
+        self.error = ""
+        self.attempts = 0
+        self._finished = threading.Event()
+        self._callbacks = []
+        self._callback_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        """Waits until the job is printed or failed, returns its status."""
+        self._finished.wait(timeout)
+        return self.status
+
+    def is_finished(self):
+        return self._finished.is_set()
+
+    def add_done_callback(self, callback):
+        """Calls `callback(job)` once the job is finished, right away if it is."""
+        with self._callback_lock:
+            if not self._finished.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "printer_name": self.printer_name,
+            "label": self.label.to_dict(),
+            "layout": self.layout.to_dict(),
+            "created": self.created,
+            "held": self.status == JOB_HELD,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["printer_name"],
+            LabelData.from_dict(data["label"]),
+            LabelLayout.from_dict(data["layout"]),
+            job_id=data["job_id"],
+            created=data["created"],
+            held=data.get("held", False),
+        )
+
+    def _finish(self, status, error=""):
+        self.status = status
+        self.error = error
+        with self._callback_lock:
+            self._finished.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as err:
+                logging.error(f"Print job callback failed: {err}")
+
+
+class PrintSpooler:
+    """Long-lived print queue with one worker and one connection per printer.
+
+    Jobs are journaled to the spool directory until they are printed or
+    cancelled, so a crash or restart does not lose queued labels. Queued jobs
+    for the same printer and layout are merged into one multi-page job. A
+    printer that is offline is retried for as long as it takes, with an
+    exponential backoff capped at `max_retry_delay`. When a job fails after
+    some of its pages came out, those are finished and only the rest is
+    retried. Errors that retrying can't fix fail the jobs right away.
+    """
+
+    def __init__(
+        self,
+        spool_dir=DEFAULT_SPOOL_DIR,
+        max_batch=10,
+        retry_delay=1.0,
+        max_retry_delay=30.0,
+        printer_factory=open_printer,
+    ):
+        self.spool_dir = spool_dir
+        self.max_batch = max_batch
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._printer_factory = printer_factory
+
+        self._queues = {}  # printer_name -> deque of PrintJob
+        self._workers = {}  # printer_name -> worker thread
+        self._jobs = {}  # job_id -> PrintJob
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._stopping = False
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._recover()
+
+    def submit(self, printer_name, label, layout=None, hold=False):
+        """Queues a label and returns its PrintJob.
+
+        A held job is journaled but only printed once it is released, e.g.
+        when the board it belongs to has passed flashing and testing.
+        """
+        job = PrintJob(printer_name, label, layout, held=hold)
+        self._journal(job)
+        if hold:
+            with self._lock:
+                self._jobs[job.job_id] = job
+        else:
+            self._enqueue(job)
+        return job
+
+    def release(self, job):
+        """Queues a held job for printing. Returns False if it wasn't held."""
+        with self._lock:
+            if job.status != JOB_HELD:
+                return False
+            job.status = JOB_QUEUED
+        self._journal(job)
+        self._enqueue(job)
+        return True
+
+    def cancel(self, job):
+        """Drops a held, queued or retrying job.
+
+        Returns False if it is printing right now or already finished.
+        """
+        with self._lock:
+            if job.status == JOB_QUEUED:
+                queue = self._queues.get(job.printer_name, ())
+                if job not in queue:
+                    return False
+                queue.remove(job)
+            elif job.status == JOB_RETRYING:
+                # Its worker leaves it out of the next attempt
+                job.status = JOB_CANCELLED
+            elif job.status != JOB_HELD:
+                return False
+        self._finish([job], JOB_CANCELLED)
+        return True
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self, printer_name=None):
+        """Returns the number of queued jobs, for one printer or all."""
+        with self._lock:
+            if printer_name is not None:
+                return len(self._queues.get(printer_name, ()))
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stop(self, timeout=10):
+        """Stops the workers. Unprinted jobs stay journaled for next start."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.join(timeout)
+
+    def _recover(self):
+        """Requeues jobs journaled by a previous run."""
+        jobs = []
+        for file_name in os.listdir(self.spool_dir):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.spool_dir, file_name)
+            try:
+                with open(path, "r") as journal_file:
+                    jobs.append(PrintJob.from_dict(json.load(journal_file)))
+            except (OSError, ValueError, KeyError) as err:
+                logging.error(f"Dropping unreadable print job {path}: {err}")
+                os.remove(path)
+        for job in sorted(jobs, key=lambda job: job.created):
+            if job.status == JOB_HELD:
+                # Whether its board passed is unknown, don't print the label
+                logging.warning(
+                    f"Dropping held print job for '{job.label.device_name}', "
+                    "its board never finished."
+                )
+                self._forget(job)
+                continue
+            logging.info(f"Requeued print job for '{job.label.device_name}'.")
+            self._enqueue(job)
+
+    def _journal_path(self, job):
+        return os.path.join(self.spool_dir, f"{job.job_id}.json")
+
+    def _journal(self, job):
+        path = self._journal_path(job)
+        with open(path + ".tmp", "w") as journal_file:
+            json.dump(job.to_dict(), journal_file)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _forget(self, job):
+        try:
+            os.remove(self._journal_path(job))
+        except OSError:
+            pass
+
+    def _enqueue(self, job):
+        with self._condition:
+            self._jobs[job.job_id] = job
+            self._queues.setdefault(job.printer_name, deque()).append(job)
+            worker = self._workers.get(job.printer_name)
+            if worker is None or not worker.is_alive():
+                self._stopping = False
+                worker = threading.Thread(
+                    target=self._run,
+                    args=(job.printer_name,),
+                    name=f"PrintSpooler-{job.printer_name}",
+                    daemon=True,
+                )
+                self._workers[job.printer_name] = worker
+                worker.start()
+            self._condition.notify_all()
+
+    def _next_batch(self, printer_name):
+        """Waits for jobs and takes the next run of jobs with the same layout."""
+        with self._condition:
+            queue = self._queues[printer_name]
+            while not queue and not self._stopping:
+                self._condition.wait()
+            if self._stopping:
+                return []
+
+            batch = [queue.popleft()]
+            while queue and len(batch) < self.max_batch:
+                if queue[0].layout != batch[0].layout:
+                    break
+                batch.append(queue.popleft())
+            return batch
+
+    def _run(self, printer_name):
+        printer = None
+        try:
+            while True:
+                batch = self._next_batch(printer_name)
+                if not batch:
+                    return
+                printer = self._print_batch(printer_name, printer, batch)
+        finally:
+            if printer is not None:
+                printer.close()
+
+    def _print_batch(self, printer_name, printer, batch):
+        """Prints a batch, retrying until it is printed, cancelled or fails
+        with an error that retrying can't fix.
+
+        Returns the printer, opened on the first attempt that needs it.
+        """
+        delay = self.retry_delay
+        while True:
+            with self._lock:
+                # Jobs cancelled while waiting for a retry are left out
+                batch = [job for job in batch if job.status != JOB_CANCELLED]
+                for job in batch:
+                    job.status = JOB_PRINTING
+                    job.attempts += 1
+            if not batch:
+                return printer
+            try:
+                if printer is None:
+                    printer = self._printer_factory(printer_name)
+                printer.print_labels([job.label for job in batch], batch[0].layout)
+            except Exception as err:
+                printed = err.printed if isinstance(err, PartialPrintError) else 0
+                if printed:
+                    # Those labels came out, reprinting them would duplicate them
+                    self._finish(batch[:printed], JOB_DONE)
+                    batch = batch[printed:]
+                if not is_transient_error(err):
+                    logging.error(
+                        f"Printing {len(batch)} labels on {printer_name} failed: "
+                        f"{error_message(err)}"
+                    )
+                    self._finish(batch, JOB_FAILED, error_message(err))
+                    return printer
+                logging.warning(
+                    f"Printer {printer_name} unavailable ({error_message(err)}), "
+                    f"retrying {len(batch)} labels in {delay:g} s."
+                )
+                with self._condition:
+                    for job in batch:
+                        job.status = JOB_RETRYING
+                    if not self._stopping:
+                        self._condition.wait(delay)
+                    if self._stopping:
+                        # Keep the jobs journaled and queued for the next start
+                        batch = [job for job in batch if job.status != JOB_CANCELLED]
+                        for job in batch:
+                            job.status = JOB_QUEUED
+                        self._queues[printer_name].extendleft(reversed(batch))
+                        return printer
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+
+            self._finish(batch, JOB_DONE)
+            return printer
+
+    def _finish(self, batch, status, error=""):
+        for job in batch:
+            self._forget(job)
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            job._finish(status, error)
+
+
+_spooler = None
+_spooler_lock = threading.Lock()
+
+
+def get_print_spooler(printer_settings=None):
+    """Returns the application wide spooler, creating it on first use."""
+    global _spooler
+    with _spooler_lock:
+        if _spooler is None:
+            settings = printer_settings or {}
+            _spooler = PrintSpooler(
+                spool_dir=settings.get("spool_dir", DEFAULT_SPOOL_DIR),
+                max_batch=settings.get("max_batch", 10),
+                retry_delay=settings.get("retry_delay_seconds", 1.0),
+                max_retry_delay=settings.get("max_retry_delay_seconds", 30.0),
+            )
+        return _spooler
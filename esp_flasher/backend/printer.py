@@ -1,13 +1,22 @@
 import platform
-from esp_flasher.backend.printers.brother_printer import BrotherQLPrinter
-from esp_flasher.backend.printers.win_printer import WindowsPrinter
+from esp_flasher.backend.printers.virtual_printer import (
+    VirtualPrinter,
+    VIRTUAL_PRINTER_PREFIX,
+)
 
 
 def get_printer(printer_name):
     """Returns the correct printer implementation based on OS."""
+    if printer_name.startswith(VIRTUAL_PRINTER_PREFIX):
+        return VirtualPrinter.from_name(printer_name)
+    # Imported here so each OS only needs its own printing libraries
     if platform.system() == "Linux":
+        from esp_flasher.backend.printers.brother_printer import BrotherQLPrinter
+
         return BrotherQLPrinter(printer_name)
     elif platform.system() == "Windows":
+        from esp_flasher.backend.printers.win_printer import WindowsPrinter
+
         return WindowsPrinter(printer_name)
     else:
         raise ValueError("Unsupported OS for printing")
@@ -1,18 +1,46 @@
 from abc import ABC, abstractmethod
 
+from esp_flasher.backend.printers.label_layout import LabelLayout
+
+
+class PartialPrintError(RuntimeError):
+    """A multi-label job failed after its first `printed` labels came out."""
+
+    def __init__(self, message, printed=0):
+        super().__init__(message)
+        self.printed = printed
+
+
+class PrinterUnavailableError(OSError):
+    """The printer can't be reached right now, e.g. it is off or unplugged."""
+
 
 class BasePrinter(ABC):
     """Abstract base class for printers."""
 
     @abstractmethod
-    def print_label(
-        self,
-        message: str,
-        label_width: int,
-        x_offset: int,
-        y_offset: int,
-        text_rotation: int,
-        font_size: int,
-    ):
-        """Prints a label with the given message."""
+    def print_label(self, label, layout: LabelLayout = None):
+        """Prints a label.
+
+        `label` is a LabelData or a plain text message, `layout` defaults
+        to LabelLayout().
+        """
+        pass
+
+    def print_labels(self, labels, layout: LabelLayout = None):
+        """Prints several labels as one job, raising on failure.
+
+        Printers that can batch pages override this; the default prints the
+        labels one by one. Raises PartialPrintError if the printer can tell
+        that some labels were printed before the failure, and OSError (e.g.
+        PrinterUnavailableError) if it can't be reached. Any other error is
+        taken as one that retrying won't fix.
+        """
+        for printed, label in enumerate(labels):
+            result = self.print_label(label, layout)
+            if result.startswith("Error"):
+                raise PartialPrintError(result, printed)
+
+    def close(self):
+        """Releases the connection to the printer, if one is kept open."""
         pass
@@ -1,41 +1,115 @@
-from esp_flasher.backend.printers.base_printer import BasePrinter
-from brother_ql.raster import BrotherQLRaster
-from brother_ql.conversion import convert
-from brother_ql.backends.helpers import send
+import logging
+import time
+
+from esp_flasher.backend.printers.base_printer import (
+    BasePrinter,
+    PartialPrintError,
+    PrinterUnavailableError,
+)
+from esp_flasher.backend.printers.label_template import (
+    DEFAULT_MODEL,
+    check_model,
+    get_label_template,
+)
+from brother_ql.backends import backend_factory, guess_backend
+from brother_ql.reader import interpret_response
+
+STATUS_TIMEOUT = 10  # Seconds to wait for the printer to report completion
 
 
 class BrotherQLPrinter(BasePrinter):
     """Printer implementation for Linux with configurable label settings."""
 
-    def __init__(
-        self,
-        printer_name,
-    ):
+    def __init__(self, printer_name, model=DEFAULT_MODEL):
         self.printer_name = printer_name
+        self.model = check_model(model)
+        self._backend_name = None
+        self._connection = None
 
-    def print_label(
-        self,
-        message: str,
-        label_width=62,  # Label width
-        x_offset=100,  # Horizontal text offset
-        y_offset=100,  # Vertical text offset
-        text_rotation=270,  # Rotation of text in degrees
-        font_size=20,  # Font size in points
-    ):
+    def print_label(self, label, layout=None):
         """Prints a label using Brother QL-600 on Linux with configurable label dimensions."""
         try:
-            ql = BrotherQLRaster("QL-600B")
-            instructions = convert(
-                ql,
-                [message],
-                label=str(label_width),  # Set label width dynamically
-                rotate=text_rotation,  # Apply text rotation
-                threshold=x_offset,
-                dither=True,
-                compress=False,
-                dpi_600=False,
-            )
-            send(instructions, self.printer_name)
+            self.print_labels([label], layout)
             return "Print job sent successfully."
         except Exception as err:
             return f"Error printing label: {err}"
+
+    def print_labels(self, labels, layout=None):
+        """Prints the labels as one multi-page raster job."""
+        # Static label rows are rendered once per layout and reused
+        template = get_label_template(self.model, layout)
+        self.send(template.render_job(labels))
+
+    def send(self, instructions):
+        """Writes a print job over the open connection and waits for it.
+
+        The connection is kept open between jobs. It is dropped on any error
+        so the next job reconnects, e.g. after the printer was switched off.
+        """
+        try:
+            connection = self._connect()
+            connection.write(instructions)
+            # Network printers and spool files cannot report their status
+            if self._backend_name != "network" and not self.printer_name.startswith(
+                "file://"
+            ):
+                self._wait_until_printed(connection)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.dispose()
+            except Exception as err:
+                logging.debug(f"Closing printer connection failed: {err}")
+            self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            try:
+                self._backend_name = guess_backend(self.printer_name)
+            except ValueError:
+                self._backend_name = "linux_kernel"
+            backend_class = backend_factory(self._backend_name)["backend_class"]
+            try:
+                self._connection = backend_class(self.printer_name)
+            except ValueError as err:
+                # The pyusb backend reports an unplugged printer this way
+                raise PrinterUnavailableError(
+                    f"Printer {self.printer_name} not found: {err}"
+                ) from err
+        return self._connection
+
+    @staticmethod
+    def _wait_until_printed(connection):
+        """Reads the printer status until the job is printed.
+
+        The printer reports every finished page, so an error raises a
+        PartialPrintError with the pages printed before it.
+        """
+        start = time.time()
+        printed = 0
+        while time.time() - start < STATUS_TIMEOUT:
+            data = connection.read()
+            if not data:
+                time.sleep(0.005)
+                continue
+            try:
+                result = interpret_response(data)
+            except ValueError:
+                continue
+            if result["errors"]:
+                raise PartialPrintError(
+                    f"Printer error: {', '.join(result['errors'])}", printed
+                )
+            if result["status_type"] == "Printing completed":
+                printed += 1
+            if (
+                printed
+                and result["status_type"] == "Phase change"
+                and result["phase_type"] == "Waiting to receive"
+            ):
+                return
+        logging.warning("Printer did not confirm the job, printing may have failed.")
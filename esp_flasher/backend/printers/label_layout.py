@@ -0,0 +1,171 @@
+PRINTER_DPI = 300
+DEFAULT_LABEL_LENGTH = 300  # Rows (dots) of an endless label, ~25 mm at 300 DPI
+
+CODE_QR = "qr"
+CODE_DATAMATRIX = "datamatrix"
+
+
+class LabelData:
+    """What goes on a device label."""
+
+    def __init__(self, device_name, mac_address="", firmware_version=""):
+        self.device_name = device_name
+        self.mac_address = mac_address
+        self.firmware_version = firmware_version
+
+    @classmethod
+    def coerce(cls, label):
+        """Accepts a LabelData or a plain text message."""
+        if isinstance(label, cls):
+            return label
+        return cls(str(label))
+
+    def code_payload(self):
+        """Returns the text encoded in the label's 2D code."""
+        fields = [("N", self.device_name)]
+        fields += [("M", self.mac_address), ("V", self.firmware_version)]
+        return ";".join(f"{key}:{value}" for key, value in fields if value)
+
+    def to_dict(self):
+        return {
+            "device_name": self.device_name,
+            "mac_address": self.mac_address,
+            "firmware_version": self.firmware_version,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["device_name"],
+            data.get("mac_address", ""),
+            data.get("firmware_version", ""),
+        )
+
+
+class LabelLayout:
+    """Geometry of a label: text placement and an optional 2D code.
+
+    Offsets and sizes are in printer dots, in the orientation the label is
+    read. The 2D code, if any, sits at the offsets and the text follows it.
+    """
+
+    def __init__(
+        self,
+        label_width=62,  # Label width
+        x_offset=100,  # Horizontal text offset
+        y_offset=100,  # Vertical text offset
+        text_rotation=270,  # Rotation of text in degrees
+        font_size=20,  # Font size in points
+        code=None,  # None, CODE_QR or CODE_DATAMATRIX
+        code_size=150,  # Edge length of the 2D code in dots
+        code_gap=20,  # Space between the 2D code and the text in dots
+        label_length=DEFAULT_LABEL_LENGTH,  # Minimum length of endless labels
+    ):
+        if text_rotation % 90:
+            raise ValueError("Text rotation must be a multiple of 90 degrees")
+        if code not in (None, CODE_QR, CODE_DATAMATRIX):
+            raise ValueError(f"Unsupported label code: {code}")
+
+        self.label_width = label_width
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.text_rotation = text_rotation % 360
+        self.font_size = font_size
+        self.code = code
+        self.code_size = code_size
+        self.code_gap = code_gap
+        self.label_length = label_length
+        self._font = None
+
+    @classmethod
+    def from_settings(cls, printer_settings, **overrides):
+        """Builds a layout from the printer_settings section of the config."""
+        values = {
+            "label_width": printer_settings.get("label_width", 62),
+            "x_offset": printer_settings.get("x_offset", 100),
+            "y_offset": printer_settings.get("y_offset", 100),
+            "text_rotation": printer_settings.get("text_rotation", 270),
+            "font_size": printer_settings.get("font_size", 20),
+            "code": printer_settings.get("label_code") or None,
+            "code_size": printer_settings.get("code_size", 150),
+            "code_gap": printer_settings.get("code_gap", 20),
+            "label_length": printer_settings.get("label_length", DEFAULT_LABEL_LENGTH),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def to_dict(self):
+        return {
+            "label_width": self.label_width,
+            "x_offset": self.x_offset,
+            "y_offset": self.y_offset,
+            "text_rotation": self.text_rotation,
+            "font_size": self.font_size,
+            "code": self.code,
+            "code_size": self.code_size,
+            "code_gap": self.code_gap,
+            "label_length": self.label_length,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def _key(self):
+        return tuple(sorted(self.to_dict().items()))
+
+    def __eq__(self, other):
+        return isinstance(other, LabelLayout) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    @property
+    def font(self):
+        if self._font is None:
+            from esp_flasher.backend.printers.label_raster import load_font
+
+            self._font = load_font(self.font_size)
+        return self._font
+
+    def render(self, label):
+        """Rasterizes the variable content of a label.
+
+        Returns (dots, x, y): a boolean array of printed dots and its
+        position on the label, before rotation.
+        """
+        # NumPy and Pillow load with the first label, not with the GUI
+        from esp_flasher.backend.printers import label_raster
+
+        label = LabelData.coerce(label)
+        parts = []  # (dots, x, y) relative to the offsets
+
+        text_x = text_y = 0
+        if self.code:
+            payload = label.code_payload()
+            if self.code == CODE_QR:
+                modules = label_raster.qr_modules(payload)
+            else:
+                modules = label_raster.datamatrix_modules(payload)
+            code_dots = label_raster.scale_modules(modules, self.code_size)
+            parts.append((code_dots, 0, 0))
+            text_x = code_dots.shape[1] + self.code_gap
+            text_y = code_dots.shape[0]  # Centered against the code below
+
+        text_dots = label_raster.render_text(label.device_name, self.font)
+        if text_dots is not None:
+            text_y = max(0, (text_y - text_dots.shape[0]) // 2)
+            parts.append((text_dots, text_x, text_y))
+
+        return label_raster.compose(parts), self.x_offset, self.y_offset
+
+    def render_image(self, label):
+        """Rasterizes the label content rotated as printed.
+
+        Returns (image, x, y): a 1-bit image with the printed dots black on
+        white, and the offsets to draw it at.
+        """
+        from esp_flasher.backend.printers.label_raster import dots_to_image
+
+        dots, x, y = self.render(label)
+        return dots_to_image(dots, self.text_rotation), x, y
@@ -0,0 +1,123 @@
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from esp_flasher.backend.printers.label_layout import PRINTER_DPI
+
+# 8x8 Bayer matrix, normalized to 0..255 thresholds for ordered dithering
+_BAYER_8 = np.array(
+    [
+        [0, 32, 8, 40, 2, 34, 10, 42],
+        [48, 16, 56, 24, 50, 18, 58, 26],
+        [12, 44, 4, 36, 14, 46, 6, 38],
+        [60, 28, 52, 20, 62, 30, 54, 22],
+        [3, 35, 11, 43, 1, 33, 9, 41],
+        [51, 19, 59, 27, 49, 17, 57, 25],
+        [15, 47, 7, 39, 13, 45, 5, 37],
+        [63, 31, 55, 23, 61, 29, 53, 21],
+    ],
+    dtype=np.uint16,
+)
+_BAYER_THRESHOLDS = ((_BAYER_8 * 255 + 127) // 64).astype(np.uint8)
+
+
+def load_font(font_size, dpi=PRINTER_DPI):
+    """Loads a TrueType font sized in points for the printer resolution."""
+    size_px = max(1, int(round(font_size * dpi / 72)))
+    for name in ("DejaVuSans.ttf", "arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size_px)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size_px)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def threshold(gray, level=128):
+    """Returns a boolean dot mask of a grayscale array, True where printed."""
+    return np.asarray(gray, dtype=np.uint8) < level
+
+
+def bayer_dither(gray):
+    """Ordered dithering of a grayscale array, True where printed."""
+    gray = np.asarray(gray, dtype=np.uint8)
+    height, width = gray.shape
+    # Enough whole tiles to cover the array (ceil division)
+    tiles = np.tile(_BAYER_THRESHOLDS, (-(-height // 8), -(-width // 8)))
+    return gray < tiles[:height, :width]
+
+
+def scale_modules(modules, size):
+    """Scales a 2D-code module matrix by the largest integer that fits `size`."""
+    scale = max(1, size // max(modules.shape))
+    return np.kron(modules, np.ones((scale, scale), dtype=bool))
+
+
+def qr_modules(payload):
+    """Returns the QR code modules of the payload as a boolean matrix."""
+    import qrcode
+
+    # A fixed mask skips scoring all eight masks, which dominates render time
+    qr = qrcode.QRCode(
+        border=0,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        mask_pattern=0,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return np.array(qr.get_matrix(), dtype=bool)
+
+
+def datamatrix_modules(payload):
+    """Returns the DataMatrix modules of the payload as a boolean matrix.
+
+    Needs the optional pylibdmtx package and the libdmtx library.
+    """
+    try:
+        from pylibdmtx.pylibdmtx import encode
+    except ImportError as err:
+        raise RuntimeError(
+            "DataMatrix labels need pylibdmtx and libdmtx to be installed"
+        ) from err
+
+    encoded = encode(payload.encode("utf-8"))
+    pixels = np.frombuffer(encoded.pixels, dtype=np.uint8)
+    dots = pixels.reshape(encoded.height, encoded.width, encoded.bpp // 8)[..., 0] < 128
+    # Crop the quiet zone, then sample one pixel per module
+    rows = np.flatnonzero(dots.any(axis=1))
+    cols = np.flatnonzero(dots.any(axis=0))
+    dots = dots[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+    module_size = 5  # libdmtx default
+    return dots[::module_size, ::module_size]
+
+
+def render_text(text, font):
+    """Rasterizes a line of text tightly cropped, True where printed.
+
+    Returns None for text without visible pixels.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    if right <= left or bottom <= top:
+        return None
+    im = Image.new("L", (right - left, bottom - top), 255)
+    ImageDraw.Draw(im).text((-left, -top), text, font=font, fill=0)
+    return threshold(im)
+
+
+def compose(parts):
+    """Draws (dots, x, y) parts onto one canvas just large enough for them."""
+    if not parts:
+        return np.zeros((0, 0), dtype=bool)
+    height = max(dots.shape[0] + y for dots, _, y in parts)
+    width = max(dots.shape[1] + x for dots, x, _ in parts)
+    canvas = np.zeros((height, width), dtype=bool)
+    for dots, x, y in parts:
+        canvas[y : y + dots.shape[0], x : x + dots.shape[1]] |= dots
+    return canvas
+
+
+def dots_to_image(dots, rotation=0):
+    """Returns the dots rotated as printed, as a 1-bit image with printed
+    dots black (0) on white, ready to print as is."""
+    return Image.fromarray(~np.rot90(dots, rotation // 90))
@@ -0,0 +1,236 @@
+import functools
+import logging
+
+import numpy as np
+from PIL import Image
+from brother_ql.raster import BrotherQLRaster
+from brother_ql.devicedependent import (
+    label_type_specs,
+    models,
+    right_margin_addition,
+    ENDLESS_LABEL,
+)
+from brother_ql import BrotherQLUnsupportedCmd
+
+from esp_flasher.backend.printers.label_layout import LabelLayout
+from esp_flasher.backend.printers.label_raster import bayer_dither
+
+RASTER_ROW_COMMAND = b"\x67\x00"
+PAGE_BREAK = b"\x0c"
+PRINT_COMMAND = b"\x1a"
+
+# brother_ql has no QL-600, which has the QL-700's print head and commands
+DEFAULT_MODEL = "QL-700"
+
+
+class LabelTemplate:
+    """A Brother QL label layout whose static part is rasterized once.
+
+    The command preamble, page headers and raster rows of the static label
+    (blank tape plus optional background artwork, dithered once) are cached.
+    Rendering a label only rasterizes its variable content and patches the
+    rows it covers; every other row is reused as is.
+    """
+
+    def __init__(self, model, layout, background=None, cut=True):
+        specs = label_type_specs[str(layout.label_width)]
+        qlr = BrotherQLRaster(model)
+
+        self.layout = layout
+        self.rotation = layout.text_rotation
+        self.device_width = qlr.get_pixel_width()
+        self.printable_width = specs["dots_printable"][0]
+        self.endless = specs["kind"] == ENDLESS_LABEL
+        if self.endless:
+            self.length = layout.label_length
+        else:
+            self.length = specs["dots_printable"][1]
+        # Printable area is right-aligned on the print head
+        right_margin = specs["right_margin_dots"] + right_margin_addition.get(model, 0)
+        self._label_left = self.device_width - self.printable_width - right_margin
+        self._row_bytes = self.device_width // 8
+
+        self._qlr = qlr
+        self._specs = specs
+        self._cut = cut
+        self._page_headers = {}
+        self.preamble = self._build_preamble(qlr)
+
+        # Encoded raster rows: a row command, the row length and the row dots
+        self._row_prefix = np.frombuffer(
+            RASTER_ROW_COMMAND + bytes([self._row_bytes]), dtype=np.uint8
+        )
+        self.static_rows = self._render_static_rows(background)
+
+    def design_size(self, length):
+        """Size of the label as it is read, before rotating it onto the tape."""
+        if self.rotation in (90, 270):
+            return (length, self.printable_width)
+        return (self.printable_width, length)
+
+    @staticmethod
+    def _build_preamble(qlr):
+        qlr.data = b""
+        try:
+            qlr.add_switch_mode()
+        except BrotherQLUnsupportedCmd:
+            pass
+        qlr.add_invalidate()
+        qlr.add_initialize()
+        try:
+            qlr.add_switch_mode()
+        except BrotherQLUnsupportedCmd:
+            pass
+        return qlr.data
+
+    def page_header(self, length, first_page=True):
+        """Returns the cached page header for a label of `length` rows."""
+        key = (length, first_page)
+        if key not in self._page_headers:
+            self._page_headers[key] = self._build_page_header(
+                self._qlr, self._specs, self._cut, length, 0 if first_page else 1
+            )
+        return self._page_headers[key]
+
+    @staticmethod
+    def _build_page_header(qlr, specs, cut, length, page_number):
+        qlr.data = b""
+        qlr.page_number = page_number
+        qlr.add_status_information()
+        tape_size = specs["tape_size"]
+        if specs["kind"] == ENDLESS_LABEL:
+            qlr.mtype = 0x0A
+            qlr.mwidth = tape_size[0]
+            qlr.mlength = 0
+        else:
+            qlr.mtype = 0x0B
+            qlr.mwidth = tape_size[0]
+            qlr.mlength = tape_size[1]
+        qlr.pquality = 1
+        qlr.add_media_and_quality(length)
+        try:
+            if cut:
+                qlr.add_autocut(True)
+                qlr.add_cut_every(1)
+        except BrotherQLUnsupportedCmd:
+            pass
+        try:
+            qlr.dpi_600 = False
+            qlr.cut_at_end = cut
+            qlr.two_color_printing = False
+            qlr.add_expanded_mode()
+        except BrotherQLUnsupportedCmd:
+            pass
+        qlr.add_margins(specs["feed_margin"])
+        return qlr.data
+
+    def _render_static_rows(self, background):
+        """Rasterizes the static label once into packed, mirrored rows."""
+        if background is None:
+            return np.zeros((self.length, self._row_bytes), dtype=np.uint8)
+
+        im = Image.open(background) if isinstance(background, str) else background
+        gray = np.asarray(im.convert("L").resize(self.design_size(self.length)))
+        dots = np.rot90(bayer_dither(gray), self.rotation // 90)
+        return self._pack_rows(dots, 0)
+
+    def _pack_rows(self, dots, left):
+        """Packs a dot array placed at `left` on the tape into raster rows.
+
+        Rows are device wide and mirrored, as the print head expects them.
+        """
+        rows = np.zeros((dots.shape[0], self.device_width), dtype=bool)
+        start = self._label_left + left
+        rows[:, start : start + dots.shape[1]] = dots
+        return np.packbits(rows[:, ::-1], axis=1)
+
+    def _encode_rows(self, rows):
+        prefix = np.broadcast_to(self._row_prefix, (rows.shape[0], 3))
+        return np.hstack((prefix, rows)).tobytes()
+
+    def _required_length(self, dots, x, y):
+        """Rows an endless label needs so that the content is not clipped."""
+        if self.rotation in (90, 270):
+            needed = x + dots.shape[1]
+        else:
+            needed = y + dots.shape[0]
+        return max(self.length, needed)
+
+    def _place_content(self, dots, x, y, length):
+        """Clips and rotates the content, returns (dots, left, top) on the tape."""
+        width, height = self.design_size(length)
+        x0, y0 = max(0, x), max(0, y)
+        x1 = min(width, x + dots.shape[1])
+        y1 = min(height, y + dots.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            logging.warning("Label content is outside of the printable area.")
+            return None, 0, 0
+        if x1 - x0 < dots.shape[1] or y1 - y0 < dots.shape[0]:
+            logging.warning("Label content does not fit and is clipped.")
+
+        dots = np.rot90(dots[y0 - y : y1 - y, x0 - x : x1 - x], self.rotation // 90)
+
+        # Where the content box lands once the label is rotated onto the tape
+        if self.rotation == 0:
+            return dots, x0, y0
+        if self.rotation == 90:
+            return dots, y0, width - x1
+        if self.rotation == 180:
+            return dots, width - x1, height - y1
+        return dots, height - y1, x0
+
+    def render_rows(self, label):
+        """Returns the packed, mirrored raster rows of one label."""
+        dots, x, y = self.layout.render(label)
+        length = self._required_length(dots, x, y) if self.endless else self.length
+
+        # Endless labels grow with the content; for 90 and 180 degrees the
+        # label starts at the end of the tape, so the extra rows go first
+        rows = self.static_rows
+        extra = length - self.length
+        if extra:
+            if self.rotation in (90, 180):
+                rows = np.pad(rows, ((extra, 0), (0, 0)))
+            else:
+                rows = np.pad(rows, ((0, extra), (0, 0)))
+
+        content, left, top = self._place_content(dots, x, y, length)
+        if content is not None:
+            rows = rows.copy()
+            rows[top : top + content.shape[0]] |= self._pack_rows(content, left)
+        return rows
+
+    def render_page(self, label, first_page=True):
+        """Returns the page header and raster rows of one label."""
+        rows = self.render_rows(label)
+        return self.page_header(rows.shape[0], first_page) + self._encode_rows(rows)
+
+    @staticmethod
+    def rows_to_image(rows):
+        """Converts raster rows back to the image as it comes out of the printer."""
+        dots = np.unpackbits(rows, axis=1)[:, ::-1].astype(bool)
+        return Image.fromarray(~dots)
+
+    def render_job(self, labels):
+        """Returns a complete print job with one page per label."""
+        pages = [
+            self.render_page(label, first_page=(i == 0))
+            for i, label in enumerate(labels)
+        ]
+        return self.preamble + PAGE_BREAK.join(pages) + PRINT_COMMAND
+
+
+def check_model(model):
+    """Returns the model, raises ValueError if brother_ql doesn't support it."""
+    if model not in models:
+        raise ValueError(
+            f"Unknown Brother QL model '{model}', supported models are "
+            f"{', '.join(models)}"
+        )
+    return model
+
+
+@functools.lru_cache(maxsize=16)
+def get_label_template(model, layout=None, background=None):
+    """Returns the cached template for the layout, building it on first use."""
+    return LabelTemplate(model, layout or LabelLayout(), background=background)
@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+import time
+from urllib.parse import parse_qs
+
+from esp_flasher.backend.printers.base_printer import BasePrinter, PartialPrintError
+from esp_flasher.backend.printers.label_template import (
+    DEFAULT_MODEL,
+    check_model,
+    get_label_template,
+)
+
+VIRTUAL_PRINTER_PREFIX = "virtual:"
+FORMAT_RASTER = "raster"
+FORMAT_PNG = "png"
+
+
+class VirtualPrinter(BasePrinter):
+    """Printer that writes what it would print to files instead of a device.
+
+    Raster output is the exact Brother QL job a real printer would receive,
+    one .bin file per job. PNG output is one image per label, decoded from
+    the same raster rows. An optional latency per label simulates the print
+    speed of a real printer.
+    """
+
+    def __init__(
+        self, output_dir, output_format=FORMAT_RASTER, latency=0.0, model=DEFAULT_MODEL
+    ):
+        if output_format not in (FORMAT_RASTER, FORMAT_PNG):
+            raise ValueError(f"Unsupported virtual printer format: {output_format}")
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.latency = latency
+        self.model = check_model(model)
+        self._counter = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @classmethod
+    def from_name(cls, printer_name):
+        """Creates a printer from a name like virtual:out?format=png&latency=0.5"""
+        spec = printer_name[len(VIRTUAL_PRINTER_PREFIX) :]
+        output_dir, _, query = spec.partition("?")
+        options = {key: values[-1] for key, values in parse_qs(query).items()}
+        return cls(
+            output_dir or "virtual_printer",
+            output_format=options.get("format", FORMAT_RASTER),
+            latency=float(options.get("latency", 0.0)),
+            model=options.get("model", DEFAULT_MODEL),
+        )
+
+    def print_label(self, label, layout=None):
+        """Writes a label to the output directory."""
+        try:
+            self.print_labels([label], layout)
+            return "Print job sent successfully."
+        except Exception as err:
+            return f"Error printing label: {err}"
+
+    def print_labels(self, labels, layout=None):
+        """Writes the labels as one job."""
+        template = get_label_template(self.model, layout)
+        job_number = self._next_job_number()
+
+        if self.output_format == FORMAT_RASTER:
+            path = os.path.join(self.output_dir, f"job_{job_number:06d}.bin")
+            with open(path, "wb") as raster_file:
+                raster_file.write(template.render_job(labels))
+        else:
+            for page, label in enumerate(labels):
+                path = os.path.join(
+                    self.output_dir, f"job_{job_number:06d}_{page:03d}.png"
+                )
+                try:
+                    template.rows_to_image(template.render_rows(label)).save(path)
+                except OSError as err:
+                    raise PartialPrintError(f"Writing {path} failed: {err}", page)
+
+        if self.latency:
+            time.sleep(self.latency * len(labels))
+        logging.debug(f"Virtual printer wrote job {job_number} to {self.output_dir}")
+
+    def _next_job_number(self):
+        with self._lock:
+            self._counter += 1
+            return self._counter
@@ -1,6 +1,11 @@
 import win32ui
 import win32con
-from esp_flasher.backend.printers.base_printer import BasePrinter
+from PIL import ImageWin
+from esp_flasher.backend.printers.base_printer import (
+    BasePrinter,
+    PrinterUnavailableError,
+)
+from esp_flasher.backend.printers.label_layout import LabelLayout, PRINTER_DPI
 
 
 class WindowsPrinter(BasePrinter):
@@ -8,47 +13,45 @@ class WindowsPrinter(BasePrinter):
 
     def __init__(self, printer_name):
         self.printer_name = printer_name
-        self.font_weight = win32con.FW_NORMAL  # Font weight (e.g., normal, bold)
 
-    def print_label(
-        self,
-        message: str,
-        label_width=62,  # Label width
-        x_offset=100,  # Horizontal text offset
-        y_offset=100,  # Vertical text offset
-        text_rotation=270,  # Rotation of text in degrees
-        font_size=20,  # Font size in points
-    ):
+    def print_label(self, label, layout=None):
         """Prints a label using Windows printing API with configurable label dimensions."""
         try:
-            hprinter_dc = win32ui.CreateDC()
-            hprinter_dc.CreatePrinterDC(self.printer_name)
+            self.print_labels([label], layout)
+            return "Print job sent successfully."
+        except Exception as err:
+            return f"Error printing label: {err}"
 
-            # Set page size based on label dimensions (convert mm to pixels at 300 DPI)
-            dpi = hprinter_dc.GetDeviceCaps(win32con.LOGPIXELSX)  # Get DPI
+    def print_labels(self, labels, layout=None):
+        """Prints the labels as pages of a single document."""
+        layout = layout or LabelLayout()
+        hprinter_dc = win32ui.CreateDC()
+        try:
+            hprinter_dc.CreatePrinterDC(self.printer_name)
+        except win32ui.error as err:
+            raise PrinterUnavailableError(
+                f"Printer {self.printer_name} unavailable: {err}"
+            ) from err
+        try:
+            # Labels are rendered at 300 DPI, scale them to the printer DPI
+            scale = hprinter_dc.GetDeviceCaps(win32con.LOGPIXELSX) / PRINTER_DPI
 
-            # Page setup
             hprinter_dc.StartDoc("Label Print")
-            hprinter_dc.StartPage()
-
-            # Apply text rotation and font settings
-            font = win32ui.CreateFont(
-                {
-                    "height": -int(font_size * dpi / 72),  # Convert to pixels
-                    "weight": self.font_weight,
-                    # Rotation in tenths of degrees
-                    "escapement": text_rotation * 10,
-                }
-            )
-            hprinter_dc.SelectObject(font)
-
-            # Print text with offsets
-            hprinter_dc.TextOut(x_offset, y_offset, message)
-
-            hprinter_dc.EndPage()
+            for label in labels:
+                image, x_offset, y_offset = layout.render_image(label)
+                x, y = int(x_offset * scale), int(y_offset * scale)
+                width = int(image.size[0] * scale)
+                height = int(image.size[1] * scale)
+
+                hprinter_dc.StartPage()
+                ImageWin.Dib(image.convert("RGB")).draw(
+                    hprinter_dc.GetHandleOutput(), (x, y, x + width, y + height)
+                )
+                hprinter_dc.EndPage()
             hprinter_dc.EndDoc()
+        except win32ui.error as err:
+            raise PrinterUnavailableError(
+                f"Printer {self.printer_name} unavailable: {err}"
+            ) from err
+        finally:
             hprinter_dc.DeleteDC()
-
-            return "Print job sent successfully."
-        except Exception as err:
-            return f"Error printing label: {err}"
@@ -1,23 +1,41 @@
-from esp_flasher.core.chip_utils import detect_chip, read_chip_info
+from esp_flasher.core.chip_info_cache import chip_info_cache
+from esp_flasher.core.chip_utils import detect_chip, read_chip_info, read_chip_mac
 
 
-def dump_info(port):
-    try:
-        chip = detect_chip(port)
-        info = read_chip_info(chip)
-
-        print("Chip Information:")
-        print(f" - Chip Family: {info.family}")
-        print(f" - Model: {info.model}")
+def print_chip_info(info):
+    print("Chip Information:")
+    print(f" - Chip Family: {info.family}")
+    print(f" - Model: {info.model}")
+    if info.is_esp32:
         print(f" - Cores: {info.num_cores}")
         print(f" - CPU Frequency: {info.cpu_frequency}")
+        print(f" - WiFi: {'YES' if info.has_wifi else 'NO'}")
         print(f" - Bluetooth: {'YES' if info.has_bluetooth else 'NO'}")
+        print(f" - IEEE 802.15.4: {'YES' if info.has_ieee802154 else 'NO'}")
         print(f" - Embedded Flash: {'YES' if info.has_embedded_flash else 'NO'}")
+        print(f" - Embedded PSRAM: {'YES' if info.has_embedded_psram else 'NO'}")
         print(
             f" - Factory-Calibrated ADC: {'YES' if info.has_factory_calibrated_adc else 'NO'}"
         )
-        print(f" - MAC Address: {info.mac}")
-        chip._port.close()
+    else:
+        print(f" - Chip ID: {info.chip_id}")
+    print(f" - MAC Address: {info.mac}")
+
+
+def dump_info(port, use_cache=False):
+    try:
+        chip = detect_chip(port)
+        try:
+            # The board may have been swapped behind a fixed adapter
+            mac = read_chip_mac(chip)
+            info = chip_info_cache.get(port, mac) if use_cache else None
+            if info is None:
+                info = read_chip_info(chip, mac)
+                chip_info_cache.put(port, info)
+        finally:
+            chip._port.close()
+
+        print_chip_info(info)
 
         return info
     except Exception as e:
@@ -1,15 +1,35 @@
 import argparse
-from esp_flasher.core.const import __version__
+from esp_flasher.core.const import DEFAULT_BAUD_RATE, __version__
+
+STATION_COMMAND = "station"
+# How the station tells that the board on a port was swapped for the next one
+NEXT_BOARD_MAC = "mac"  # The port reports another MAC address
+NEXT_BOARD_REPLUG = "replug"  # The port disappears and comes back
+NEXT_BOARD_ENTER = "enter"  # The operator presses Enter
+
+
+def add_config_dir_argument(parser):
+    parser.add_argument(
+        "--config-dir",
+        help="Directory with config.json and the firmware cache (default: "
+        "config next to the executable, or in the source checkout)",
+    )
 
 
 def parse_args(argv):
+    if argv[1:2] == [STATION_COMMAND]:
+        return parse_station_args(argv)
+
     parser = argparse.ArgumentParser(prog=f"esp_flasher {__version__}")
+    parser.set_defaults(command=None)
     parser.add_argument("-p", "--port", help="Select the USB/COM port for uploading.")
     group = parser.add_mutually_exclusive_group(required=False)
     group.add_argument(
         "--upload-baud-rate", type=int, default=115200, help="Baud rate for uploading"
     )
-    parser.add_argument("--firmware", help="(ESP32-only) Firmware to flash")
+    parser.add_argument(
+        "--firmware", help="(ESP32-only) Firmware to flash, a path or http(s) URL"
+    )
     parser.add_argument(
         "--no-erase", action="store_true", help="Do not erase flash before flashing"
     )
@@ -17,4 +37,104 @@ def parse_args(argv):
     parser.add_argument(
         "--info-dump", action="store_true", help="Only show device info"
     )
+    parser.add_argument(
+        "--all-ports",
+        action="store_true",
+        help="With --info-dump, probe every serial port concurrently and print JSON",
+    )
+    parser.add_argument(
+        "--probe-workers",
+        type=int,
+        default=8,
+        help="Number of ports probed at the same time with --all-ports",
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds a single port may take with --all-ports",
+    )
+    add_config_dir_argument(parser)
     return parser.parse_args(argv[1:])
+
+
+def parse_station_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=f"esp_flasher {__version__} {STATION_COMMAND}",
+        description="Flash, test, register and label boards in a loop. "
+        "Progress is streamed to stdout as JSON lines, tool output goes to stderr.",
+    )
+    parser.set_defaults(command=STATION_COMMAND)
+    parser.add_argument(
+        "-p",
+        "--port",
+        action="append",
+        dest="ports",
+        help="Port to watch for boards, may be repeated. Defaults to every "
+        "USB-serial port, built-in UARTs are left alone.",
+    )
+    parser.add_argument(
+        "--firmware",
+        help="Firmware to flash, a path or http(s) URL, "
+        "defaults to firmware_path of the config",
+    )
+    parser.add_argument(
+        "--upload-baud-rate",
+        type=int,
+        default=DEFAULT_BAUD_RATE,
+        help="Baud rate for uploading",
+    )
+    parser.add_argument(
+        "--no-erase", action="store_true", help="Do not erase flash before flashing"
+    )
+    parser.add_argument(
+        "--printer", help="Label printer, defaults to default_printer of the config"
+    )
+    parser.add_argument(
+        "--no-register",
+        action="store_true",
+        help="Don't register boards with the backend (no labels are printed)",
+    )
+    parser.add_argument("--no-print", action="store_true", help="Don't print labels")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks for connected and removed boards",
+    )
+    parser.add_argument(
+        "--next-board",
+        choices=(NEXT_BOARD_MAC, NEXT_BOARD_REPLUG, NEXT_BOARD_ENTER),
+        default=NEXT_BOARD_MAC,
+        help="How a finished board's port takes the next board: once it "
+        "reports another MAC address (default, for fixtures with a fixed "
+        "adapter), once it is unplugged and back, or when Enter is pressed "
+        "(a port name releases only that port). A port that disappears "
+        "always takes the next board.",
+    )
+    parser.add_argument(
+        "--probe-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between MAC address probes of a finished port "
+        "with --next-board mac, doubled after every failed probe",
+    )
+    parser.add_argument(
+        "--slots-file",
+        help="Where fixture slots, their baud rates and stats are kept "
+        "(default config/slots.json)",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between flash_progress events per board, 0 disables them",
+    )
+    parser.add_argument(
+        "--max-boards",
+        type=int,
+        default=0,
+        help="Stop after this many boards, 0 runs until interrupted",
+    )
+    add_config_dir_argument(parser)
+    return parser.parse_args(argv[2:])
@@ -0,0 +1,451 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import wait as wait_futures
+from datetime import datetime, timezone
+
+from esp_flasher.backend.print_spooler import JOB_DONE, get_print_spooler
+from esp_flasher.backend.printers.label_layout import LabelData, LabelLayout
+from esp_flasher.cli.commands import NEXT_BOARD_ENTER, NEXT_BOARD_MAC
+from esp_flasher.core.chip_info_cache import chip_info_cache
+from esp_flasher.core.config_loader import get_config
+from esp_flasher.core.engine import (
+    get_engine,
+    read_chip_info,
+    run_blocking,
+    wait_for_log_line,
+    wait_print_job,
+)
+from esp_flasher.core.flash_progress import ProgressTracker
+from esp_flasher.core.flasher import FlashSession
+from esp_flasher.helpers.serial_utils import (
+    PORT_REMOVED,
+    SerialPortInfo,
+    get_port_watcher,
+)
+from esp_flasher.helpers.output_router import (
+    JobOutput,
+    route_output,
+    unrouted,
+)
+from esp_flasher.helpers.slot_registry import DEFAULT_SLOTS_PATH, SlotRegistry
+from esp_flasher.helpers.utils import (
+    DEVNULL,
+    Esp_flasherError,
+    firmware_version_from_path,
+)
+from esp_flasher.model.test_module import TestModule
+
+# How long a board waits for its label, the spooler keeps retrying after that
+LABEL_WAIT_SECONDS = 60
+# Longest wait between MAC address probes of a port whose probes keep failing
+PROBE_BACKOFF_MAX = 30.0
+# Failed probes after which a port that never held an ESP is left alone
+# until it re-enumerates
+MAX_FAILED_PROBES = 5
+
+
+class EventStream:
+    """Writes station events as JSON lines, one object per line."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "event": event,
+        }
+        record.update(fields)
+        line = json.dumps(record)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+        return line
+
+
+class Station:
+    """Flashes, tests, registers and labels every board that is connected.
+
+    Each watched port runs its own board cycle as a coroutine on the device
+    engine, so one thread serves many fixtures at once. A board is taken as
+    soon as the port watcher reports its port (a USB-serial port, or one
+    given with -p). The next board on that port
+    is taken once the port reports another MAC address, the operator
+    releases it, or the port disappears and comes back, depending on
+    --next-board. The firmware session, chip info cache,
+    HTTP session, name lease pool and print spooler persist between boards.
+
+    Ports are mapped to fixture slots that survive device renumbering; each
+    slot may override the baud rate and keeps its own stats and event log.
+    """
+
+    def __init__(self, args, events):
+        self.args = args
+        self.events = events
+        config = get_config()
+
+        firmware = args.firmware or config.firmware_path
+        if not firmware:
+            raise Esp_flasherError("No firmware given, use --firmware.")
+        self.session = FlashSession(firmware, no_erase=args.no_erase)
+        self.firmware_version = firmware_version_from_path(firmware)
+
+        testing = config.testing_settings
+        self.test_module = TestModule(
+            testing.test_success_regex,
+            testing.test_timeout_seconds,
+            testing.enabled,
+            testing.test_board_xth_occurrence,
+        )
+
+        self.api_settings = config.api_settings
+        self.register = not args.no_register
+        self.http_session = None
+        self.lease_pool = None
+        if self.register:
+            if not (
+                self.api_settings.api_endpoint
+                and self.api_settings.api_key
+                and self.api_settings.api_secret
+            ):
+                raise Esp_flasherError(
+                    "API endpoint and/or credentials are missing, "
+                    "configure api_settings or use --no-register."
+                )
+            import requests
+
+            self.http_session = requests.Session()
+            if self.api_settings.lease_endpoint:
+                from esp_flasher.backend.name_lease_pool import create_lease_pool
+
+                self.lease_pool = create_lease_pool(
+                    self.api_settings,
+                    self.api_settings.api_key,
+                    self.api_settings.api_secret,
+                )
+
+        self.printer = None
+        self.print_spooler = None
+        if self.register and not args.no_print:
+            printer_settings = config.printer_settings
+            self.printer = args.printer or printer_settings.default_printer
+            if not self.printer:
+                raise Esp_flasherError("No printer given, use --printer or --no-print.")
+            self.layout = LabelLayout.from_settings(printer_settings)
+            self.print_spooler = get_print_spooler(printer_settings)
+
+        self.slots = SlotRegistry(args.slots_file or DEFAULT_SLOTS_PATH)
+
+        self.engine = get_engine()
+        self._lock = threading.Lock()
+        self._cycles = {}  # port -> future of the running board cycle
+        # port -> MAC address of the finished board, until the next board
+        self._awaiting_next = {}
+        self._probes = {}  # port -> future of a running MAC address probe
+        self._last_probe = {}  # port -> when its MAC address was last probed
+        self._failed_probes = {}  # port -> probes in a row that found no ESP
+        self._boards_started = 0
+        self._ports_changed = threading.Event()
+        self.port_watcher = get_port_watcher()
+        self.port_watcher.add_listener(self._on_port_event)
+
+    def run(self):
+        """Serves boards until interrupted or --max-boards were handled."""
+        self.events.emit(
+            "station_started",
+            firmware=self.session.firmware,
+            ports=self.args.ports or "usb",
+            printer=self.printer,
+            next_board=self.args.next_board,
+        )
+        if self.args.next_board == NEXT_BOARD_ENTER:
+            threading.Thread(target=self._read_operator_input, daemon=True).start()
+        try:
+            while not self._done():
+                self._ports_changed.clear()
+                self._poll_ports()
+                self._ports_changed.wait(self.args.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.port_watcher.remove_listener(self._on_port_event)
+        wait_futures(list(self._cycles.values()) + list(self._probes.values()))
+        if self.lease_pool:
+            self.lease_pool.stop()
+        if self.print_spooler:
+            self.print_spooler.stop()
+        self.events.emit("station_stopped", boards=self._boards_started)
+
+    def _done(self):
+        max_boards = self.args.max_boards
+        with self._lock:
+            return (
+                max_boards > 0
+                and self._boards_started >= max_boards
+                and not self._cycles
+            )
+
+    def _on_port_event(self, event, port):
+        """Wakes the station loop when a port comes or goes."""
+        if event == PORT_REMOVED:
+            self._release_port(port.device, "board_removed")
+        self._ports_changed.set()
+
+    def _release_port(self, port, event, **fields):
+        """Lets a finished port take the next board."""
+        with self._lock:
+            if port not in self._awaiting_next:
+                return
+            del self._awaiting_next[port]
+            self._failed_probes.pop(port, None)
+        self.events.emit(event, port=port, **fields)
+        self._ports_changed.set()
+
+    def _read_operator_input(self):
+        """Enter releases every finished port, a port name only that one."""
+        for line in sys.stdin:
+            port = line.strip()
+            with self._lock:
+                ports = [port] if port else list(self._awaiting_next)
+            for port in ports:
+                self._release_port(port, "board_released")
+
+    def _watched_ports(self):
+        """Ports given with -p, or else every USB-serial port.
+
+        Built-in UARTs such as /dev/ttyS0 have no USB vendor id, they are
+        never a fixture and probing them only wastes time.
+        """
+        if self.args.ports:
+            wanted = set(self.args.ports)
+            return {
+                port.device
+                for port in self.port_watcher.ports()
+                if port.device in wanted
+            }
+        return {
+            port.device for port in self.port_watcher.ports() if port.vid is not None
+        }
+
+    def _poll_ports(self):
+        present = self._watched_ports()
+
+        with self._lock:
+            gone = set(self._awaiting_next) - present
+        for port in gone:
+            self._release_port(port, "board_removed")
+
+        with self._lock:
+            max_boards = self.args.max_boards
+            limit_reached = max_boards > 0 and self._boards_started >= max_boards
+            if self.args.next_board == NEXT_BOARD_MAC and not limit_reached:
+                self._probe_finished_ports(present)
+            for port in sorted(present - set(self._awaiting_next)):
+                if port in self._cycles:
+                    continue
+                if max_boards > 0 and self._boards_started >= max_boards:
+                    break
+                self._boards_started += 1
+                self._cycles[port] = self.engine.submit(self._cycle(port))
+
+    def _probe_finished_ports(self, present):
+        """Starts MAC address probes of finished ports that are due, locked."""
+        now = time.monotonic()
+        for port in present & set(self._awaiting_next):
+            if port in self._probes:
+                continue
+            failed = self._failed_probes.get(port, 0)
+            if self._awaiting_next[port] is None and failed >= MAX_FAILED_PROBES:
+                continue
+            # An empty fixture is probed less and less often
+            interval = min(self.args.probe_interval * 2**failed, PROBE_BACKOFF_MAX)
+            if now - self._last_probe.get(port, 0) < interval:
+                continue
+            self._last_probe[port] = now
+            self._probes[port] = self.engine.submit(self._probe(port))
+
+    async def _probe(self, port):
+        """Releases the port if it holds another board than the finished one."""
+        try:
+            # An empty fixture or a board still booting is no news
+            with route_output(DEVNULL):
+                info = await read_chip_info(port, use_cache=False)
+        except Esp_flasherError:
+            info = None
+        finally:
+            with self._lock:
+                del self._probes[port]
+                awaiting = port in self._awaiting_next
+                finished_mac = self._awaiting_next.get(port)
+                failed = 0
+                if awaiting and info is None:
+                    failed = self._failed_probes.get(port, 0) + 1
+                    self._failed_probes[port] = failed
+                elif awaiting:
+                    self._failed_probes.pop(port, None)
+        if finished_mac is None and failed == MAX_FAILED_PROBES:
+            self.events.emit("port_ignored", port=port, probes=failed)
+        # A board whose MAC address couldn't be read gets another go
+        if awaiting and info is not None and info.mac != finished_mac:
+            # The probe left the new board's info in the chip info cache
+            self._release_port(port, "board_changed", mac=info.mac)
+
+    def _emit(self, slot, event, **fields):
+        """Streams a board event and appends it to the slot's log."""
+        line = self.events.emit(event, slot=slot.name, **fields)
+        try:
+            with open(self.slots.log_path(slot), "a") as log_file:
+                log_file.write(line + "\n")
+        except OSError as err:
+            logging.error(f"Writing log of slot {slot.name} failed: {err}")
+
+    async def _cycle(self, port):
+        start = time.monotonic()
+        port_info = self.port_watcher.get(port) or SerialPortInfo(port)
+        slot = self.slots.slot_for_port(port_info)
+        result = {"port": port, "ok": False}
+        # Tool output of this board only, prefixed so boards don't mix on stderr
+        output = JobOutput(sink=lambda line: logging.info(f"{slot.name}: {line}"))
+        try:
+            with route_output(output):
+                await self._run_board(port, slot, result)
+            result["ok"] = True
+        except Exception as err:
+            result["error"] = str(err)
+            result["output"] = output.tail()
+        finally:
+            output.finish()
+            # The next board on this port is another device
+            chip_info_cache.invalidate(port)
+            result["seconds"] = round(time.monotonic() - start, 2)
+            self.slots.record_result(slot, result["ok"])
+            self._emit(slot, "board_done", **result)
+            with self._lock:
+                del self._cycles[port]
+                self._awaiting_next[port] = result.get("mac")
+                self._last_probe[port] = time.monotonic()
+            self._ports_changed.set()
+
+    async def _run_board(self, port, slot, result):
+        self._emit(slot, "board_detected", port=port)
+        info = await read_chip_info(port)
+        result["mac"] = info.mac
+        self._emit(slot, "device_info", port=port, mac=info.mac, chip=info.model)
+
+        # The backend is asked while the board flashes
+        registration = None
+        if self.register:
+            registration = asyncio.ensure_future(self._register(info.mac))
+        try:
+            await self._flash_and_test(port, slot)
+        except BaseException:
+            if registration is not None:
+                registration.cancel()
+            raise
+
+        if registration is None:
+            return
+        device_name = await registration
+        result["device_name"] = device_name
+        self._emit(slot, "registered", port=port, mac=info.mac, device_name=device_name)
+
+        if self.print_spooler is None:
+            return
+        label = LabelData(
+            device_name,
+            mac_address=info.mac,
+            firmware_version=self.firmware_version,
+        )
+        job = self.print_spooler.submit(self.printer, label, self.layout)
+        try:
+            status = await asyncio.wait_for(wait_print_job(job), LABEL_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            # Printer offline, the label prints once it is back
+            self._emit(slot, "label_queued", port=port, device_name=device_name)
+            return
+        if status != JOB_DONE:
+            raise Esp_flasherError(f"Printing label failed: {job.error}")
+        self._emit(slot, "label_printed", port=port, device_name=device_name)
+
+    async def _flash_and_test(self, port, slot):
+        baud_rate = slot.baud_rate or self.args.upload_baud_rate
+        self._emit(slot, "flash_started", port=port, baud_rate=baud_rate)
+        flash_start = time.monotonic()
+        interval = self.args.progress_interval
+
+        def report_progress(update):
+            if interval > 0:
+                self._emit(slot, "flash_progress", port=port, **update.to_dict())
+
+        progress = ProgressTracker(report_progress, port, min_interval=interval)
+        # esptool is blocking, it runs on the engine's worker pool
+        await run_blocking(self.session.flash, port, baud_rate, progress)
+        self._emit(
+            slot,
+            "flash_done",
+            port=port,
+            seconds=round(time.monotonic() - flash_start, 2),
+            bytes=progress.written,
+            bytes_per_second=round(progress.average_rate()),
+        )
+
+        with self._lock:
+            self.test_module.increment_flash_count()
+            run_test = self.test_module.should_run_test()
+        if run_test:
+            self._emit(slot, "test_started", port=port)
+            passed = await wait_for_log_line(
+                port,
+                self.test_module.regex,
+                self.test_module.timeout_seconds,
+                on_line=print,
+            )
+            self._emit(slot, "test_passed" if passed else "test_failed", port=port)
+            if not passed:
+                raise Esp_flasherError("Device test failed")
+
+    async def _register(self, mac_address):
+        """Returns the device name for a MAC address."""
+        if self.lease_pool:
+            device_name = self.lease_pool.bind(mac_address)
+            if device_name:
+                return device_name
+            logging.warning("No leased device names left, registering directly.")
+
+        from esp_flasher.backend.api_client import publish_mac_address
+
+        device_name, error_message = await run_blocking(
+            publish_mac_address,
+            self.api_settings.api_endpoint,
+            self.api_settings.api_key,
+            self.api_settings.api_secret,
+            mac_address,
+            session=self.http_session,
+        )
+        if not device_name:
+            raise Esp_flasherError(f"Registration failed: {error_message}")
+        return device_name
+
+
+def run_station(args):
+    """Runs the headless station loop, returns the exit code."""
+    events = EventStream(unrouted(sys.stdout))
+    # Board output is logged, so the log itself must not be routed
+    logging.basicConfig(level=logging.INFO, stream=unrouted(sys.stderr))
+    # esptool and friends print progress; keep stdout for the event stream
+    with route_output(sys.stderr):
+        try:
+            station = Station(args, events)
+        except Esp_flasherError as err:
+            events.emit("station_error", error=str(err))
+            return 1
+        station.run()
+    return 0
@@ -0,0 +1,62 @@
+import threading
+
+from esp_flasher.helpers.serial_utils import port_fingerprint
+
+
+class ChipInfoCache:
+    """Chip info keyed by serial port and MAC address.
+
+    An entry for a port is only served while the USB device behind the port
+    keeps the same fingerprint and the board on it still reports the cached
+    MAC address. Reading the MAC address is a lot cheaper than the full chip
+    info, and it catches a board swapped behind a fixed USB-UART adapter,
+    whose port never re-enumerates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_port = {}  # port -> (fingerprint, ChipInfo)
+        self._by_mac = {}  # MAC address -> ChipInfo
+
+    def get(self, port, mac):
+        """Returns the cached info for the port, or None on a miss.
+
+        `mac` is the MAC address the board on the port reports right now,
+        the entry of another board is dropped.
+        """
+        with self._lock:
+            entry = self._by_port.get(port)
+        if entry is None:
+            return None
+
+        fingerprint, info = entry
+        if port_fingerprint(port) != fingerprint or info.mac != mac:
+            self.invalidate(port)
+            return None
+        return info
+
+    def get_by_mac(self, mac):
+        with self._lock:
+            return self._by_mac.get(mac)
+
+    def put(self, port, info):
+        fingerprint = port_fingerprint(port)
+        with self._lock:
+            self._by_mac[info.mac] = info
+            # Ports that can't be identified (e.g. network ports) are not cached
+            if fingerprint is not None:
+                self._by_port[port] = (fingerprint, info)
+
+    def invalidate(self, port=None):
+        """Drops the entry for the port, or every entry if no port is given."""
+        with self._lock:
+            if port is None:
+                self._by_port.clear()
+                self._by_mac.clear()
+                return
+            entry = self._by_port.pop(port, None)
+            if entry is not None:
+                self._by_mac.pop(entry[1].mac, None)
+
+
+chip_info_cache = ChipInfoCache()
@@ -1,4 +1,8 @@
+import queue
 import struct
+import threading
+import time
+
 import esptool
 
 from esp_flasher.helpers.utils import prevent_print, Esp_flasherError
@@ -16,6 +20,8 @@ class EsptoolFlashArgs:
         stub,
         before,
         after,
+        images=None,
+        unchanged_regions=None,
     ):
         self.chip = chip
         self.write_flash_args = write_flash_args
@@ -27,6 +33,9 @@ class EsptoolFlashArgs:
         self.before = before
         self.after = after
         self.encrypt = False
+        self.images = images  # FlashImage list of a v2 package
+        # (offset, size, md5) a delta package expects on the device
+        self.unchanged_regions = unchanged_regions or []
 
 
 class ChipInfo:
@@ -55,13 +64,21 @@ class ESP32ChipInfo(ChipInfo):
         has_bluetooth,
         has_embedded_flash,
         has_factory_calibrated_adc,
+        family="ESP32",
+        has_wifi=True,
+        has_embedded_psram=False,
+        has_ieee802154=False,
     ):
-        super().__init__("ESP32", model, mac)
+        super().__init__(family, model, mac)
+        self.is_esp32 = True
         self.num_cores = num_cores
         self.cpu_frequency = cpu_frequency
         self.has_bluetooth = has_bluetooth
         self.has_embedded_flash = has_embedded_flash
         self.has_factory_calibrated_adc = has_factory_calibrated_adc
+        self.has_wifi = has_wifi
+        self.has_embedded_psram = has_embedded_psram
+        self.has_ieee802154 = has_ieee802154
 
     def as_dict(self):
         data = ChipInfo.as_dict(self)
@@ -72,6 +89,9 @@ class ESP32ChipInfo(ChipInfo):
                 "has_bluetooth": self.has_bluetooth,
                 "has_embedded_flash": self.has_embedded_flash,
                 "has_factory_calibrated_adc": self.has_factory_calibrated_adc,
+                "has_wifi": self.has_wifi,
+                "has_embedded_psram": self.has_embedded_psram,
+                "has_ieee802154": self.has_ieee802154,
             }
         )
         return data
@@ -80,6 +100,7 @@ class ESP32ChipInfo(ChipInfo):
 class ESP8266ChipInfo(ChipInfo):
     def __init__(self, model, mac, chip_id):
         super().__init__("ESP8266", model, mac)
+        self.is_esp32 = False
         self.chip_id = chip_id
 
     def as_dict(self):
@@ -92,6 +113,39 @@ class ESP8266ChipInfo(ChipInfo):
         return data
 
 
+# Family defaults keyed by esptool's CHIP_NAME (without any "(betaN)" suffix).
+# Values reported by the chip's feature list override these.
+CHIP_TRAITS = {
+    "ESP32": {"num_cores": 2, "cpu_frequency": "80MHz"},
+    "ESP32-S2": {"num_cores": 1, "cpu_frequency": "240MHz"},
+    "ESP32-S3": {"num_cores": 2, "cpu_frequency": "240MHz"},
+    "ESP32-C2": {"num_cores": 1, "cpu_frequency": "120MHz"},
+    "ESP32-C3": {"num_cores": 1, "cpu_frequency": "160MHz"},
+    "ESP32-C5": {"num_cores": 1, "cpu_frequency": "240MHz"},
+    "ESP32-C6": {"num_cores": 1, "cpu_frequency": "160MHz"},
+    "ESP32-C61": {"num_cores": 1, "cpu_frequency": "160MHz"},
+    "ESP32-H2": {"num_cores": 1, "cpu_frequency": "96MHz"},
+    "ESP32-P4": {"num_cores": 2, "cpu_frequency": "400MHz"},
+}
+
+# (feature token, attribute, value). A feature matches a token when it is equal
+# to it or starts with it followed by a space ("Embedded Flash 4MB (XMC)").
+FEATURE_TABLE = (
+    ("WiFi", "has_wifi", True),
+    ("BT", "has_bluetooth", True),
+    ("BLE", "has_bluetooth", True),
+    ("IEEE802.15.4", "has_ieee802154", True),
+    ("Single Core", "num_cores", 1),
+    ("Dual Core", "num_cores", 2),
+    ("160MHz", "cpu_frequency", "160MHz"),
+    ("240MHz", "cpu_frequency", "240MHz"),
+    ("Embedded Flash", "has_embedded_flash", True),
+    ("Embedded PSRAM", "has_embedded_psram", True),
+    ("VRef calibration in efuse", "has_factory_calibrated_adc", True),
+    ("ADC and temperature sensor calibration", "has_factory_calibrated_adc", True),
+)
+
+
 def read_chip_property(func, *args, **kwargs):
     try:
         return prevent_print(func, *args, **kwargs)
@@ -99,27 +153,59 @@ def read_chip_property(func, *args, **kwargs):
         raise Esp_flasherError(f"Reading chip details failed: {err}") from err
 
 
-def read_chip_info(chip):
-    mac = ":".join(f"{x:02X}" for x in read_chip_property(chip.read_mac))
-    if isinstance(chip, esptool.ESP32ROM):
-        model = read_chip_property(chip.get_chip_description)
-        features = read_chip_property(chip.get_chip_features)
-        num_cores = 2 if "Dual Core" in features else 1
-        frequency = next((x for x in ("160MHz", "240MHz") if x in features), "80MHz")
-        has_bluetooth = "BT" in features
-        has_embedded_flash = "Embedded Flash" in features
-        has_factory_calibrated_adc = "VRef calibration in efuse" in features
-        return ESP32ChipInfo(
-            model,
-            mac,
-            num_cores,
-            frequency,
-            has_bluetooth,
-            has_embedded_flash,
-            has_factory_calibrated_adc,
-        )
+def decode_chip_features(features, traits):
+    """Maps esptool's feature strings onto ESP32ChipInfo keyword arguments."""
+    decoded = {
+        "has_wifi": False,
+        "has_bluetooth": False,
+        "has_ieee802154": False,
+        "has_embedded_flash": False,
+        "has_embedded_psram": False,
+        "has_factory_calibrated_adc": False,
+    }
+    decoded.update(traits)
+    for feature in features:
+        for token, attribute, value in FEATURE_TABLE:
+            if feature == token or feature.startswith(token + " "):
+                decoded[attribute] = value
+    return decoded
+
+
+def _read_esp32_family_info(chip, mac):
+    family = chip.CHIP_NAME.split("(")[0]
+    model = read_chip_property(chip.get_chip_description)
+    features = read_chip_property(chip.get_chip_features)
+    return ESP32ChipInfo(
+        model=model,
+        mac=mac,
+        family=family,
+        **decode_chip_features(features, CHIP_TRAITS.get(family, {})),
+    )
+
 
-    raise Esp_flasherError(f"Unknown chip type {type(chip)}")
+def _read_esp8266_info(chip, mac):
+    model = read_chip_property(chip.get_chip_description)
+    chip_id = read_chip_property(chip.chip_id)
+    return ESP8266ChipInfo(model, mac, f"0x{chip_id:08X}")
+
+
+# Decoder per chip family, covering every chip class esptool supports
+CHIP_DECODERS = {family: _read_esp32_family_info for family in CHIP_TRAITS}
+CHIP_DECODERS["ESP8266"] = _read_esp8266_info
+
+
+def read_chip_mac(chip):
+    """Reads the MAC address, the cheapest way to tell boards apart."""
+    return ":".join(f"{x:02X}" for x in read_chip_property(chip.read_mac))
+
+
+def read_chip_info(chip, mac=None):
+    family = chip.CHIP_NAME.split("(")[0]
+    decoder = CHIP_DECODERS.get(family)
+    if decoder is None:
+        raise Esp_flasherError(f"Unknown chip type {type(chip)}")
+
+    return decoder(chip, mac or read_chip_mac(chip))
 
 
 def chip_run_stub(chip):
@@ -162,3 +248,89 @@ def detect_chip(port, baud=115200):
         return chip
     except esptool.FatalError as err:
         raise Esp_flasherError(f"ESP Chip Auto-Detection failed: {err}") from err
+
+
+def probe_port(port, baud=115200):
+    """Detects the chip on one port and returns its info as a dict."""
+    from esp_flasher.core.chip_info_cache import chip_info_cache
+
+    chip = prevent_print(detect_chip, port, baud)
+    try:
+        info = read_chip_info(chip)
+    finally:
+        chip._port.close()
+    chip_info_cache.put(port, info)
+    return info.as_dict()
+
+
+def sweep_ports(ports=None, baud=115200, max_workers=8, port_timeout=10.0):
+    """Probes serial ports concurrently on a bounded number of threads.
+
+    Probes run on daemon threads: a probe wedged in a serial driver call
+    can't be interrupted, so its port is reported as timed out, a new thread
+    takes over the remaining ports and the stuck one never blocks exit.
+
+    Args:
+        ports (list): Ports to probe, defaults to every port esptool can list.
+        max_workers (int): Upper bound of concurrently probed ports.
+        port_timeout (float): Seconds a single port may take once its probe
+            has started.
+
+    Returns:
+        dict: Port -> chip info dict, or {"error": message} for ports without
+        a responding chip.
+    """
+    if ports is None:
+        ports = esptool.get_port_list()
+    if not ports:
+        return {}
+
+    todo = queue.Queue()
+    for port in ports:
+        todo.put(port)
+    finished = queue.Queue()
+    started = {}
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                port = todo.get_nowait()
+            except queue.Empty:
+                return
+            with lock:
+                started[port] = time.monotonic()
+            try:
+                result = probe_port(port, baud)
+            except Exception as err:
+                result = {"error": str(err)}
+            finished.put((port, result))
+
+    def start_worker():
+        threading.Thread(target=worker, name="chip-sweep", daemon=True).start()
+
+    for _ in range(max(1, min(max_workers, len(ports)))):
+        start_worker()
+
+    results = {}
+    while len(results) < len(ports):
+        try:
+            port, result = finished.get(timeout=0.1)
+            results.setdefault(port, result)
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        with lock:
+            timed_out = [
+                port
+                for port, start in started.items()
+                if port not in results and now - start > port_timeout
+            ]
+        for port in timed_out:
+            # The stuck thread closes the port if its probe ever returns
+            results[port] = {"error": f"No response within {port_timeout}s"}
+            if not todo.empty():
+                start_worker()
+
+    return {port: results[port] for port in ports}
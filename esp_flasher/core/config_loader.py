@@ -0,0 +1,428 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from esp_flasher.core.const import DEFAULT_SECURITY_PROFILE
+from esp_flasher.helpers.utils import Esp_flasherError, get_config_path
+
+
+class ConfigError(Esp_flasherError):
+    """The config file is missing, not valid JSON or fails validation."""
+
+
+class Field:
+    """Schema of one config value."""
+
+    def __init__(
+        self,
+        kind,
+        default=None,
+        nullable=False,
+        minimum=None,
+        maximum=None,
+        choices=None,
+        check=None,
+    ):
+        self.kind = kind
+        self.default = default
+        self.nullable = nullable
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+        self.check = check  # Callable returning an error message or None
+
+    def validate(self, value):
+        """Returns the value as its type, or raises ValueError."""
+        if value is None:
+            if self.nullable:
+                return None
+            raise ValueError("must be set")
+        # bool is an int subclass, but true is no valid label width
+        if isinstance(value, bool) and self.kind is not bool:
+            raise ValueError(f"expected {self.kind.__name__}, got bool")
+        if self.kind is float and isinstance(value, int):
+            value = float(value)
+        if not isinstance(value, self.kind):
+            raise ValueError(
+                f"expected {self.kind.__name__}, got {type(value).__name__}"
+            )
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"must be at least {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"must be at most {self.maximum}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"must be one of {', '.join(map(repr, self.choices))}")
+        if self.check is not None:
+            error = self.check(value)
+            if error:
+                raise ValueError(error)
+        return value
+
+
+def _check_regex(value):
+    try:
+        re.compile(value)
+    except re.error as err:
+        return f"invalid regular expression: {err}"
+    return None
+
+
+def _check_rotation(value):
+    return None if value % 90 == 0 else "must be a multiple of 90"
+
+
+def _check_burn_efuses(value):
+    for name, efuse_value in value.items():
+        if isinstance(efuse_value, bool) or not isinstance(efuse_value, int):
+            return f"value of {name} must be an integer"
+    return None
+
+
+def _check_efuse_names(value):
+    if not all(isinstance(name, str) for name in value):
+        return "must be a list of eFuse names"
+    return None
+
+
+class ConfigSection:
+    """A validated section of the config, with one attribute per field.
+
+    `get()` mirrors dict.get, so a section can be passed where the plain
+    settings dict used to go.
+    """
+
+    FIELDS = {}
+
+    def __init__(self, **values):
+        for name, field in self.FIELDS.items():
+            setattr(self, name, values.get(name, field.default))
+
+    @classmethod
+    def parse(cls, data, section_name, errors):
+        """Builds the section from its JSON dict, appending problems to `errors`."""
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            errors.append(f"{section_name}: expected an object")
+            data = {}
+
+        values = {}
+        for name, field in cls.FIELDS.items():
+            if name not in data:
+                continue
+            try:
+                values[name] = field.validate(data[name])
+            except ValueError as err:
+                errors.append(f"{section_name}.{name}: {err}")
+
+        for name in data:
+            if name not in cls.FIELDS:
+                logging.warning(f"Unknown config key {section_name}.{name} ignored.")
+        return cls(**values)
+
+    def get(self, name, default=None):
+        if name not in self.FIELDS:
+            return default
+        value = getattr(self, name)
+        return default if value is None else value
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class SecureBootSettings(ConfigSection):
+    FIELDS = {
+        "public_key_digest_block_index": Field(
+            int, nullable=True, minimum=0, maximum=5
+        ),
+    }
+
+
+class FlashEncryptionSettings(ConfigSection):
+    FIELDS = {
+        "encryption_en": Field(bool, False),
+        "encryption_key_block_index": Field(int, nullable=True, minimum=0, maximum=5),
+        "flash_encryption_use_customer_key_enable": Field(bool, False),
+        "flash_encryption_use_customer_key_path": Field(str, ""),
+    }
+
+
+class SecurityProfile(ConfigSection):
+    FIELDS = {
+        "burn_efuses": Field(
+            dict,
+            DEFAULT_SECURITY_PROFILE["burn_efuses"],
+            check=_check_burn_efuses,
+        ),
+        "write_protect_efuses": Field(
+            list,
+            DEFAULT_SECURITY_PROFILE["write_protect_efuses"],
+            check=_check_efuse_names,
+        ),
+    }
+
+
+class PrinterSettings(ConfigSection):
+    FIELDS = {
+        "default_printer": Field(str, ""),
+        "label_width": Field(int, 62, minimum=1),
+        "font_size": Field(int, 20, minimum=1),
+        "text_rotation": Field(int, 270, check=_check_rotation),
+        "x_offset": Field(int, 100, minimum=0),
+        "y_offset": Field(int, 100, minimum=0),
+        "label_code": Field(str, "", choices=("", "qr", "datamatrix")),
+        "code_size": Field(int, 150, minimum=1),
+        "code_gap": Field(int, 20, minimum=0),
+        "label_length": Field(int, 300, minimum=1),
+        "spool_dir": Field(str, "print_spool"),
+        "max_batch": Field(int, 10, minimum=1),
+        "retry_delay_seconds": Field(float, 1.0, minimum=0),
+        "max_retry_delay_seconds": Field(float, 30.0, minimum=0),
+    }
+
+
+class ApiSettings(ConfigSection):
+    FIELDS = {
+        "api_endpoint": Field(str, ""),
+        "api_key": Field(str, ""),
+        "api_secret": Field(str, ""),
+        "lease_endpoint": Field(str, ""),
+        "confirm_endpoint": Field(str, ""),
+        "lease_block_size": Field(int, 20, minimum=1),
+        "lease_low_watermark": Field(int, 5, minimum=0),
+        "confirm_batch_size": Field(int, 10, minimum=1),
+        "confirm_interval_seconds": Field(float, 5.0, minimum=0),
+    }
+
+
+class TestingSettings(ConfigSection):
+    FIELDS = {
+        "enabled": Field(bool, False),
+        "test_board_xth_occurrence": Field(int, 0, minimum=0),
+        "test_success_regex": Field(str, "", check=_check_regex),
+        "test_timeout_seconds": Field(int, 200, minimum=1),
+    }
+
+
+class AppConfig:
+    """The whole config.json, validated and typed."""
+
+    SECTIONS = {
+        "secure_boot": SecureBootSettings,
+        "flash_encryption": FlashEncryptionSettings,
+        "security_profile": SecurityProfile,
+        "printer_settings": PrinterSettings,
+        "api_settings": ApiSettings,
+        "testing_settings": TestingSettings,
+    }
+    FIELDS = {
+        "chip_port": Field(str, ""),
+        "firmware_path": Field(str, ""),
+    }
+
+    def __init__(self, data):
+        if not isinstance(data, dict):
+            raise ConfigError("Config must be a JSON object")
+
+        errors = []
+        for name, section in self.SECTIONS.items():
+            setattr(self, name, section.parse(data.get(name), name, errors))
+        for name, field in self.FIELDS.items():
+            try:
+                setattr(self, name, field.validate(data.get(name, field.default)))
+            except ValueError as err:
+                errors.append(f"{name}: {err}")
+                setattr(self, name, field.default)
+        for name in data:
+            if name not in self.SECTIONS and name not in self.FIELDS:
+                logging.warning(f"Unknown config key {name} ignored.")
+
+        errors += self._cross_check()
+        if errors:
+            raise ConfigError("Invalid config:\n  " + "\n  ".join(errors))
+
+    def _cross_check(self):
+        """Checks settings that depend on each other."""
+        errors = []
+        encryption = self.flash_encryption
+        if encryption.encryption_en and encryption.encryption_key_block_index is None:
+            errors.append(
+                "flash_encryption.encryption_key_block_index: must be set when "
+                "encryption_en is enabled"
+            )
+        if encryption.flash_encryption_use_customer_key_enable:
+            key_path = encryption.flash_encryption_use_customer_key_path
+            if not key_path:
+                errors.append(
+                    "flash_encryption.flash_encryption_use_customer_key_path: "
+                    "must be set when the customer key is enabled"
+                )
+            elif not os.path.exists(key_path):
+                errors.append(
+                    "flash_encryption.flash_encryption_use_customer_key_path: "
+                    f"{key_path} not found"
+                )
+        printer = self.printer_settings
+        if printer.max_retry_delay_seconds < printer.retry_delay_seconds:
+            errors.append(
+                "printer_settings.max_retry_delay_seconds: must not be below "
+                "retry_delay_seconds"
+            )
+        return errors
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+
+def parse_config_file(path):
+    """Reads and validates a config file, raises ConfigError if it is unusable."""
+    if not os.path.exists(path):
+        raise ConfigError(f"Config file {path} not found.")
+    try:
+        with open(path, "r") as config_file:
+            data = json.load(config_file)
+    except json.JSONDecodeError as err:
+        raise ConfigError(f"Error parsing config file: {err}") from err
+    except OSError as err:
+        raise ConfigError(f"Error reading config file {path}: {err}") from err
+    return AppConfig(data)
+
+
+def _file_fingerprint(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigService:
+    """Parses the config once and hands out the cached, validated object.
+
+    Reads check the file's mtime at most every `check_interval` seconds and
+    reload it when it changed. A changed file that fails validation is
+    logged and the last good config stays in use; only the first load
+    raises. Listeners are called with the new config after each reload.
+    `path` defaults to config.json in the config directory.
+    """
+
+    def __init__(self, path=None, check_interval=1.0):
+        self.path = path or get_config_path()
+        self.check_interval = check_interval
+        self._config = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._watcher = None
+
+    def get(self):
+        """Returns the current config, reloading it if the file changed.
+
+        Raises:
+            ConfigError: If the first load fails.
+        """
+        changed = None
+        with self._lock:
+            if self._config is None:
+                self._fingerprint = _file_fingerprint(self.path)
+                self._config = parse_config_file(self.path)
+                self._checked_at = time.monotonic()
+            elif time.monotonic() - self._checked_at >= self.check_interval:
+                changed = self._reload_if_changed()
+            config = self._config
+        if changed:
+            self._notify(changed)
+        return config
+
+    def reload(self):
+        """Reloads the file now, raising ConfigError if it is invalid."""
+        with self._lock:
+            fingerprint = _file_fingerprint(self.path)
+            config = parse_config_file(self.path)
+            self._config = config
+            self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+        self._notify(config)
+        return config
+
+    def _reload_if_changed(self):
+        """Returns the new config if the file changed and is valid."""
+        self._checked_at = time.monotonic()
+        fingerprint = _file_fingerprint(self.path)
+        if fingerprint == self._fingerprint:
+            return None
+        # Remember it even if invalid, so the error is logged once per change
+        self._fingerprint = fingerprint
+        try:
+            self._config = parse_config_file(self.path)
+        except ConfigError as err:
+            logging.error(f"Config change not applied, keeping previous config: {err}")
+            return None
+        logging.info(f"Reloaded config from {self.path}.")
+        return self._config
+
+    def add_listener(self, callback):
+        """Calls `callback(config)` whenever a changed config is loaded."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, config):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(config)
+            except Exception as err:
+                logging.error(f"Config listener failed: {err}")
+
+    def start_watching(self):
+        """Polls the file in the background so listeners see changes promptly."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stopping.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="ConfigWatcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stopping.set()
+        if self._watcher:
+            self._watcher.join(self.check_interval + 1)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stopping.wait(self.check_interval):
+            try:
+                self.get()
+            except ConfigError as err:
+                logging.error(f"Config unavailable: {err}")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_config_service():
+    """Returns the application wide config service."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConfigService()
+        return _service
+
+
+def get_config():
+    """Returns the current validated config."""
+    return get_config_service().get()
@@ -8,3 +8,27 @@ HTTP_REGEX = re.compile(
 )
 
 DEFAULT_BAUD_RATE = 460800
+
+# Release package layouts understood by extract_firmware. Version 2 adds an
+# "images" manifest with hashes and pre-compressed flash payloads.
+PACKAGE_FORMAT_V1 = 1
+PACKAGE_FORMAT_V2 = 2
+
+# Security eFuses burned (and write-protected) once Secure Boot and Flash
+# Encryption are both enabled. Overridable by "security_profile" in config.json.
+DEFAULT_SECURITY_PROFILE = {
+    "burn_efuses": {
+        "DIS_DOWNLOAD_ICACHE": 1,  # Disable UART instruction cache
+        "DIS_DOWNLOAD_DCACHE": 1,  # Disable UART data cache
+        "HARD_DIS_JTAG": 1,  # Hard disable JTAG peripheral
+        "SOFT_DIS_JTAG": 1,  # Disable software access to JTAG
+        "DIS_DIRECT_BOOT": 1,  # Disable direct boot (legacy SPI boot mode)
+        "DIS_USB_JTAG": 1,  # Disable USB switch to JTAG
+        "DIS_DOWNLOAD_MANUAL_ENCRYPT": 1,  # Disable UART bootloader encryption access
+        "SECURE_BOOT_AGGRESSIVE_REVOKE": 1,  # Aggressive revocation of key digests
+    },
+    "write_protect_efuses": [
+        "DIS_ICACHE",  # Write-protects multiple security configurations
+        "RD_DIS",  # Prevents accidental read protection of Secure Boot digest
+    ],
+}
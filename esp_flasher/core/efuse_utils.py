@@ -0,0 +1,111 @@
+from esp_flasher.helpers.utils import Esp_flasherError
+
+
+class EfuseSnapshot:
+    """Values and write protection of every eFuse, taken from a single read."""
+
+    def __init__(self, chip_name, values, writeable):
+        self.chip_name = chip_name
+        self.values = values  # name -> int, bytes eFuses (keys) are left out
+        self.writeable = writeable  # name -> bool
+
+    @classmethod
+    def read(cls, efuses):
+        """Builds a snapshot from an espefuse EspEfuses object.
+
+        EspEfuses reads all eFuse blocks when it is created (and again after
+        every burn), so taking a snapshot does not talk to the chip.
+        """
+        values = {}
+        writeable = {}
+        for efuse in efuses:
+            names = [efuse.name] + list(getattr(efuse, "alt_names", []) or [])
+            is_writeable = efuse.is_writeable()
+            value = None
+            if not efuse.efuse_type.startswith("bytes"):
+                value = int(efuse.get_raw())
+            for name in names:
+                writeable[name] = is_writeable
+                if value is not None:
+                    values[name] = value
+        return cls(efuses._esp.CHIP_NAME, values, writeable)
+
+
+class SecurityEfusePlan:
+    """eFuse writes still missing to satisfy a security profile."""
+
+    def __init__(self):
+        self.burn = {}  # name -> value
+        self.write_protect = []  # names
+
+    def is_empty(self):
+        return not self.burn and not self.write_protect
+
+
+def _parse_efuse_value(value):
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+
+def plan_security_efuses(snapshot, profile):
+    """Diffs an eFuse snapshot against a declarative security profile.
+
+    Args:
+        snapshot (EfuseSnapshot): Current eFuse state of the chip.
+        profile (dict): `burn_efuses` (name -> value) and
+            `write_protect_efuses` (list of names).
+
+    Returns:
+        SecurityEfusePlan: Only the values and write protections not yet set.
+
+    Raises:
+        Esp_flasherError: If the profile can't be reached, e.g. the eFuse does
+            not exist, already has other bits burned or is write-protected.
+    """
+    plan = SecurityEfusePlan()
+
+    for name, value in profile.get("burn_efuses", {}).items():
+        if name not in snapshot.values:
+            raise Esp_flasherError(
+                f"eFuse {name} does not exist on {snapshot.chip_name}"
+            )
+        wanted = _parse_efuse_value(value)
+        current = snapshot.values[name]
+        if current == wanted:
+            continue
+        if current & ~wanted:
+            raise Esp_flasherError(
+                f"eFuse {name} is already burned to {current:#x}, "
+                f"it can't be changed to {wanted:#x}"
+            )
+        if not snapshot.writeable[name]:
+            raise Esp_flasherError(
+                f"eFuse {name} is write-protected at {current:#x}, "
+                f"it can't be burned to {wanted:#x}"
+            )
+        plan.burn[name] = wanted
+
+    for name in profile.get("write_protect_efuses", []):
+        if name not in snapshot.writeable:
+            raise Esp_flasherError(
+                f"eFuse {name} does not exist on {snapshot.chip_name}"
+            )
+        if snapshot.writeable[name]:
+            plan.write_protect.append(name)
+
+    return plan
+
+
+def apply_security_efuse_plan(efuses, plan):
+    """Stages every write of the plan and burns them in one operation."""
+    for name, value in plan.burn.items():
+        print(f"Burning {name} -> {value:#x}")
+        efuses[name].save(value)
+
+    for name in plan.write_protect:
+        print(f"Write-protecting {name}")
+        efuses[name].disable_write()
+
+    if efuses.is_efuses_incompatible_for_burn():
+        raise Esp_flasherError("Incompatible eFuse settings detected, aborting burn.")
+
+    efuses.burn_all()
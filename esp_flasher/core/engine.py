@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from esp_flasher.helpers.utils import Esp_flasherError
+
+# How often ports without a pollable file descriptor (Windows) are read
+SERIAL_POLL_INTERVAL = 0.02
+
+_reported_serial_fallback = False
+
+
+class DeviceEngine:
+    """One asyncio event loop driving the device sessions of all boards.
+
+    Serial logs, print jobs and the waiting between steps are coroutines on
+    the loop, so a single thread serves any number of boards. esptool and
+    requests only offer blocking calls; `run_blocking` hands those to a
+    shared worker pool and the session coroutine awaits the result. A board
+    being flashed holds one worker for the whole write, so
+    `max_blocking_workers` also bounds how many boards flash at once.
+    """
+
+    def __init__(self, max_blocking_workers=32):
+        self.max_blocking_workers = max_blocking_workers
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_blocking_workers,
+                thread_name_prefix="EngineBlocking",
+            )
+            self._loop.set_default_executor(self._executor)
+            self._thread = threading.Thread(
+                target=self._run, name="DeviceEngine", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Cancels the running sessions and stops the loop."""
+        with self._lock:
+            if not self._thread:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            self._executor.shutdown(wait=False)
+
+    def submit(self, coro):
+        """Schedules a coroutine on the loop, returns a concurrent Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def call_soon(self, callback, *args):
+        """Calls `callback(*args)` on the loop thread."""
+        self.start()
+        self._loop.call_soon_threadsafe(callback, *args)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+        finally:
+            self._loop.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Returns the application wide device engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeviceEngine()
+        return _engine
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking call on the engine's worker pool and awaits it.
+
+    The call sees the caller's context variables, e.g. its output routing.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(None, contextvars.copy_context().run, call)
+
+
+async def read_chip_info(port, use_cache=True):
+    """Returns the ChipInfo of the board on the port."""
+    from esp_flasher.cli.chip_info import dump_info
+
+    info = await run_blocking(dump_info, port, use_cache=use_cache)
+    if info is None:
+        raise Esp_flasherError(f"Could not read chip info from {port}")
+    return info
+
+
+async def wait_print_job(job):
+    """Waits for a print spooler job without holding a thread, returns its status."""
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+
+    def set_status(status):
+        if not finished.done():
+            finished.set_result(status)
+
+    # Called from the spooler's printer thread
+    job.add_done_callback(lambda job: loop.call_soon_threadsafe(set_status, job.status))
+    return await finished
+
+
+def _release_boot_pins(serial_port):
+    # Prevent ESP32 from staying in bootloader mode
+    serial_port.dtr = False
+    serial_port.rts = False
+
+
+@contextlib.asynccontextmanager
+async def open_serial_reader(port, baudrate=115200):
+    """Opens a serial port as an asyncio.StreamReader.
+
+    Uses pyserial-asyncio when it is installed (the async-serial extra).
+    Otherwise the port is read when the loop reports its file descriptor
+    readable, or polled every SERIAL_POLL_INTERVAL where there is none to
+    watch, i.e. on Windows.
+    """
+    global _reported_serial_fallback
+    try:
+        import serial_asyncio
+    except ImportError:
+        serial_asyncio = None  # pyserial-asyncio is optional
+        if not _reported_serial_fallback:
+            _reported_serial_fallback = True
+            logging.info(
+                "pyserial-asyncio is not installed (pip install .[async-serial]), "
+                "serial logs are read through "
+                + ("the loop's file watcher." if os.name == "posix" else "polling.")
+            )
+
+    if serial_asyncio is not None:
+        reader, writer = await serial_asyncio.open_serial_connection(
+            url=port, baudrate=baudrate
+        )
+        _release_boot_pins(writer.transport.serial)
+        try:
+            yield reader
+        finally:
+            writer.close()
+        return
+
+    import serial
+
+    loop = asyncio.get_running_loop()
+    serial_port = serial.Serial(port, baudrate=baudrate, timeout=0)
+    _release_boot_pins(serial_port)
+    reader = asyncio.StreamReader()
+    watched_fd = None
+    poller = None
+
+    def feed():
+        try:
+            data = serial_port.read(serial_port.in_waiting or 1)
+        except (serial.SerialException, OSError) as err:
+            # Unplugged; stop reading and fail the pending readline
+            if watched_fd is not None:
+                loop.remove_reader(watched_fd)
+            reader.set_exception(err)
+            return False
+        if data:
+            reader.feed_data(data)
+        return True
+
+    async def poll():
+        while feed():
+            await asyncio.sleep(SERIAL_POLL_INTERVAL)
+
+    if os.name == "posix":
+        watched_fd = serial_port.fileno()
+        loop.add_reader(watched_fd, feed)
+    else:
+        poller = loop.create_task(poll())
+    try:
+        yield reader
+    finally:
+        if poller is not None:
+            poller.cancel()
+        elif watched_fd is not None:
+            loop.remove_reader(watched_fd)
+        serial_port.close()
+
+
+async def read_log_line(reader):
+    """Returns the next decoded line of a serial reader."""
+    raw = await reader.readline()
+    if not raw and reader.at_eof():
+        raise Esp_flasherError("Serial port closed")
+    return raw.decode(errors="ignore").strip()
+
+
+async def wait_for_log_line(port, regex, timeout, on_line=None):
+    """Watches the boot log for the pattern, returns True on a match in time."""
+    pattern = re.compile(regex)
+
+    async def watch():
+        async with open_serial_reader(port) as reader:
+            while True:
+                line = await read_log_line(reader)
+                if not line:
+                    continue
+                if on_line:
+                    on_line(line)
+                if pattern.search(line):
+                    return True
+
+    try:
+        return await asyncio.wait_for(watch(), timeout)
+    except asyncio.TimeoutError:
+        logging.debug(f"No line matching {regex!r} on {port} within {timeout}s")
+        return False
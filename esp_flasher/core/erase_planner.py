@@ -0,0 +1,247 @@
+import hashlib
+import time
+
+# write_flash options that erase the whole chip instead of the written regions
+ERASE_ALL_FLASH_ARGS = ("--erase-all", "-e")
+
+SECTOR_SIZE = 0x1000  # Smallest unit the flash erases
+BLOCK_SIZE = 0x10000  # Largest unit the stub erases with
+# Typical timings of the SPI NOR flash on ESP32 modules
+SECTOR_ERASE_SECONDS = 0.045
+BLOCK_ERASE_SECONDS = 0.15
+CHIP_ERASE_SECONDS_PER_MB = 2.5
+# Reading and hashing flash on the stub, what checking a range for data costs
+MD5_SECONDS_PER_MB = 0.5
+MD5_COMMAND_SECONDS = 0.005
+MB = 1024 * 1024
+
+ERASE_NONE = "none"
+ERASE_TARGETED = "targeted"
+ERASE_CHIP = "chip"
+
+_blank_md5 = {}
+
+
+class ErasePlan:
+    """What to erase before writing, and how long that is expected to take.
+
+    ERASE_NONE leaves erasing to the writes, which erase the sectors they
+    touch. ERASE_TARGETED erases `ranges` (sector aligned) on top of that,
+    ERASE_CHIP the whole chip. `estimated_seconds` includes the time spent
+    checking the flash for data (`check_seconds`).
+    """
+
+    def __init__(
+        self,
+        mode,
+        ranges=(),
+        estimated_seconds=0.0,
+        chip_seconds=0.0,
+        check_seconds=0.0,
+    ):
+        self.mode = mode
+        self.ranges = list(ranges)
+        self.estimated_seconds = estimated_seconds
+        self.chip_seconds = chip_seconds  # Estimate for a full-chip erase
+        self.check_seconds = check_seconds
+
+    def units(self):
+        """Returns the number of (blocks, sectors) a targeted erase takes."""
+        blocks = sectors = 0
+        for offset, size in self.ranges:
+            for _, unit in erase_units(offset, size):
+                if unit == BLOCK_SIZE:
+                    blocks += 1
+                else:
+                    sectors += 1
+        return blocks, sectors
+
+    def describe(self):
+        if self.mode == ERASE_CHIP:
+            return f"Erasing the whole chip (about {self.estimated_seconds:.0f} s)."
+        if self.mode == ERASE_TARGETED:
+            blocks, sectors = self.units()
+            return (
+                f"Erasing {blocks} blocks and {sectors} sectors outside the "
+                f"images (about {self.estimated_seconds:.1f} s including "
+                f"{self.check_seconds:.1f} s checking for data, instead of "
+                f"{self.chip_seconds:.0f} s for the whole chip)."
+            )
+        return "Erasing only the sectors being written."
+
+
+def align_ranges(ranges):
+    """Merges (offset, size) ranges, widened to whole sectors."""
+    aligned = sorted(
+        (
+            offset - offset % SECTOR_SIZE,
+            -(-(offset + size) // SECTOR_SIZE) * SECTOR_SIZE,
+        )
+        for offset, size in ranges
+        if size > 0
+    )
+    merged = []
+    for start, end in aligned:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end - start) for start, end in merged]
+
+
+def subtract_ranges(ranges, holes):
+    """Parts of `ranges` not covered by `holes`, both as (offset, size)."""
+    result = []
+    for offset, size in ranges:
+        pieces = [(offset, offset + size)]
+        for hole_offset, hole_size in holes:
+            hole_end = hole_offset + hole_size
+            remaining = []
+            for start, end in pieces:
+                if hole_end <= start or hole_offset >= end:
+                    remaining.append((start, end))
+                    continue
+                if start < hole_offset:
+                    remaining.append((start, hole_offset))
+                if hole_end < end:
+                    remaining.append((hole_end, end))
+            pieces = remaining
+        result.extend((start, end - start) for start, end in pieces)
+    return result
+
+
+def erase_units(offset, size):
+    """Splits a sector aligned range into the fewest sector and block erases."""
+    end = offset + size
+    while offset < end:
+        if offset % BLOCK_SIZE == 0 and end - offset >= BLOCK_SIZE:
+            unit = BLOCK_SIZE
+        else:
+            unit = SECTOR_SIZE
+        yield offset, unit
+        offset += unit
+
+
+def erase_seconds(ranges):
+    """Estimated time for erasing the ranges sector by sector and block by block."""
+    seconds = 0.0
+    for offset, size in ranges:
+        for _, unit in erase_units(offset, size):
+            seconds += (
+                BLOCK_ERASE_SECONDS if unit == BLOCK_SIZE else SECTOR_ERASE_SECONDS
+            )
+    return seconds
+
+
+def chip_erase_seconds(flash_end):
+    return flash_end / MB * CHIP_ERASE_SECONDS_PER_MB
+
+
+def md5_seconds(size):
+    """Estimated time for hashing `size` bytes of flash on the stub."""
+    return MD5_COMMAND_SECONDS + size / MB * MD5_SECONDS_PER_MB
+
+
+def split_at_blocks(offset, size):
+    """Splits a sector aligned range into a head up to the first block
+    boundary, the whole blocks and a tail after the last one."""
+    end = offset + size
+    head_end = min(end, -(-offset // BLOCK_SIZE) * BLOCK_SIZE)
+    tail_start = max(head_end, end // BLOCK_SIZE * BLOCK_SIZE)
+    return [
+        (start, stop - start)
+        for start, stop in (
+            (offset, head_end),
+            (head_end, tail_start),
+            (tail_start, end),
+        )
+        if stop > start
+    ]
+
+
+def blank_md5(size):
+    """MD5 of `size` bytes of erased flash."""
+    if size not in _blank_md5:
+        md5 = hashlib.md5()
+        chunk = b"\xff" * min(size, MB)
+        remaining = size
+        while remaining:
+            md5.update(chunk[:remaining])
+            remaining -= min(remaining, len(chunk))
+        _blank_md5[size] = md5.hexdigest()
+    return _blank_md5[size]
+
+
+def find_used_ranges(esp, ranges, budget_seconds):
+    """Narrows the ranges down to the blocks and sectors that hold data.
+
+    Ranges are split at block boundaries first. Whole blocks are halved
+    block by block, heads and tails shorter than a block sector by sector,
+    as long as they don't hash as erased. Returns (used ranges, seconds
+    spent hashing), or None once hashing and erasing what was found is
+    expected to take longer than `budget_seconds`.
+    """
+    used = []
+    spent = 0.0
+    pending = []
+    for offset, size in reversed(align_ranges(ranges)):
+        pending.extend(reversed(split_at_blocks(offset, size)))
+    while pending:
+        offset, size = pending.pop()
+        spent += md5_seconds(size)
+        if spent + erase_seconds(used) > budget_seconds:
+            return None
+        if esp.flash_md5sum(offset, size) == blank_md5(size):
+            continue
+        # Pieces are either whole blocks or lie within a single block
+        unit = BLOCK_SIZE if size >= BLOCK_SIZE else SECTOR_SIZE
+        if size <= unit:
+            used.append((offset, size))
+            continue
+        middle = offset + size // unit // 2 * unit
+        pending.append((middle, offset + size - middle))
+        pending.append((offset, middle - offset))
+    return align_ranges(used), spent
+
+
+def plan_erase(esp, regions, flash_end, erase_all, keep=()):
+    """Plans the erase for writing `regions`, as (offset, size).
+
+    Without `erase_all` nothing is erased beyond what the writes touch. With
+    it, the flash outside the regions has to end up erased: either the whole
+    chip is erased, or only the blocks that hold data, whichever is expected
+    to be faster. Ranges in `keep`, e.g. the unchanged images of a delta
+    package, are never erased.
+    """
+    chip_seconds = chip_erase_seconds(flash_end)
+    if not erase_all:
+        return ErasePlan(ERASE_NONE, chip_seconds=chip_seconds)
+
+    written = align_ranges(regions)
+    rest = subtract_ranges([(0, flash_end)], written + align_ranges(keep))
+    # Erasing the chip would take the kept images with it
+    budget = float("inf") if keep else chip_seconds
+    found = find_used_ranges(esp, rest, budget)
+    if found is None:
+        return ErasePlan(ERASE_CHIP, [], chip_seconds, chip_seconds)
+    used, check_seconds = found
+    return ErasePlan(
+        ERASE_TARGETED,
+        used,
+        check_seconds + erase_seconds(used),
+        chip_seconds,
+        check_seconds,
+    )
+
+
+def apply_erase_plan(esp, plan):
+    """Erases what the plan says, returns the seconds it took."""
+    start = time.monotonic()
+    print(plan.describe())
+    if plan.mode == ERASE_CHIP:
+        esp.erase_flash()
+    elif plan.mode == ERASE_TARGETED:
+        for offset, size in plan.ranges:
+            # The stub erases aligned 64 kB blocks in one go
+            esp.erase_region(offset, size)
+    return time.monotonic() - start
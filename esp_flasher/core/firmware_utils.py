@@ -3,11 +3,20 @@ import zipfile
 import tempfile
 import os
 
-import espefuse
-import espsecure
-
 from esp_flasher.core.chip_utils import EsptoolFlashArgs
-from esp_flasher.helpers.utils import load_config, Esp_flasherError
+from esp_flasher.core.const import (
+    DEFAULT_SECURITY_PROFILE,
+    PACKAGE_FORMAT_V1,
+    PACKAGE_FORMAT_V2,
+)
+from esp_flasher.core.efuse_utils import (
+    EfuseSnapshot,
+    apply_security_efuse_plan,
+    plan_security_efuses,
+)
+from esp_flasher.core.flash_writer import FlashImage
+from esp_flasher.helpers.firmware_download import fetch_firmware
+from esp_flasher.helpers.utils import Esp_flasherError
 
 
 def extract_firmware(firmware_path):
@@ -15,7 +24,8 @@ def extract_firmware(firmware_path):
     Extracts a firmware ZIP file to a temporary directory and loads flasher_args.json.
 
     Args:
-        firmware_path (str): Path to the firmware ZIP file.
+        firmware_path (str): Path or http(s) URL of the firmware ZIP file,
+            URLs are downloaded into the firmware cache first.
 
     Returns:
         tuple: (dict, str) containing loaded JSON data from `flasher_args.json` and the temporary directory path.
@@ -23,7 +33,10 @@ def extract_firmware(firmware_path):
     Raises:
         FileNotFoundError: If the firmware file or flasher_args.json is missing.
         json.JSONDecodeError: If flasher_args.json is not valid JSON.
+        Esp_flasherError: If the package format is unknown or a v2 package
+            doesn't match its image manifest, or a URL can't be downloaded.
     """
+    firmware_path = fetch_firmware(firmware_path)
     if not os.path.exists(firmware_path):
         raise FileNotFoundError(f"Firmware file not found: {firmware_path}")
 
@@ -43,9 +56,58 @@ def extract_firmware(firmware_path):
     with open(flasher_args_path, "r") as f:
         flasher_args = json.load(f)
 
+    package_format = get_package_format(flasher_args)
+    if package_format > PACKAGE_FORMAT_V2:
+        raise Esp_flasherError(
+            f"Unsupported firmware package format {package_format}, "
+            "please update the flasher."
+        )
+    if package_format == PACKAGE_FORMAT_V2:
+        check_package_images(flasher_args, temp_dir)
+
     return flasher_args, temp_dir
 
 
+def is_delta_package(flasher_args):
+    """Tells whether a package only holds the images changed since a base release."""
+    return "delta" in flasher_args
+
+
+def get_package_format(flasher_args):
+    """Returns the release package format, 1 for packages without a manifest."""
+    return int(flasher_args.get("package_format", PACKAGE_FORMAT_V1))
+
+
+def check_package_images(flasher_args, extract_dir):
+    """
+    Checks an extracted v2 package against its image manifest.
+
+    File contents are already covered by the ZIP checksums verified on
+    extraction and, once written, by the flash MD5, so only presence and
+    sizes are checked here; nothing is hashed.
+    """
+    images = flasher_args.get("images", {})
+    for offset, relative_path in flasher_args["flash_files"].items():
+        image = images.get(offset)
+        if image is None or image["file"] != relative_path:
+            raise Esp_flasherError(f"Image manifest has no entry for {relative_path}")
+
+        files = [(image["file"], image["size"])]
+        if "compressed" in image:
+            compressed = image["compressed"]
+            files.append((compressed["file"], compressed["compressed_size"]))
+
+        for file_path, size in files:
+            abs_path = os.path.join(extract_dir, file_path)
+            if not os.path.exists(abs_path):
+                raise Esp_flasherError(f"{file_path} missing from firmware package!")
+            if os.path.getsize(abs_path) != size:
+                raise Esp_flasherError(
+                    f"{file_path} is {os.path.getsize(abs_path)} bytes, "
+                    f"manifest says {size}"
+                )
+
+
 def enable_secure_boot(app_config, port, baud_rate, flasher_args, extract_dir):
     """
     Enables Secure Boot if configured and signs the firmware binaries.
@@ -53,6 +115,8 @@ def enable_secure_boot(app_config, port, baud_rate, flasher_args, extract_dir):
     More details: https://docs.espressif.com/projects/esp-idf/en/stable/esp32s3/security/host-based-security-workflows.html#introduction
     """
 
+    import espefuse
+
     print("Enabling Secure Boot...")
 
     # If release has security enabled then we need to specify block for digest flashing.
@@ -107,6 +171,9 @@ def enable_flash_encryption(app_config, port, extract_dir):
     More details: https://docs.espressif.com/projects/esp-idf/en/stable/esp32s3/security/host-based-security-workflows.html#introduction
     """
 
+    import espefuse
+    import espsecure
+
     print("Enabling Flash Encryption...")
 
     key_file = ""
@@ -143,80 +210,53 @@ def enable_flash_encryption(app_config, port, extract_dir):
     print("Flash Encryption key flashed successfully.")
 
 
-def burn_and_protect_security_efuses(port):
+def burn_and_protect_security_efuses(port, security_profile=None, baud_rate=115200):
     """
-    Burns multiple security eFuses and applies write protection to prevent modification.
+    Burns the security eFuses of a profile and write-protects them, skipping
+    everything the chip already has. The eFuses are read once and all missing
+    writes are burned in a single batch over the same connection.
     More details: https://docs.espressif.com/projects/esp-idf/en/stable/esp32s3/security/host-based-security-workflows.html#introduction
 
     Args:
         port (str): Serial port of the ESP32S3 device (e.g., "/dev/ttyUSB0").
+        security_profile (dict): `burn_efuses` and `write_protect_efuses`,
+            defaults to `DEFAULT_SECURITY_PROFILE`.
+        baud_rate (int): Baud rate for the eFuse connection.
 
     Raises:
-        Exception: If the eFuse burning process fails.
+        Esp_flasherError: If the profile can't be applied or the burn fails.
     """
+    import espefuse
 
-    # eFuses to burn (security settings)
-    security_efuses = {
-        "DIS_DOWNLOAD_ICACHE": "0x1",  # Disable UART instruction cache
-        "DIS_DOWNLOAD_DCACHE": "0x1",  # Disable UART data cache
-        "HARD_DIS_JTAG": "0x1",  # Hard disable JTAG peripheral
-        "SOFT_DIS_JTAG": "0x1",  # Disable software access to JTAG
-        "DIS_DIRECT_BOOT": "0x1",  # Disable direct boot (legacy SPI boot mode)
-        "DIS_USB_JTAG": "0x1",  # Disable USB switch to JTAG
-        "DIS_DOWNLOAD_MANUAL_ENCRYPT": "0x1",  # Disable UART bootloader encryption access
-        "SECURE_BOOT_AGGRESSIVE_REVOKE": "0x1",  # Aggressive revocation of key digests
-    }
-
-    print("Burning security eFuses...")
-
-    # Construct a single espefuse command with all eFuses
-    burn_command = [
-        "--do-not-confirm",
-        "--port",
-        str(port),
-        "burn_efuse",
-    ]
-
-    # Append each eFuse and its value
-    for efuse, value in security_efuses.items():
-        burn_command.append(efuse)
-        burn_command.append(value)
-
-    print("Running eFuse burning command:")
-    print(f"espefuse.py {' '.join(burn_command)}")
+    profile = security_profile or DEFAULT_SECURITY_PROFILE
 
+    print("Reading security eFuses...")
+    esp = espefuse.get_esp(str(port), baud_rate, "default_reset")
     try:
-        espefuse.main(burn_command)
-        print("All security eFuses burned successfully.")
-    except Exception as e:
-        print(f"Error while burning eFuses: {e}")
-        raise
-
-    # **Step 2: Write-Protect Security eFuses**
-    print("\nApplying write protection to security eFuses...")
-
-    write_protect_efuses = [
-        "DIS_ICACHE",  # Write-protects multiple security configurations
-        "RD_DIS",  # Prevents accidental read protection of Secure Boot digest
-    ]
-
-    for efuse in write_protect_efuses:
-        print(f"Writing protection for {efuse}...")
+        efuses, _ = espefuse.get_efuses(esp, do_not_confirm=True)
+        plan = plan_security_efuses(EfuseSnapshot.read(efuses), profile)
+
+        if plan.is_empty():
+            print("Security eFuses already provisioned, nothing to burn.")
+            return
+
+        print("Burning security eFuses and applying write protection...")
         try:
-            espefuse.main(
-                [
-                    "--do-not-confirm",
-                    "--port",
-                    str(port),
-                    "write_protect_efuse",
-                    efuse,
-                ]
-            )
-            print(f"{efuse} write-protected successfully.")
+            apply_security_efuse_plan(efuses, plan)
         except Exception as e:
-            print(f"Failed to write-protect {efuse}: {e}")
+            print(f"Error while burning eFuses: {e}")
             raise
 
+        # EspEfuses re-reads all blocks after a burn
+        remaining = plan_security_efuses(EfuseSnapshot.read(efuses), profile)
+        if not remaining.is_empty():
+            raise Esp_flasherError(
+                "Security eFuses did not read back as burned: "
+                + ", ".join(list(remaining.burn) + remaining.write_protect)
+            )
+    finally:
+        esp._port.close()
+
     print("\nSecurity eFuses burned and write-protected successfully.")
 
 
@@ -228,6 +268,7 @@ def configure_write_flash_args(flasher_args, extract_dir):
         flasher_args (str): JSON with extract flashing arguments from firmware release
     Returns:
         dict: Contains flash mode, flash frequency, and list of (offset, file) tuples.
+            For v2 packages also the images with their manifest data.
     """
 
     # Extract flash arguments
@@ -251,6 +292,32 @@ def configure_write_flash_args(flasher_args, extract_dir):
         except ValueError:
             raise ValueError(f"Invalid offset format: {offset}")
 
+    images = None
+    if get_package_format(flasher_args) >= PACKAGE_FORMAT_V2:
+        images = []
+        for offset, image in flasher_args["images"].items():
+            payload = None
+            if "compressed" in image:
+                payload = dict(image["compressed"])
+                payload["path"] = os.path.join(extract_dir, payload["file"])
+            images.append(
+                FlashImage(
+                    int(offset, 16),
+                    os.path.join(extract_dir, image["file"]),
+                    image["size"],
+                    image["sha256"],
+                    image["md5"],
+                    payload,
+                )
+            )
+        images.sort(key=lambda image: image.offset)
+
+    # Images of the base release a delta package leaves as they are
+    unchanged_regions = sorted(
+        (int(offset, 16), region["size"], region["md5"])
+        for offset, region in flasher_args.get("delta", {}).get("unchanged", {}).items()
+    )
+
     # Return structured arguments
     return EsptoolFlashArgs(
         chip,
@@ -262,4 +329,6 @@ def configure_write_flash_args(flasher_args, extract_dir):
         stub,
         before,
         after,
+        images,
+        unchanged_regions,
     )
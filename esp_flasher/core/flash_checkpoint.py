@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from esp_flasher.helpers.utils import get_config_dir
+
+CHECKPOINTS_FILE_NAME = "flash_checkpoints.json"  # In the config directory
+SAVE_INTERVAL = 1.0  # Seconds between saves while an image is being written
+
+
+class RegionCheckpoint:
+    """How much of one image of a package is confirmed written on one device."""
+
+    def __init__(self, device, offset, md5, package=None, confirmed=0):
+        self.device = device  # MAC address of the chip
+        self.offset = offset
+        self.md5 = md5  # Of the whole uncompressed image
+        self.package = package  # Identifies the images written with it
+        self.confirmed = confirmed  # Uncompressed bytes from the image start
+
+    @property
+    def key(self):
+        return (self.device, self.offset, self.md5, self.package)
+
+    def to_dict(self):
+        return {
+            "device": self.device,
+            "offset": self.offset,
+            "md5": self.md5,
+            "package": self.package,
+            "confirmed": self.confirmed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["device"],
+            data["offset"],
+            data["md5"],
+            data.get("package"),
+            data.get("confirmed", 0),
+        )
+
+
+class FlashCheckpoints:
+    """Confirmed write progress per device and image.
+
+    A write that is interrupted, e.g. by a bouncing pogo pin, keeps its
+    checkpoint, so reconnecting (right away or on the next flash of the same
+    board) continues the image instead of rewriting it. Checkpoints are
+    saved to `path` (flash_checkpoints.json in the config directory), so
+    this also works after the GUI or station was restarted. Checkpoints are
+    only hints: the already written range is verified by its flash MD5
+    before it is skipped.
+    """
+
+    def __init__(self, path=None, save_interval=SAVE_INTERVAL):
+        self._path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._regions = None  # RegionCheckpoint.key -> RegionCheckpoint
+        self._dirty = False
+        self._saved_at = 0.0
+
+    @property
+    def path(self):
+        # Resolved on first use, after --config-dir was applied
+        if self._path is None:
+            self._path = os.path.join(get_config_dir(), CHECKPOINTS_FILE_NAME)
+        return self._path
+
+    def region(self, device, offset, md5, package=None):
+        """Returns the checkpoint of an image, a new one if there is none."""
+        checkpoint = RegionCheckpoint(device, offset, md5, package)
+        with self._lock:
+            return self._load().setdefault(checkpoint.key, checkpoint)
+
+    def confirm(self, checkpoint, confirmed):
+        """Records confirmed progress, saved at most every `save_interval`."""
+        checkpoint.confirmed = confirmed
+        with self._lock:
+            self._dirty = True
+            if time.monotonic() - self._saved_at < self.save_interval:
+                return
+        self.save()
+
+    def clear(self, checkpoint):
+        """Drops a checkpoint, once its image is verified or can't be resumed."""
+        with self._lock:
+            if self._load().pop(checkpoint.key, None) is None:
+                return
+            self._dirty = True
+        self.save()
+
+    def pending(self, device=None):
+        """Checkpoints of interrupted writes, optionally of one device."""
+        with self._lock:
+            return [
+                checkpoint
+                for checkpoint in self._load().values()
+                if checkpoint.confirmed and device in (None, checkpoint.device)
+            ]
+
+    def save(self):
+        """Writes the interrupted writes to disk, if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = [
+                checkpoint.to_dict()
+                for checkpoint in self._load().values()
+                if checkpoint.confirmed
+            ]
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path + ".tmp", "w") as checkpoints_file:
+                    json.dump(data, checkpoints_file, indent=2)
+                os.replace(self.path + ".tmp", self.path)
+            except OSError as err:
+                logging.warning(f"Could not save flash checkpoints: {err}")
+                return
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+    def _load(self):
+        if self._regions is None:
+            self._regions = {}
+            try:
+                with open(self.path, "r") as checkpoints_file:
+                    data = json.load(checkpoints_file)
+                for item in data:
+                    checkpoint = RegionCheckpoint.from_dict(item)
+                    self._regions[checkpoint.key] = checkpoint
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError, TypeError) as err:
+                logging.warning(f"Ignoring unreadable {self.path}: {err}")
+        return self._regions
+
+
+flash_checkpoints = FlashCheckpoints()
@@ -0,0 +1,210 @@
+import re
+import threading
+import time
+
+# esptool's and write_payload's progress line when stdout is not a terminal
+WRITING_AT_PATTERN = re.compile(r"Writing at 0x([0-9a-fA-F]+)\.\.\. \((\d+) %\)")
+# Shortest time the rate is measured over, blocks are acked in bursts
+RATE_WINDOW = 0.25
+
+
+class FlashProgress:
+    """Progress of a flash write, for one region and the whole job."""
+
+    def __init__(
+        self,
+        port,
+        region,
+        region_written,
+        region_size,
+        written,
+        total,
+        bytes_per_second,
+        eta_seconds,
+        done=False,
+    ):
+        self.port = port
+        self.region = region  # Flash offset of the image being written
+        self.region_written = region_written
+        self.region_size = region_size
+        self.written = written  # Uncompressed bytes of all regions
+        self.total = total
+        self.bytes_per_second = bytes_per_second
+        self.eta_seconds = eta_seconds  # None until a rate is known
+        self.done = done
+
+    @property
+    def percent(self):
+        if not self.total:
+            return 0
+        return min(100, 100 * self.written // self.total)
+
+    def to_dict(self):
+        return {
+            "region": f"0x{self.region:08x}",
+            "region_written": self.region_written,
+            "region_size": self.region_size,
+            "written": self.written,
+            "total": self.total,
+            "percent": self.percent,
+            "bytes_per_second": round(self.bytes_per_second),
+            "eta_seconds": (
+                None if self.eta_seconds is None else round(self.eta_seconds, 1)
+            ),
+        }
+
+
+class ProgressTracker:
+    """Turns block by block write updates into FlashProgress events.
+
+    `callback(progress)` is called at most every `min_interval` seconds,
+    except for the first and the last update of each region. The rate is
+    smoothed, so a stalling adapter shows up as a falling bytes/s and a
+    growing ETA instead of jumping around with every block.
+    """
+
+    def __init__(self, callback, port=None, min_interval=0.1, smoothing=0.3):
+        self.callback = callback
+        self.port = port
+        self.min_interval = min_interval
+        self.smoothing = smoothing
+        self.total = 0
+        self.written = 0  # Bytes of the finished regions
+        self._region = None
+        self._region_size = 0
+        self._region_written = 0
+        self._rate = 0.0
+        self._last_sample = None  # (time, written) the rate was last updated at
+        self._last_emit = 0.0
+        self._last_reported = None  # (region, written) of the last event
+        self._started = None
+        self._lock = threading.Lock()
+
+    def start(self, total):
+        """Starts a job writing `total` uncompressed bytes."""
+        with self._lock:
+            self.total = total
+            self.written = 0
+            self._started = time.monotonic()
+
+    def begin_region(self, offset, size):
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._region = offset
+            self._region_size = size
+            self._region_written = 0
+        self._report(force=True)
+
+    def update(self, region_written):
+        """Bytes of the current region written so far."""
+        with self._lock:
+            self._region_written = min(region_written, self._region_size)
+        self._report()
+
+    def end_region(self):
+        with self._lock:
+            self._region_written = self._region_size
+        self._report(force=True)
+        with self._lock:
+            self.written += self._region_size
+            self._region_written = 0
+            self._region_size = 0
+
+    def elapsed(self):
+        if self._started is None:
+            return 0.0
+        return time.monotonic() - self._started
+
+    def average_rate(self):
+        """Effective bytes/s of the job so far, including handshakes."""
+        elapsed = self.elapsed()
+        return self.written / elapsed if elapsed > 0 else 0.0
+
+    def _report(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            written = self.written + self._region_written
+            if self._last_sample is None:
+                self._last_sample = (now, written)
+            else:
+                sample_time, sample_written = self._last_sample
+                if now - sample_time >= RATE_WINDOW:
+                    rate = max(0, written - sample_written) / (now - sample_time)
+                    if self._rate:
+                        rate = self.smoothing * rate + (1 - self.smoothing) * self._rate
+                    self._rate = rate
+                    self._last_sample = (now, written)
+
+            if not force and now - self._last_emit < self.min_interval:
+                return
+            if (self._region, written) == self._last_reported:
+                return
+            self._last_emit = now
+            self._last_reported = (self._region, written)
+            total = max(self.total, written)
+            eta = (total - written) / self._rate if self._rate > 0 else None
+            progress = FlashProgress(
+                self.port,
+                self._region,
+                self._region_written,
+                self._region_size,
+                written,
+                total,
+                self._rate,
+                eta,
+                done=total > 0 and written >= total,
+            )
+        self.callback(progress)
+
+
+class ProgressLineParser:
+    """Feeds esptool's "Writing at 0x... (n %)" lines into a ProgressTracker.
+
+    esptool only prints the address and percentage, so the region and its
+    size are looked up in the images being written, as (offset, size).
+    Text is passed on to `stream` unchanged.
+    """
+
+    def __init__(self, tracker, images, stream):
+        self.tracker = tracker
+        self.images = sorted(images)
+        self.stream = stream
+        self._region = None
+        self._partial = ""
+
+    def write(self, text):
+        self.stream.write(text)
+        lines = (self._partial + text).split("\n")
+        *complete, self._partial = lines
+        for line in complete:
+            self._parse(line)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def isatty(self):
+        return False
+
+    def finish(self):
+        if self._region is not None:
+            self.tracker.end_region()
+            self._region = None
+
+    def _parse(self, line):
+        match = WRITING_AT_PATTERN.search(line)
+        if not match:
+            return
+        address, percent = int(match.group(1), 16), int(match.group(2))
+        region = None
+        for offset, size in self.images:
+            if offset <= address:
+                region = (offset, size)
+        if region is None:
+            return
+        if region != self._region:
+            self.finish()
+            self._region = region
+            self.tracker.begin_region(*region)
+        self.tracker.update(region[1] * percent // 100)
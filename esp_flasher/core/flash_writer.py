@@ -0,0 +1,332 @@
+import hashlib
+import time
+import zlib
+
+import serial
+from esptool.cmds import detect_chip, detect_flash_size
+from esptool.loader import (
+    DEFAULT_TIMEOUT,
+    ERASE_WRITE_TIMEOUT_PER_MB,
+    ESPLoader,
+    timeout_per_mb,
+)
+from esptool.targets import CHIP_DEFS
+from esptool.util import FatalError, flash_size_bytes
+
+from esp_flasher.core.erase_planner import (
+    ERASE_ALL_FLASH_ARGS,
+    apply_erase_plan,
+    plan_erase,
+)
+from esp_flasher.core.flash_checkpoint import flash_checkpoints
+from esp_flasher.helpers.utils import Esp_flasherError
+
+# write_flash options the direct writer handles itself, with their value count
+DIRECT_WRITE_FLASH_ARGS = {
+    "--flash_mode": 1,
+    "--flash_freq": 1,
+    "--flash_size": 1,
+    # Planned by the erase planner instead of always erasing the whole chip
+    "--erase-all": 0,
+    "-e": 0,
+}
+
+# How often a write is resumed after the connection dropped, e.g. a pogo pin
+# bounced, and how long the contacts get to settle before reconnecting
+RESUME_ATTEMPTS = 2
+RECONNECT_DELAY = 1.0
+CONNECTION_ERRORS = (serial.SerialException, FatalError, OSError)
+
+
+class FlashImage:
+    """An image of a v2 package and its manifest data."""
+
+    def __init__(self, offset, path, size, sha256, md5, payload=None):
+        self.offset = offset
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.md5 = md5
+        # Pre-compressed stream as esptool sends it, a dict with "path",
+        # "size" and "md5" of the uncompressed (padded and patched) data
+        self.payload = payload
+
+
+def supports_direct_write(firmware_args):
+    """Tells whether a package can be written without going through esptool.
+
+    Needs a pre-compressed payload for every image, the flasher stub and no
+    write_flash options other than the flash settings.
+    """
+    if not firmware_args.images or firmware_args.no_stub:
+        return False
+    if any(image.payload is None for image in firmware_args.images):
+        return False
+
+    args = list(firmware_args.write_flash_args)
+    while args:
+        option = args.pop(0)
+        if option not in DIRECT_WRITE_FLASH_ARGS:
+            return False
+        del args[: DIRECT_WRITE_FLASH_ARGS[option]]
+    return True
+
+
+def package_id(images):
+    """Identifies the set of images a package writes, for its checkpoints."""
+    md5 = hashlib.md5()
+    for image in sorted(images, key=lambda image: image.offset):
+        md5.update(f"{image.offset:x}:{image.payload['md5']};".encode())
+    return md5.hexdigest()
+
+
+def resume_point(esp, offset, data, checkpoint):
+    """Uncompressed bytes of an image that can be skipped, 0 to start over.
+
+    The confirmed range is cut back to whole sectors, since writing the rest
+    erases from the next sector on, and only trusted if its flash MD5 matches.
+    """
+    start = checkpoint.confirmed - checkpoint.confirmed % esp.FLASH_SECTOR_SIZE
+    if start <= 0 or start >= len(data):
+        return 0
+    if esp.flash_md5sum(offset, start) != hashlib.md5(data[:start]).hexdigest():
+        print(f"Written part of 0x{offset:08x} doesn't verify, starting over.")
+        return 0
+    return start
+
+
+def write_payload(esp, offset, payload, size, md5, progress=None, checkpoint=None):
+    """Sends a pre-compressed image and verifies it by the flash MD5.
+
+    `progress` is an optional ProgressTracker, updated after every block.
+    With a RegionCheckpoint the confirmed blocks are recorded as they are
+    acknowledged, and a write the checkpoint says was interrupted continues
+    after its verified part.
+    """
+    start = 0
+    if checkpoint and checkpoint.confirmed:
+        data = zlib.decompress(payload)
+        start = resume_point(esp, offset, data, checkpoint)
+        if start:
+            print(
+                f"Resuming 0x{offset:08x} at 0x{offset + start:08x}, "
+                f"{start} bytes already written."
+            )
+            # A deflate stream can't be entered halfway, compress the rest anew
+            payload = zlib.compress(data[start:], 9)
+        flash_checkpoints.confirm(checkpoint, start)
+
+    if progress:
+        progress.begin_region(offset, size)
+    blocks = esp.flash_defl_begin(size - start, len(payload), offset + start)
+    decompress = zlib.decompressobj()
+    timeout = DEFAULT_TIMEOUT
+    written = start
+    for seq in range(blocks):
+        block = payload[seq * esp.FLASH_WRITE_SIZE : (seq + 1) * esp.FLASH_WRITE_SIZE]
+        print(
+            "Writing at 0x%08x... (%d %%)"
+            % (offset + written, 100 * (seq + 1) // blocks)
+        )
+        # Uncompressed size of the block sets how long the flash write may take
+        block_size = len(decompress.decompress(block))
+        esp.flash_defl_block(block, seq, timeout=timeout)
+        # The ack of a block means the previous one is written out
+        if checkpoint:
+            flash_checkpoints.confirm(checkpoint, written)
+        written += block_size
+        if progress:
+            progress.update(written)
+        # The stub acks a block on receipt and writes it while receiving the next
+        timeout = max(
+            DEFAULT_TIMEOUT, timeout_per_mb(ERASE_WRITE_TIMEOUT_PER_MB, block_size)
+        )
+    # Not acked until the last block is written out
+    esp.read_reg(ESPLoader.CHIP_DETECT_MAGIC_REG_ADDR, timeout=timeout)
+    if checkpoint:
+        flash_checkpoints.confirm(checkpoint, size)
+    if progress:
+        progress.end_region()
+    print(f"Wrote {size} bytes ({len(payload)} compressed) at 0x{offset:08x}.")
+
+    flash_md5 = esp.flash_md5sum(offset, size)
+    if checkpoint:
+        # Either done, or the image has to be written from the start
+        flash_checkpoints.clear(checkpoint)
+    if flash_md5 != md5:
+        raise Esp_flasherError(
+            f"Verification of 0x{offset:08x} failed: flash MD5 {flash_md5}, "
+            f"expected {md5}"
+        )
+    print("Hash of data verified.")
+
+
+def verify_unchanged_regions(esp, regions):
+    """Checks that the device holds the images a delta package leaves alone."""
+    for offset, size, md5 in regions:
+        print(f"Checking unchanged image at 0x{offset:08x}...")
+        flash_md5 = esp.flash_md5sum(offset, size)
+        if flash_md5 != md5:
+            raise Esp_flasherError(
+                f"Device doesn't run the base release of this delta package: "
+                f"image at 0x{offset:08x} differs (flash MD5 {flash_md5}, "
+                f"expected {md5}). Flash the full release instead."
+            )
+    print("Unchanged images verified, writing changed images only.")
+
+
+def _connect_stub(port, baud_rate, firmware_args):
+    """Connects and starts the flasher stub.
+
+    Returns (esp, flash_size, flash_end), or None if the device has security
+    features enabled.
+    """
+    esp = detect_chip(port, ESPLoader.ESP_ROM_BAUD, firmware_args.before)
+    try:
+        expected_chip = CHIP_DEFS[firmware_args.chip].CHIP_NAME
+        if esp.CHIP_NAME != expected_chip:
+            raise Esp_flasherError(
+                f"Package is for {expected_chip}, device is {esp.CHIP_NAME}"
+            )
+
+        if (
+            esp.secure_download_mode
+            or esp.get_secure_boot_enabled()
+            or esp.get_flash_encryption_enabled()
+        ):
+            print("Device has security features enabled, flashing with esptool.")
+            esp._port.close()
+            return None
+
+        esp = esp.run_stub()
+        if baud_rate > ESPLoader.ESP_ROM_BAUD:
+            esp.change_baud(baud_rate)
+
+        flash_size = firmware_args.flash_size
+        if flash_size in ("detect", "keep"):
+            flash_size = detect_flash_size(esp)
+        flash_end = flash_size_bytes(flash_size)
+        esp.flash_set_parameters(flash_end)
+        return esp, flash_size, flash_end
+    except BaseException:
+        esp._port.close()
+        raise
+
+
+def write_package_images(port, baud_rate, firmware_args, progress=None):
+    """Writes the pre-compressed images of a v2 package.
+
+    Returns False, without writing anything, if the device has security
+    features enabled and the package has to go through esptool instead.
+
+    Delta packages are only written once the unchanged images of their base
+    release are verified on the device.
+
+    A package asking for --erase-all gets the erase the planner expects to
+    be fastest: the whole chip, or only the blocks outside the images that
+    hold data.
+
+    If the connection drops while an image is written, the device is
+    reconnected (up to RESUME_ATTEMPTS times) and the image continues from
+    its last verified sector. An image left unfinished is resumed the same
+    way the next time this board is flashed with the same package, also
+    after a restart. Checkpoints another package left on the board are
+    dropped.
+
+    Raises:
+        Esp_flasherError: If the chip doesn't match the package, the device
+            doesn't run the base of a delta package, the images don't fit or
+            a written image doesn't verify.
+    """
+    connection = _connect_stub(port, baud_rate, firmware_args)
+    if connection is None:
+        return False
+    esp, flash_size, flash_end = connection
+    try:
+        for image in firmware_args.images:
+            if image.offset + image.payload["size"] > flash_end:
+                raise Esp_flasherError(
+                    f"{image.path} at 0x{image.offset:x} will not fit in "
+                    f"{flash_size} of flash"
+                )
+
+        verify_unchanged_regions(esp, firmware_args.unchanged_regions)
+
+        device = ":".join(f"{byte:02x}" for byte in esp.read_mac())
+        package = package_id(firmware_args.images)
+        resumable = False
+        for checkpoint in flash_checkpoints.pending(device):
+            if checkpoint.package == package:
+                resumable = True
+            else:
+                # Left by another package, whose erase doesn't fit this one
+                flash_checkpoints.clear(checkpoint)
+        if resumable:
+            # Erased before the interrupted write started, keep what it wrote
+            print("Resuming an interrupted write, skipping the erase.")
+        else:
+            erase_all = any(
+                arg in ERASE_ALL_FLASH_ARGS for arg in firmware_args.write_flash_args
+            )
+            plan = plan_erase(
+                esp,
+                [
+                    (image.offset, image.payload["size"])
+                    for image in firmware_args.images
+                ],
+                flash_end,
+                erase_all,
+                keep=[
+                    (offset, size)
+                    for offset, size, _ in firmware_args.unchanged_regions
+                ],
+            )
+            apply_erase_plan(esp, plan)
+        if progress:
+            progress.start(sum(image.payload["size"] for image in firmware_args.images))
+        attempts = RESUME_ATTEMPTS
+        pending = list(firmware_args.images)
+        while pending:
+            image = pending[0]
+            with open(image.payload["path"], "rb") as payload_file:
+                payload = payload_file.read()
+            checkpoint = flash_checkpoints.region(
+                device, image.offset, image.payload["md5"], package
+            )
+            try:
+                write_payload(
+                    esp,
+                    image.offset,
+                    payload,
+                    image.payload["size"],
+                    image.payload["md5"],
+                    progress,
+                    checkpoint,
+                )
+            except CONNECTION_ERRORS as err:
+                if not attempts:
+                    raise
+                attempts -= 1
+                print(
+                    f"Connection lost writing 0x{image.offset:08x} ({err}), "
+                    f"reconnecting to resume after {checkpoint.confirmed} bytes..."
+                )
+                esp._port.close()
+                time.sleep(RECONNECT_DELAY)
+                connection = _connect_stub(port, baud_rate, firmware_args)
+                if connection is None:
+                    raise Esp_flasherError("Device changed while flashing")
+                esp = connection[0]
+                continue
+            pending.pop(0)
+
+        if firmware_args.after == "hard_reset":
+            print("Hard resetting via RTS pin...")
+            esp.hard_reset()
+        elif firmware_args.after == "soft_reset":
+            esp.soft_reset(False)
+        return True
+    finally:
+        # Keeps what an interrupted write confirmed for the next run
+        flash_checkpoints.save()
+        esp._port.close()
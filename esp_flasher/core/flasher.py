@@ -1,3 +1,5 @@
+import os
+
 import esptool
 
 from esp_flasher.core.firmware_utils import (
@@ -6,72 +8,145 @@ from esp_flasher.core.firmware_utils import (
     enable_secure_boot,
     enable_flash_encryption,
     configure_write_flash_args,
+    is_delta_package,
 )
-from esp_flasher.helpers.utils import Esp_flasherError, load_config
+from esp_flasher.core.erase_planner import ERASE_ALL_FLASH_ARGS
+from esp_flasher.core.flash_progress import ProgressLineParser
+from esp_flasher.core.flash_writer import supports_direct_write, write_package_images
+from esp_flasher.core.config_loader import get_config
+from esp_flasher.helpers.output_router import current_output, route_output
+from esp_flasher.helpers.utils import Esp_flasherError
 
 
-def run_esp_flasher(port, firmware, baud_rate=115200):
-    """Runs the ESP flashing process, integrating secure boot and encryption."""
+class FlashSession:
+    """A firmware package extracted once and flashed onto any number of boards.
+
+    Station runs keep one session for all boards, so the package is neither
+    re-extracted nor re-checked per board.
+    """
+
+    def __init__(self, firmware, no_erase=False):
+        self.firmware = firmware
+        self.flasher_args, self.extract_dir = extract_firmware(firmware_path=firmware)
+        self.firmware_args = configure_write_flash_args(
+            self.flasher_args, self.extract_dir
+        )
+        if no_erase:
+            # Only the sectors being written are erased then, also by the planner
+            self.firmware_args.write_flash_args = [
+                arg
+                for arg in self.firmware_args.write_flash_args
+                if arg not in ERASE_ALL_FLASH_ARGS
+            ]
 
-    app_config = load_config()
-    flasher_args, extract_dir = extract_firmware(firmware_path=firmware)
-    firmware_args = configure_write_flash_args(flasher_args, extract_dir)
-
-    app_encryption_enabled = app_config.get("flash_encryption", {}).get(
-        "encryption_en", False
-    )
-    release_encryption_enabled = flasher_args.get("security", {}).get(
-        "encryption", False
-    )
-    encryption_enabled = app_encryption_enabled or release_encryption_enabled
-    if encryption_enabled:
-        enable_flash_encryption(
-            app_config.get("flash_encryption", {}), port, extract_dir
+    def flash(self, port, baud_rate=115200, progress=None):
+        """Flashes one board, integrating secure boot and encryption.
+
+        `progress` is an optional ProgressTracker that follows the writes.
+
+        Raises:
+            Esp_flasherError: If flashing fails.
+        """
+        app_config = get_config()
+        flasher_args = self.flasher_args
+        extract_dir = self.extract_dir
+        firmware_args = self.firmware_args
+
+        app_encryption_enabled = app_config.flash_encryption.encryption_en
+        release_encryption_enabled = flasher_args.get("security", {}).get(
+            "encryption", False
         )
+        encryption_enabled = app_encryption_enabled or release_encryption_enabled
+        if encryption_enabled:
+            enable_flash_encryption(app_config.flash_encryption, port, extract_dir)
 
-    # Now check the configuration from the actual release
-    secure_boot_enabled = flasher_args.get("security", {}).get("secure_boot", False)
-    if secure_boot_enabled:
-        enable_secure_boot(
-            app_config.get("secure_boot", {}),
+        # Now check the configuration from the actual release
+        secure_boot_enabled = flasher_args.get("security", {}).get("secure_boot", False)
+        if secure_boot_enabled:
+            enable_secure_boot(
+                app_config.secure_boot,
+                port,
+                baud_rate,
+                flasher_args,
+                extract_dir,
+            )
+
+        # Base esptool command
+        esptool_cmd = [
+            "--chip",
+            firmware_args.chip,
+            "--port",
             port,
-            baud_rate,
-            flasher_args,
-            extract_dir,
+            "--baud",
+            str(baud_rate),
+            "--before",
+            firmware_args.before,
+            "--after",
+            firmware_args.after,
+        ]
+
+        # Check if we should disable the stub loader
+        if firmware_args.no_stub:
+            esptool_cmd.append("--no-stub")
+
+        # Add flash arguments
+        esptool_cmd.extend(["write_flash"] + firmware_args.write_flash_args)
+
+        # Add flash file commands
+        esptool_cmd.extend(firmware_args.addr_filename)
+
+        # v2 packages carry the compressed payloads esptool would otherwise
+        # recompute; security features change how images are written though
+        direct_write = (
+            supports_direct_write(firmware_args)
+            and not encryption_enabled
+            and not secure_boot_enabled
         )
 
-    # Base esptool command
-    esptool_cmd = [
-        "--chip",
-        firmware_args.chip,
-        "--port",
-        port,
-        "--baud",
-        str(baud_rate),
-        "--before",
-        firmware_args.before,
-        "--after",
-        firmware_args.after,
-    ]
-
-    # Check if we should disable the stub loader
-    if firmware_args.no_stub:
-        esptool_cmd.append("--no-stub")
-
-    # Add flash arguments
-    esptool_cmd.extend(["write_flash"] + firmware_args.write_flash_args)
-
-    # Add flash file commands
-    esptool_cmd.extend(firmware_args.addr_filename)
-
-    try:
-        esptool.main(esptool_cmd)
-
-        # Burn the security fuses and write protect
-        if encryption_enabled and secure_boot_enabled:
-            burn_and_protect_security_efuses(port)
-
-    except esptool.FatalError as err:
-        raise Esp_flasherError(f"Error while writing flash: {err}")
-    except Exception as e:
-        print("Flash error:", e)
+        try:
+            written = direct_write and write_package_images(
+                port, baud_rate, firmware_args, progress
+            )
+            if not written:
+                # esptool can't check the base release a delta is meant for
+                if is_delta_package(flasher_args):
+                    raise Esp_flasherError(
+                        "Delta packages can only be flashed onto devices without "
+                        "Secure Boot or flash encryption, flash the full release."
+                    )
+                self._run_esptool(esptool_cmd, progress)
+
+            # Burn the security fuses and write protect
+            if encryption_enabled and secure_boot_enabled:
+                burn_and_protect_security_efuses(
+                    port, app_config.security_profile.as_dict(), baud_rate
+                )
+
+        except esptool.FatalError as err:
+            raise Esp_flasherError(f"Error while writing flash: {err}")
+        except Esp_flasherError:
+            raise
+        except Exception as e:
+            raise Esp_flasherError(f"Flash error: {e}") from e
+
+    def _run_esptool(self, esptool_cmd, progress):
+        if progress is None:
+            esptool.main(esptool_cmd)
+            return
+
+        # esptool has no progress callback, its progress lines are parsed
+        addr_filename = self.firmware_args.addr_filename
+        images = [
+            (int(offset, 0), os.path.getsize(path))
+            for offset, path in zip(addr_filename[::2], addr_filename[1::2])
+        ]
+        progress.start(sum(size for _, size in images))
+        parser = ProgressLineParser(progress, images, current_output())
+        with route_output(parser, stderr=False):
+            esptool.main(esptool_cmd)
+        parser.finish()
+
+
+def run_esp_flasher(port, firmware, baud_rate=115200, no_erase=False, progress=None):
+    """Runs the ESP flashing process, integrating secure boot and encryption."""
+    FlashSession(firmware, no_erase=no_erase).flash(port, baud_rate, progress)
@@ -1,8 +1,17 @@
 import logging
-from PyQt5.QtWidgets import QGroupBox, QHBoxLayout, QPushButton
+import os
+from PyQt5.QtWidgets import (
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QProgressBar,
+    QPushButton,
+    QVBoxLayout,
+)
 from esp_flasher.threads.log_thread import LogThread
 from esp_flasher.threads.flashing_thread import FlashingThread
 from esp_flasher.threads.test_thread import TestThread
+from esp_flasher.core.chip_info_cache import chip_info_cache
 from esp_flasher.helpers.utils import (
     get_device_dir,
     get_flash_log_path,
@@ -17,10 +26,16 @@ class ActionsSection(QGroupBox):
         self.flashing_thread = None  # Store the thread reference
         self.log_thread = None  # Keep track of LogThread instance
         self.test_thread = None  # Will be created when test starts
+        self.board_log_paths = []  # Logs written for the current board
         self.init_ui()
 
     def init_ui(self):
-        layout = QHBoxLayout()
+        layout = QVBoxLayout()
+        buttons_layout = QHBoxLayout()
+
+        # Steps (1) to (4) in one go, see StationPipeline
+        self.station_button = QPushButton("Run Station (1-4)")
+        self.station_button.clicked.connect(self.run_station)
 
         self.flash_button = QPushButton("Flash ESP (4)")
         self.flash_button.clicked.connect(self.flash_esp)
@@ -34,20 +49,45 @@ class ActionsSection(QGroupBox):
         self.test_button = QPushButton("Test Device")
         self.test_button.clicked.connect(self.manual_test_device)
 
-        layout.addWidget(self.flash_button)
-        layout.addWidget(self.logs_button)
-        layout.addWidget(self.clear_button)
-        layout.addWidget(self.test_button)
+        buttons_layout.addWidget(self.station_button)
+        buttons_layout.addWidget(self.flash_button)
+        buttons_layout.addWidget(self.logs_button)
+        buttons_layout.addWidget(self.clear_button)
+        buttons_layout.addWidget(self.test_button)
+
+        # Flash progress with throughput, so a stalling adapter stands out
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_label = QLabel("")
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.progress_label)
+
+        layout.addLayout(buttons_layout)
+        layout.addLayout(progress_layout)
         self.setLayout(layout)
 
+    def run_station(self):
+        self.parent.station_pipeline.start()
+
     def flash_esp(self):
+        if not self.can_flash():
+            return
+        self.parent.console.clear()
+        self.start_flashing(self.handle_flash_completion)
+
+    def can_flash(self):
         if not self.parent._firmware or not self.parent._chip_port:
             logging.error("Please select firmware and a chip port.")
-            return
+            return False
         if self.flashing_thread and self.flashing_thread.isRunning():
             logging.warning("Flashing already in progress.")
-            return
-        self.parent.console.clear()
+            return False
+        return True
+
+    def start_flashing(self, on_finished):
+        """Starts the flashing thread, `on_finished(success)` gets the result."""
         logging.info("Starting flashing process...")
         # Generate device dir and log file
         device_dir = get_device_dir(
@@ -56,16 +96,57 @@ class ActionsSection(QGroupBox):
         )
         flash_log_path = get_flash_log_path(device_dir)
         self.parent.set_log_file(flash_log_path)
+        self.board_log_paths = [flash_log_path]
         self.flashing_thread = FlashingThread(
             self.parent._firmware, self.parent._chip_port
         )
 
-        self.flashing_thread.finished_signal.connect(self.handle_flash_completion)
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Connecting...")
+        self.flashing_thread.progress_signal.connect(self.update_progress)
+        self.flashing_thread.finished_signal.connect(on_finished)
         self.flashing_thread.start()
 
+    def move_board_logs(self, device_name):
+        """Moves the current board's logs into the directory of its device name.
+
+        Logs opened before registration returned the name went to the
+        directory named after the MAC address instead.
+        """
+        device_dir = get_device_dir(device_name)
+        moved = []
+        for old_path in self.board_log_paths:
+            new_path = os.path.join(device_dir, os.path.basename(old_path))
+            if old_path != new_path and os.path.exists(old_path):
+                try:
+                    self.parent.move_log_file(old_path, new_path)
+                except OSError as err:
+                    logging.warning(f"Could not move {old_path}: {err}")
+                    moved.append(old_path)
+                    continue
+                try:
+                    # Drops the MAC address directory if nothing else is in it
+                    os.rmdir(os.path.dirname(old_path))
+                except OSError:
+                    pass
+            moved.append(new_path)
+        self.board_log_paths = moved
+
+    def update_progress(self, progress):
+        """Shows a FlashProgress of the running flash."""
+        self.progress_bar.setValue(progress.percent)
+        text = (
+            f"0x{progress.region:08x}  " f"{progress.bytes_per_second / 1024:.0f} KiB/s"
+        )
+        if progress.eta_seconds is not None and not progress.done:
+            text += f"  ETA {progress.eta_seconds:.0f} s"
+        self.progress_label.setText(text)
+
     def handle_flash_completion(self, success):
         self.cleanup_flashing_thread()
         self.parent.close_log_file()
+        # The board cycle is over, the next board may sit behind the same port
+        chip_info_cache.invalidate(self.parent._chip_port)
 
         if success:
             self.parent.test_module.increment_flash_count()
@@ -82,6 +163,7 @@ class ActionsSection(QGroupBox):
         )
         test_log_path = get_testing_log_path(device_dir)
         self.parent.set_log_file(test_log_path)
+        self.board_log_paths.append(test_log_path)
 
         # Create a new TestThread with the latest model
         self.test_thread = TestThread(self.parent.test_module)
@@ -91,12 +173,15 @@ class ActionsSection(QGroupBox):
         self.test_thread.test_stopped_signal.connect(self.handle_test_end)
         self.test_thread.start_test()
         self.view_logs()
+        return self.test_thread
 
     def manual_test_device(self):
         self.start_test_thread()
 
     def cleanup_flashing_thread(self):
         """Cleans up the flashing thread after completion."""
+        if self.flashing_thread and self.progress_bar.value() < 100:
+            self.progress_label.setText("Flashing stopped")
         self.flashing_thread = None
 
     def view_logs(self):
@@ -4,9 +4,17 @@ from PyQt5.QtCore import pyqtSignal, QThread
 from esp_flasher.threads.chip_info_thread import ChipInfoThread
 from esp_flasher.threads.register_thread import RegisterThread
 from esp_flasher.threads.printing_thread import PrintingThread
+from esp_flasher.backend.printers.label_layout import LabelData
+from esp_flasher.helpers.utils import firmware_version_from_path
 
 
 class ChipInfoSection(QGroupBox):
+    # Step results, so the station pipeline can chain the steps
+    mac_address_changed = pyqtSignal(str)
+    device_info_failed = pyqtSignal(str)
+    device_name_changed = pyqtSignal(str)
+    registration_failed = pyqtSignal(str)
+
     def __init__(self, parent):
         super().__init__("Chip Info")
         self.parent = parent
@@ -31,34 +39,55 @@ class ChipInfoSection(QGroupBox):
         self.setLayout(layout)
 
     def get_device_info(self):
-        if self.parent._chip_port:
-            self.parent.console.clear()
-            self.chip_info_thread = ChipInfoThread(self.parent._chip_port)
-            self.chip_info_thread.mac_address_signal.connect(self.update_mac_address)
-            self.chip_info_thread.start()
-        else:
+        """Reads the MAC address, returns False if there is no port."""
+        if not self.parent._chip_port:
             logging.error("Device port is missing!")
+            return False
+
+        self.parent.console.clear()
+        self.chip_info_thread = ChipInfoThread(self.parent._chip_port)
+        self.chip_info_thread.mac_address_signal.connect(self.update_mac_address)
+        self.chip_info_thread.error_signal.connect(self.device_info_failed.emit)
+        self.chip_info_thread.start()
+        return True
 
     def update_mac_address(self, mac):
         self.parent._mac_address = mac
+        self.mac_address_changed.emit(mac)
 
-    def register(self):
-        self.parent.console.clear()
-
-        """Starts device registration."""
+    def has_api_credentials(self):
         if (
             not self.parent._api_endpoint
             or not self.parent._api_key
             or not self.parent._api_secret
         ):
             logging.error("API endpoint and/or credentials are missing!")
-            return
+            return False
+        return True
+
+    def register(self):
+        """Starts device registration."""
+        self.parent.console.clear()
+        self.start_registration()
+
+    def start_registration(self):
+        """Registers the MAC address, returns False if it can't start."""
+        if not self.has_api_credentials():
+            return False
 
         if not self.parent._mac_address:
             logging.error("No MAC address found! Click 'Get Device Info' first.")
-            return
+            return False
+
+        # Leased names are bound locally, the backend is confirmed in batches
+        lease_pool = self.parent.name_lease_pool
+        if lease_pool:
+            device_name = lease_pool.bind(self.parent._mac_address)
+            if device_name:
+                self.update_device_name(device_name)
+                return True
+            logging.warning("No leased device names left, registering directly.")
 
-        self.parent.console.clear()
         self.register_thread = RegisterThread(
             self.parent._api_endpoint,
             self.parent._api_key,
@@ -66,12 +95,23 @@ class ChipInfoSection(QGroupBox):
             self.parent._mac_address,
         )
         self.register_thread.device_name_signal.connect(self.update_device_name)
+        self.register_thread.error_signal.connect(self.registration_failed.emit)
         self.register_thread.start()
+        return True
 
     def update_device_name(self, device_name):
         """Updates the stored device name and UI."""
         self.parent._device_name = device_name
         logging.info(f"Device Registered: {device_name}")
+        self.device_name_changed.emit(device_name)
+
+    def device_label(self):
+        """Returns the label of the current device."""
+        return LabelData(
+            self.parent._device_name,
+            mac_address=self.parent._mac_address or "",
+            firmware_version=firmware_version_from_path(self.parent._firmware),
+        )
 
     def print_device(self):
         self.parent.console.clear()
@@ -85,19 +125,14 @@ class ChipInfoSection(QGroupBox):
             logging.error("Device name not obtained, first Register the device.")
             return
 
-        label_width = self.parent.printer_config.width_spinbox.value()
-        text_rotation = self.parent.printer_config.rotation_spinbox.value()
-        x_offset = self.parent.printer_config.x_offset_spinbox.value()
-        y_offset = self.parent.printer_config.y_offset_spinbox.value()
-        font_size = self.parent.printer_config.font_size_spinbox.value()
+        layout = self.parent.printer_config.current_layout()
+        if layout is None:
+            return
 
+        label = self.device_label()
         self.print_thread = PrintingThread(
             self.parent._printer_port,
-            self.parent._device_name,
-            label_width,
-            x_offset,
-            y_offset,
-            text_rotation,
-            font_size,
+            label,
+            layout,
         )
         self.print_thread.start()
@@ -9,6 +9,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QIcon, QColor, QPalette
 from PyQt5.QtWidgets import QMessageBox
+from PyQt5.QtCore import pyqtSignal
 
 from esp_flasher.gui.printer_config import PrinterConfig
 from esp_flasher.gui.port_config import PortConfig
@@ -16,12 +17,15 @@ from esp_flasher.gui.backend_config import BackendConfig
 from esp_flasher.gui.chip_info import ChipInfoSection
 from esp_flasher.gui.firmware_section import FirmwareSection
 from esp_flasher.gui.actions_section import ActionsSection
-from esp_flasher.helpers.utils import load_config
+from esp_flasher.gui.station_pipeline import StationPipeline
+from esp_flasher.core.config_loader import get_config_service
 from esp_flasher.core.const import __version__
 import logging
 from esp_flasher.helpers.log_handler import FlashLogHandler, StdoutRedirector
+from esp_flasher.helpers.output_router import install_output_router
 from esp_flasher.model.test_module import TestModule
 from esp_flasher.helpers.resource_helper import resource_path
+from esp_flasher.backend.print_spooler import get_print_spooler
 
 
 def show_popup(title, message, icon, parent=None):
@@ -35,6 +39,9 @@ def show_popup(title, message, icon, parent=None):
 
 
 class MainWindow(QMainWindow):
+    # Emitted from the config watcher thread when config.json changed
+    config_changed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         import sys
@@ -55,6 +62,8 @@ class MainWindow(QMainWindow):
         self._api_secret = ""
         self._mac_address = None
         self._device_name = ""
+        self.name_lease_pool = None  # Set after config if leasing is enabled
+        self.print_spooler = None  # Set after config
         self._successful_flash_count = 0  # Add this line
         self._testing_enabled = False  # Add this line
         self._test_board_xth_occurrence = 0  # Add this line
@@ -63,6 +72,7 @@ class MainWindow(QMainWindow):
         self._test_timeout_seconds = 30  # Default timeout
         # Load config and instantiate model after config is loaded
         self.test_module = None  # Will be set after config
+        self._applied_config = None  # Config the widgets were last set from
 
         self.init_ui()
 
@@ -70,70 +80,107 @@ class MainWindow(QMainWindow):
         logging.basicConfig(level=logging.INFO, handlers=[self.log_handler])
         logging.getLogger().addHandler(self.log_handler)
         self.log_handler.text_edit = self.console  # Attach after QTextEdit is created
-        sys.stdout = StdoutRedirector(logging.getLogger(), logging.INFO)
-        sys.stderr = StdoutRedirector(logging.getLogger(), logging.ERROR)
+        # Output of running operations is routed per job, the rest is logged
+        install_output_router(
+            stdout=StdoutRedirector(logging.getLogger(), logging.INFO),
+            stderr=StdoutRedirector(logging.getLogger(), logging.ERROR),
+        )
 
+        # Validates the config, raising before the window shows if it's bad
         self.apply_config_to_gui()  # Load configuration into GUI
         self.apply_dark_theme()
 
-    def apply_config_to_gui(self):
-        """Applies loaded config values to GUI elements."""
-        config = load_config()
+        self.config_changed.connect(self.apply_config_to_gui)
+        self._config_service.add_listener(self.config_changed.emit)
+        self._config_service.start_watching()
+
+    def apply_config_to_gui(self, config=None):
+        """Applies loaded config values to GUI elements.
+
+        On a reload only the values that changed in the file are applied, so
+        the operator's choices in the widgets are kept otherwise.
+        """
+        self._config_service = get_config_service()
+        if config is None:
+            config = self._config_service.get()
+        previous = self._applied_config
+        self._applied_config = config
+
+        def changed(section, name):
+            if previous is None:
+                return True
+            if section is None:
+                return getattr(previous, name) != getattr(config, name)
+            return getattr(getattr(previous, section), name) != getattr(
+                getattr(config, section), name
+            )
 
         # Apply printer settings
-        printer_settings = config.get("printer_settings", {})
-        self.printer_config.printer_combobox.setCurrentText(
-            printer_settings.get("default_printer", "")
-        )
-        self.printer_config.width_spinbox.setValue(
-            printer_settings.get("label_width", 62)
-        )
-        self.printer_config.font_size_spinbox.setValue(
-            printer_settings.get("font_size", 20)
-        )
-        self.printer_config.rotation_spinbox.setValue(
-            printer_settings.get("text_rotation", 270)
-        )
-        self.printer_config.x_offset_spinbox.setValue(
-            printer_settings.get("x_offset", 100)
-        )
-        self.printer_config.y_offset_spinbox.setValue(
-            printer_settings.get("y_offset", 100)
-        )
+        printer_settings = config.printer_settings
+        printer_config = self.printer_config
+        printer_config.printer_settings = printer_settings
+        if changed("printer_settings", "default_printer"):
+            printer_config.printer_combobox.setCurrentText(
+                printer_settings.default_printer
+            )
+        if changed("printer_settings", "label_width"):
+            printer_config.width_spinbox.setValue(printer_settings.label_width)
+        if changed("printer_settings", "font_size"):
+            printer_config.font_size_spinbox.setValue(printer_settings.font_size)
+        if changed("printer_settings", "text_rotation"):
+            printer_config.rotation_spinbox.setValue(printer_settings.text_rotation)
+        if changed("printer_settings", "x_offset"):
+            printer_config.x_offset_spinbox.setValue(printer_settings.x_offset)
+        if changed("printer_settings", "y_offset"):
+            printer_config.y_offset_spinbox.setValue(printer_settings.y_offset)
+        if changed("printer_settings", "label_code"):
+            printer_config.set_label_code(printer_settings.label_code)
+        # Start the spooler early so labels left over from last run print
+        self.print_spooler = get_print_spooler(printer_settings)
 
         # Apply chip port and firmware path
-        self.port_config.chip_port_combobox.setCurrentText(config.get("chip_port", ""))
-        self._firmware = config.get("firmware_path", "")
-        self.firmware_section.firmware_button.setText(self._firmware)
+        if changed(None, "chip_port"):
+            self.port_config.chip_port_combobox.setCurrentText(config.chip_port)
+        if changed(None, "firmware_path"):
+            self._firmware = config.firmware_path
+            self.firmware_section.firmware_button.setText(self._firmware)
 
         # Apply API settings
-        api_settings = config.get("api_settings", {})
-        self.backend_config.line_edits["_api_endpoint"].setText(
-            api_settings.get("api_endpoint", "")
-        )
-        self.backend_config.line_edits["_api_key"].setText(
-            api_settings.get("api_key", "")
-        )
-        self.backend_config.line_edits["_api_secret"].setText(
-            api_settings.get("api_secret", "")
-        )
+        api_settings = config.api_settings
+        for name in ("api_endpoint", "api_key", "api_secret"):
+            if changed("api_settings", name):
+                self.backend_config.line_edits[f"_{name}"].setText(
+                    getattr(api_settings, name)
+                )
+        # Name leasing pulls in requests, load it only when it is configured.
+        # A running pool keeps its endpoints across config reloads.
+        if api_settings.lease_endpoint and self.name_lease_pool is None:
+            from esp_flasher.backend.name_lease_pool import create_lease_pool
+
+            self.name_lease_pool = create_lease_pool(
+                api_settings, self._api_key, self._api_secret
+            )
 
         # Apply testing settings
-        testing_settings = config.get("testing_settings", {})
-        self._testing_enabled = testing_settings.get("enabled", False)
-        self._test_board_xth_occurrence = testing_settings.get(
-            "test_board_xth_occurrence", 0
-        )
-        self._test_success_regex = testing_settings.get("test_success_regex", "")
-        self._test_timeout_seconds = testing_settings.get("test_timeout_seconds", 200)
-
-        # Instantiate the model with latest config
-        self.test_module = TestModule(
-            self._test_success_regex,
-            self._test_timeout_seconds,
-            self._testing_enabled,
-            self._test_board_xth_occurrence,
-        )
+        testing_settings = config.testing_settings
+        self._testing_enabled = testing_settings.enabled
+        self._test_board_xth_occurrence = testing_settings.test_board_xth_occurrence
+        self._test_success_regex = testing_settings.test_success_regex
+        self._test_timeout_seconds = testing_settings.test_timeout_seconds
+
+        if self.test_module is None:
+            self.test_module = TestModule(
+                self._test_success_regex,
+                self._test_timeout_seconds,
+                self._testing_enabled,
+                self._test_board_xth_occurrence,
+            )
+        else:
+            # Keeps the flash count, test sampling continues across reloads
+            self.test_module.regex = self._test_success_regex
+            self.test_module.timeout_seconds = self._test_timeout_seconds
+            self.test_module.test_enabled = self._testing_enabled
+            self.test_module.test_board_xth_occurrence = self._test_board_xth_occurrence
 
     def init_ui(self):
         self.setWindowTitle(f"ESP32-GUI-Flasher with Printer Support {__version__}")
@@ -156,6 +203,7 @@ class MainWindow(QMainWindow):
         self.chip_info_section = ChipInfoSection(self)
         self.firmware_section = FirmwareSection(self)
         self.actions_section = ActionsSection(self)
+        self.station_pipeline = StationPipeline(self)
 
         left_layout.addWidget(self.port_config)
         left_layout.addWidget(self.printer_config)
@@ -227,10 +275,25 @@ class MainWindow(QMainWindow):
         """Displays a success popup with the given message."""
         show_popup("Success", message, QMessageBox.Information)
 
+    def closeEvent(self, event):
+        """Confirms pending device name bindings before the window closes."""
+        self._config_service.remove_listener(self.config_changed.emit)
+        if self.name_lease_pool:
+            self.name_lease_pool.stop()
+        if self.print_spooler:
+            self.print_spooler.stop()
+        self.printer_config.detach_printer_registry()
+        self.port_config.detach_port_watcher()
+        super().closeEvent(event)
+
     def set_log_file(self, file_path):
         if self.log_handler:
             self.log_handler.set_log_file(file_path)
 
+    def move_log_file(self, old_path, new_path):
+        if self.log_handler:
+            self.log_handler.move_log_file(old_path, new_path)
+
     def close_log_file(self):
         if self.log_handler:
             self.log_handler.close()
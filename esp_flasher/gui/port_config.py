@@ -1,3 +1,4 @@
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import (
     QGroupBox,
     QVBoxLayout,
@@ -6,13 +7,22 @@ from PyQt5.QtWidgets import (
     QLabel,
     QComboBox,
 )
-from esp_flasher.helpers.serial_utils import list_serial_ports
+from esp_flasher.helpers.serial_utils import get_port_watcher
+
+NO_PORTS = "No serial ports found"
 
 
 class PortConfig(QGroupBox):
+    # Emitted from the port watcher thread, delivered on the GUI thread
+    ports_changed = pyqtSignal()
+
     def __init__(self, parent):
         super().__init__("Chip Port Configuration")
         self.parent = parent
+        self.port_watcher = get_port_watcher()
+        self.ports_changed.connect(self.update_chip_ports)
+        self._port_listener = lambda event, port: self.ports_changed.emit()
+        self.port_watcher.add_listener(self._port_listener)
         self.init_ui()
 
     def init_ui(self):
@@ -36,13 +46,29 @@ class PortConfig(QGroupBox):
         self.setLayout(layout)
 
     def refresh_chip_ports(self):
-        """Refreshes available serial ports for the chip."""
+        """Rescans the serial ports; plugged boards also show up on their own."""
+        self.port_watcher.refresh()
+        self.update_chip_ports()
+
+    def detach_port_watcher(self):
+        """Stops receiving port updates, e.g. when the window closes."""
+        self.port_watcher.remove_listener(self._port_listener)
+
+    def update_chip_ports(self):
+        """Shows the present serial ports, keeping the current selection."""
+        ports = [port.device for port in self.port_watcher.ports()]
+        current = self.chip_port_combobox.currentText()
+        self.chip_port_combobox.blockSignals(True)
         self.chip_port_combobox.clear()
-        ports = list_serial_ports()
         if ports:
             self.chip_port_combobox.addItems(ports)
         else:
-            self.chip_port_combobox.addItem("No serial ports found")
+            self.chip_port_combobox.addItem(NO_PORTS)
+        if current in ports:
+            self.chip_port_combobox.setCurrentText(current)
+        self.chip_port_combobox.blockSignals(False)
+        self.select_port(self.chip_port_combobox.currentIndex())
 
     def select_port(self, index):
-        self.parent._chip_port = self.chip_port_combobox.itemText(index)
+        port = self.chip_port_combobox.itemText(index)
+        self.parent._chip_port = None if port == NO_PORTS else port
@@ -1,4 +1,5 @@
 import logging
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import (
     QGroupBox,
     QVBoxLayout,
@@ -9,14 +10,29 @@ from PyQt5.QtWidgets import (
     QSpinBox,
     QLineEdit,
 )
-from esp_flasher.helpers.printer_utils import list_available_printers
+from esp_flasher.helpers.printer_utils import get_printer_registry
 from esp_flasher.threads.printing_thread import PrintingThread
+from esp_flasher.backend.printers.label_layout import (
+    LabelLayout,
+    CODE_QR,
+    CODE_DATAMATRIX,
+)
+
+LABEL_CODES = {"None": None, "QR Code": CODE_QR, "DataMatrix": CODE_DATAMATRIX}
 
 
 class PrinterConfig(QGroupBox):
+    # Emitted from the registry thread, delivered on the GUI thread
+    printers_changed = pyqtSignal(list)
+
     def __init__(self, parent):
         super().__init__("Printer Setup")
         self.parent = parent
+        self.printer_settings = {}  # printer_settings section of the config
+        self.printer_registry = get_printer_registry()
+        self.printers_changed.connect(self.update_printer_list)
+        self._printer_listener = self.printers_changed.emit
+        self.printer_registry.add_listener(self._printer_listener)
         self.init_ui()
 
     def init_ui(self):
@@ -26,7 +42,11 @@ class PrinterConfig(QGroupBox):
         printer_layout = QHBoxLayout()
         printer_label = QLabel("Select Printer:")
         self.printer_combobox = QComboBox()
+        # Editable so printers that are not discovered, e.g. virtual:<dir>,
+        # can be entered by name
+        self.printer_combobox.setEditable(True)
         self.printer_combobox.currentIndexChanged.connect(self.select_port)
+        self.printer_combobox.editTextChanged.connect(self.set_printer_name)
         self.refresh_printer_list()
 
         refresh_button = QPushButton("Refresh")
@@ -84,6 +104,15 @@ class PrinterConfig(QGroupBox):
         offset_layout.addWidget(y_offset_label)
         offset_layout.addWidget(self.y_offset_spinbox)
 
+        # 2D code next to the text (MAC, device name and firmware version)
+        code_layout = QHBoxLayout()
+        code_label = QLabel("Label Code:")
+        self.code_combobox = QComboBox()
+        self.code_combobox.addItems(LABEL_CODES.keys())
+
+        code_layout.addWidget(code_label)
+        code_layout.addWidget(self.code_combobox)
+
         # Test Print Button
         test_print_layout = QHBoxLayout()
         custom_print_label = QLabel("Print Text:")
@@ -102,21 +131,41 @@ class PrinterConfig(QGroupBox):
         layout.addLayout(font_size_layout)
         layout.addLayout(rotation_layout)
         layout.addLayout(offset_layout)
+        layout.addLayout(code_layout)
         layout.addLayout(test_print_layout)
         self.setLayout(layout)
 
     def refresh_printer_list(self):
-        """Refreshes available printers"""
+        """Shows the cached printers and asks the registry to rediscover them.
+
+        The discovery runs in the background; the list updates when it ends.
+        """
+        self.update_printer_list(self.printer_registry.refresh())
+
+    def detach_printer_registry(self):
+        """Stops receiving printer list updates, e.g. when the window closes."""
+        self.printer_registry.remove_listener(self._printer_listener)
+
+    def update_printer_list(self, printers):
+        """Replaces the printer list, keeping the current selection."""
+        current = self.printer_combobox.currentText()
+        self.printer_combobox.blockSignals(True)
         self.printer_combobox.clear()
-        printers = list_available_printers()
         if printers:
             self.printer_combobox.addItems(printers)
         else:
             self.printer_combobox.addItem("No printers found")
+        if current and current != "No printers found":
+            self.printer_combobox.setCurrentText(current)
+        self.printer_combobox.blockSignals(False)
+        self.parent._printer_port = self.printer_combobox.currentText()
 
     def select_port(self, index):
         self.parent._printer_port = self.printer_combobox.itemText(index)
 
+    def set_printer_name(self, printer_name):
+        self.parent._printer_port = printer_name
+
     def test_print(self):
         """Sends a test print job to the selected printer."""
         printer_name = self.printer_combobox.currentText()
@@ -124,21 +173,35 @@ class PrinterConfig(QGroupBox):
             logging.error("No printer selected!")
             return
 
-        label_width = self.width_spinbox.value()
-        font_size = self.font_size_spinbox.value()
-        text_rotation = self.rotation_spinbox.value()
-        x_offset = self.x_offset_spinbox.value()
-        y_offset = self.y_offset_spinbox.value()
-
         self.parent.console.clear()
 
+        layout = self.current_layout()
+        if layout is None:
+            return
+
         self.print_thread = PrintingThread(
-            printer_name,
-            self.custom_print_input.text(),
-            label_width,
-            x_offset,
-            y_offset,
-            text_rotation,
-            font_size,
+            printer_name, self.custom_print_input.text(), layout
         )
         self.print_thread.start()
+
+    def set_label_code(self, code):
+        """Selects the 2D code by its config name ("qr", "datamatrix" or none)."""
+        for name, value in LABEL_CODES.items():
+            if value == (code or None):
+                self.code_combobox.setCurrentText(name)
+
+    def current_layout(self):
+        """Returns the label layout for the current settings, None if invalid."""
+        try:
+            return LabelLayout.from_settings(
+                self.printer_settings,
+                label_width=self.width_spinbox.value(),
+                font_size=self.font_size_spinbox.value(),
+                text_rotation=self.rotation_spinbox.value(),
+                x_offset=self.x_offset_spinbox.value(),
+                y_offset=self.y_offset_spinbox.value(),
+                code=LABEL_CODES[self.code_combobox.currentText()],
+            )
+        except ValueError as err:
+            logging.error(f"Invalid label layout: {err}")
+            return None
@@ -0,0 +1,157 @@
+import logging
+from PyQt5.QtCore import QObject
+
+from esp_flasher.backend.print_spooler import get_print_spooler
+from esp_flasher.core.chip_info_cache import chip_info_cache
+
+
+class StationPipeline(QObject):
+    """Runs steps (1) to (4) for one board with the slow steps overlapped.
+
+    Reads the MAC address, then registers the device and flashes it at the
+    same time. The label is queued on the spooler as soon as the device name
+    is known but held until flashing, and the test when one is due, passed.
+    A board that fails gets its label cancelled, so only good boards are
+    labelled. The cycle takes about as long as flashing plus testing instead
+    of all four steps in a row.
+    """
+
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+        self._running = False
+        self._layout = None
+        self._label_job = None
+        self._board_ok = False
+        self._registration_error = None
+
+        chip_info = parent.chip_info_section
+        chip_info.mac_address_changed.connect(self._on_mac_address)
+        chip_info.device_info_failed.connect(self._on_device_info_failed)
+        chip_info.device_name_changed.connect(self._on_device_name)
+        chip_info.registration_failed.connect(self._on_registration_failed)
+
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        """Starts a board cycle, returns False if the station isn't set up."""
+        if self._running:
+            logging.warning("Station cycle already in progress.")
+            return False
+
+        # Check everything up front, so a bad setup doesn't touch the board
+        chip_info = self.parent.chip_info_section
+        if not self.parent.actions_section.can_flash():
+            return False
+        if not chip_info.has_api_credentials():
+            return False
+        if not self.parent._printer_port:
+            logging.error("No printer port selected!")
+            return False
+        self._layout = self.parent.printer_config.current_layout()
+        if self._layout is None:
+            return False
+
+        self._running = True
+        self._label_job = None
+        self._board_ok = False
+        self._registration_error = None
+        # Don't label this board with the previous board's name
+        self.parent._mac_address = None
+        self.parent._device_name = ""
+
+        if not chip_info.get_device_info():
+            self._running = False
+            return False
+        logging.info("Station cycle started, reading device info...")
+        return True
+
+    def _on_mac_address(self, mac):
+        if not self._running:
+            return
+        logging.info(f"Device {mac}: registering and flashing...")
+        self.parent.actions_section.start_flashing(self._on_flash_finished)
+        if not self.parent.chip_info_section.start_registration():
+            self._registration_error = "Registration could not start."
+
+    def _on_device_info_failed(self, error):
+        if self._running:
+            self._fail(f"Could not read device info: {error}")
+
+    def _on_device_name(self, device_name):
+        if not self._running:
+            return
+        # Flashing started under the MAC address, its log follows the name
+        self.parent.actions_section.move_board_logs(device_name)
+        label = self.parent.chip_info_section.device_label()
+        self._label_job = get_print_spooler().submit(
+            self.parent._printer_port, label, self._layout, hold=True
+        )
+        logging.info(f"Label for {device_name} queued, printed once the board passes.")
+        self._finish_if_done()
+
+    def _on_registration_failed(self, error):
+        if not self._running:
+            return
+        self._registration_error = error
+        self._finish_if_done()
+
+    def _on_flash_finished(self, success):
+        actions = self.parent.actions_section
+        actions.cleanup_flashing_thread()
+        self.parent.close_log_file()
+        # The board cycle is over, the next board may sit behind the same port
+        chip_info_cache.invalidate(self.parent._chip_port)
+        if not self._running:
+            return
+
+        if not success:
+            self._fail("Flashing failed, label not printed.")
+            return
+
+        test_module = self.parent.test_module
+        test_module.increment_flash_count()
+        if test_module.should_run_test():
+            test_thread = actions.start_test_thread()
+            test_thread.test_stopped_signal.connect(
+                lambda: self._on_test_stopped(test_thread.passed)
+            )
+            return
+
+        self._board_ok = True
+        self._finish_if_done()
+
+    def _on_test_stopped(self, passed):
+        if not self._running:
+            return
+        if not passed:
+            self._fail("Device test failed, label not printed.")
+            return
+        self._board_ok = True
+        self._finish_if_done()
+
+    def _finish_if_done(self):
+        """Prints the label once the board passed and its name is known."""
+        if not self._board_ok:
+            return
+        if self._registration_error:
+            self._fail(
+                f"Board flashed but not registered ({self._registration_error}), "
+                "label not printed."
+            )
+            return
+        if self._label_job is None:
+            return  # Still registering
+
+        get_print_spooler().release(self._label_job)
+        self._running = False
+        logging.info(f"Station cycle for {self.parent._device_name} done.")
+
+    def _fail(self, message):
+        if self._label_job is not None:
+            get_print_spooler().cancel(self._label_job)
+            self._label_job = None
+        self._running = False
+        logging.error(message)
+        self.parent.show_error_popup(message)
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.parse
+
+from esp_flasher.helpers.utils import Esp_flasherError, get_config_dir
+
+CACHE_DIR_NAME = "firmware_cache"  # In the config directory
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# Seconds to connect, and seconds the server may go quiet while sending
+DOWNLOAD_TIMEOUT = (10, 60)
+# Each attempt after the first continues the partial download
+DOWNLOAD_ATTEMPTS = 3
+
+SHA256_FRAGMENT = re.compile(r"(?:^|&)sha256=([0-9a-fA-F]{64})(?:&|$)")
+CONTENT_RANGE = re.compile(r"bytes (\d+)-\d+/(\d+|\*)")
+
+
+def is_firmware_url(path):
+    """Tells whether a firmware path is an http(s) URL rather than a file."""
+    return isinstance(path, str) and urllib.parse.urlsplit(path).scheme in (
+        "http",
+        "https",
+    )
+
+
+def split_sha256(url):
+    """Splits a pip style `#sha256=<hex>` fragment off a URL.
+
+    Returns (url, sha256), sha256 is None if the URL doesn't carry one.
+    """
+    base, _, fragment = url.partition("#")
+    match = SHA256_FRAGMENT.search(fragment)
+    return base, match.group(1).lower() if match else None
+
+
+def file_sha256(path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+def get_firmware_cache_dir():
+    """Cache shared by every run, wherever the tool is started from."""
+    return os.path.join(get_config_dir(), CACHE_DIR_NAME)
+
+
+class CacheEntry:
+    """Files of one URL in the cache: the package, its partial download and
+    the validators (ETag, Last-Modified) the server sent for them."""
+
+    def __init__(self, cache_dir, url):
+        key = hashlib.sha256(url.encode()).hexdigest()[:16]
+        name = os.path.basename(urllib.parse.urlsplit(url).path) or "firmware.zip"
+        self.dir = os.path.join(cache_dir, key)
+        self.path = os.path.join(self.dir, name)
+        self.part = self.path + ".part"
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.part_meta_path = os.path.join(self.dir, "part.json")
+
+    def load_meta(self, partial=False):
+        try:
+            with open(self._meta_path(partial), "r") as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, meta, partial=False):
+        os.makedirs(self.dir, exist_ok=True)
+        temp_path = self._meta_path(partial) + ".tmp"
+        with open(temp_path, "w") as meta_file:
+            json.dump(meta, meta_file, indent=2)
+        os.replace(temp_path, self._meta_path(partial))
+
+    def complete(self, meta):
+        """Moves the finished partial download in place of the package."""
+        os.replace(self.part, self.path)
+        self.save_meta(meta)
+        self.discard(partial=True)
+
+    def discard(self, partial=False):
+        if partial:
+            paths = (self.part, self.part_meta_path)
+        else:
+            paths = (self.path, self.meta_path)
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _meta_path(self, partial):
+        return self.part_meta_path if partial else self.meta_path
+
+
+class FirmwareDownloader:
+    """Downloads firmware packages into an on-disk cache.
+
+    Packages are streamed to disk in chunks, never held in memory. A cached
+    package is revalidated with the server's ETag/Last-Modified, so an
+    unchanged release is not downloaded again, and still used if the server
+    can't be reached. Interrupted downloads continue where they stopped with
+    a Range request, as long as the file on the server didn't change.
+
+    The SHA-256 of every package is checked: against the expected one if it
+    is given (or in the URL as `#sha256=<hex>`), and against the one recorded
+    at download time before a cached package is used.
+
+    Downloads of the same URL are serialized within a process; processes
+    sharing a cache directory must not download the same URL at once.
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        session=None,
+        chunk_size=DOWNLOAD_CHUNK_SIZE,
+        timeout=DOWNLOAD_TIMEOUT,
+        attempts=DOWNLOAD_ATTEMPTS,
+    ):
+        self.cache_dir = cache_dir or get_firmware_cache_dir()
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.attempts = attempts
+        self._session = session
+        self._lock = threading.Lock()
+        self._url_locks = {}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+
+                self._session = requests.Session()
+            return self._session
+
+    def fetch(self, url, sha256=None):
+        """Returns the path of the downloaded package.
+
+        Raises:
+            Esp_flasherError: If the package can't be downloaded and isn't
+                cached, or doesn't match the expected SHA-256.
+        """
+        import requests
+
+        url, url_sha256 = split_sha256(url)
+        sha256 = (sha256 or url_sha256 or "").lower() or None
+        entry = CacheEntry(self.cache_dir, url)
+        with self._url_lock(url):
+            cached = self._cached_meta(entry, sha256)
+            for attempt in range(self.attempts):
+                try:
+                    return self._download(url, sha256, entry, cached)
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                ) as err:
+                    error = err
+                    if attempt + 1 < self.attempts:
+                        print(f"Download of {url} interrupted ({err}), retrying...")
+                except requests.exceptions.RequestException as err:
+                    raise Esp_flasherError(
+                        f"Error while retrieving firmware file '{url}': {err}"
+                    ) from err
+
+            if cached:
+                print(f"Can't reach {url} ({error}), using the cached package.")
+                return entry.path
+            raise Esp_flasherError(
+                f"Error while retrieving firmware file '{url}': {error}"
+            ) from error
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _cached_meta(self, entry, sha256):
+        """Meta data of the cached package, None if there is no usable one."""
+        meta = entry.load_meta()
+        if not meta.get("sha256") or not os.path.exists(entry.path):
+            return None
+        if sha256 and meta.get("sha256") != sha256:
+            # Another release is expected behind the same URL
+            return None
+        if file_sha256(entry.path).hexdigest() != meta.get("sha256"):
+            print(f"Cached {entry.path} is corrupted, downloading it again.")
+            entry.discard()
+            return None
+        return meta
+
+    def _download(self, url, sha256, entry, cached):
+        import requests
+
+        headers = {}
+        partial = 0
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        elif os.path.exists(entry.part):
+            meta = entry.load_meta(partial=True)
+            validator = meta.get("etag") or meta.get("last_modified")
+            partial = os.path.getsize(entry.part) if validator else 0
+            if partial:
+                headers["Range"] = f"bytes={partial}-"
+                # The whole file comes back if it changed since the partial one
+                headers["If-Range"] = validator
+
+        with self.session.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if cached and response.status_code == 304:
+                print(f"Cached {os.path.basename(entry.path)} is up to date.")
+                return entry.path
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != partial:
+                    entry.discard(partial=True)
+                    raise Esp_flasherError(
+                        f"Server resumed '{url}' at the wrong offset, "
+                        "the download starts over the next time."
+                    )
+            else:
+                partial = 0
+
+            length = response.headers.get("Content-Length")
+            total = partial + int(length) if length is not None else None
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": total,
+            }
+            entry.save_meta(meta, partial=True)
+
+            if partial:
+                print(f"Resuming download of {url} at {partial} bytes...")
+                digest = file_sha256(entry.part, self.chunk_size)
+            else:
+                print(f"Downloading {url}...")
+                digest = hashlib.sha256()
+            with open(entry.part, "ab" if partial else "wb") as part_file:
+                for chunk in response.iter_content(self.chunk_size):
+                    part_file.write(chunk)
+                    digest.update(chunk)
+
+        size = os.path.getsize(entry.part)
+        if total is not None and size != total:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Connection closed after {size} of {total} bytes"
+            )
+        actual = digest.hexdigest()
+        if sha256 and actual != sha256:
+            entry.discard(partial=True)
+            raise Esp_flasherError(
+                f"SHA-256 of firmware file '{url}' is {actual}, expected {sha256}"
+            )
+
+        meta.update(size=size, sha256=actual)
+        entry.complete(meta)
+        print(f"Downloaded {size} bytes, SHA-256 {actual}.")
+        return entry.path
+
+
+_downloader = None
+_downloader_lock = threading.Lock()
+
+
+def get_firmware_downloader():
+    """Returns the application wide downloader, with the default cache."""
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = FirmwareDownloader()
+        return _downloader
+
+
+def fetch_firmware(path, sha256=None):
+    """Returns a local path for a firmware file or http(s) URL."""
+    if not is_firmware_url(path):
+        return path
+    return get_firmware_downloader().fetch(path, sha256)
@@ -1,4 +1,5 @@
 import logging
+import os
 import re
 from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtGui import QColor
@@ -57,6 +58,20 @@ class FlashLogHandler(logging.Handler, QObject):
         self.log_file_path = file_path
         self.log_file = open(file_path, "a", encoding="utf-8")
 
+    def move_log_file(self, old_path, new_path):
+        """Moves a log file, the open one keeps being written at its new path."""
+        self.acquire()
+        try:
+            is_open = self.log_file is not None and self.log_file_path == old_path
+            if is_open:
+                self.log_file.close()
+            os.replace(old_path, new_path)
+            if is_open:
+                self.log_file_path = new_path
+                self.log_file = open(new_path, "a", encoding="utf-8")
+        finally:
+            self.release()
+
     def close(self):
         if self.log_file:
             self.log_file.close()
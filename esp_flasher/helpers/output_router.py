@@ -0,0 +1,159 @@
+import contextlib
+import contextvars
+import io
+import sys
+import threading
+from collections import deque
+
+# Where stdout and stderr output of the current job go; None uses the fallback
+_stdout = contextvars.ContextVar("esp_flasher_stdout", default=None)
+_stderr = contextvars.ContextVar("esp_flasher_stderr", default=None)
+_install_lock = threading.Lock()
+
+
+class OutputRouter(io.TextIOBase):
+    """Stands in for sys.stdout/sys.stderr and writes to the current job's sink.
+
+    The sink is looked up in a context variable, one per stream, so
+    concurrent jobs (threads or asyncio tasks) each get their own output
+    while the process wide streams are only replaced once. Output outside
+    any job goes to the fallback stream.
+    """
+
+    def __init__(self, fallback, route=_stdout):
+        super().__init__()
+        self.fallback = fallback
+        self.route = route
+
+    def _target(self):
+        sink = self.route.get()
+        return self.fallback if sink is None else sink
+
+    def write(self, text):
+        self._target().write(text)
+        return len(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        # Jobs are captured, so esptool shouldn't draw in-place progress
+        if self.route.get() is not None:
+            return False
+        isatty = getattr(self.fallback, "isatty", None)
+        return bool(isatty and isatty())
+
+    def writable(self):
+        return True
+
+
+class JobOutput(io.TextIOBase):
+    """Output of one job, split into lines.
+
+    Keeps the last `max_lines` lines and passes every complete line to
+    `sink(line)`, e.g. a logger or a slot's log file.
+    """
+
+    def __init__(self, sink=None, max_lines=200):
+        super().__init__()
+        self.sink = sink
+        self.lines = deque(maxlen=max_lines)
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            lines = (self._partial + text.replace("\r", "\n")).split("\n")
+            *complete, self._partial = lines
+            complete = [line.rstrip() for line in complete if line.strip()]
+            self.lines.extend(complete)
+        if self.sink:
+            for line in complete:
+                self.sink(line)
+        return len(text)
+
+    def flush(self):
+        pass  # Lines are passed on once they are complete
+
+    def finish(self):
+        """Passes on a last line that didn't end with a newline."""
+        with self._lock:
+            line, self._partial = self._partial.rstrip(), ""
+            if line:
+                self.lines.append(line)
+        if line and self.sink:
+            self.sink(line)
+
+    def tail(self, count=20):
+        with self._lock:
+            return list(self.lines)[-count:]
+
+    def getvalue(self):
+        with self._lock:
+            return "\n".join(self.lines)
+
+    def isatty(self):
+        return False
+
+    def writable(self):
+        return True
+
+
+def install_output_router(stdout=None, stderr=None):
+    """Routes sys.stdout and sys.stderr through OutputRouters.
+
+    The streams are replaced once per process, with the current ones as
+    fallbacks; `stdout` and `stderr` replace those fallbacks when given.
+    """
+    with _install_lock:
+        if not isinstance(sys.stdout, OutputRouter):
+            sys.stdout = OutputRouter(sys.stdout, _stdout)
+        if not isinstance(sys.stderr, OutputRouter):
+            sys.stderr = OutputRouter(sys.stderr, _stderr)
+        if stdout is not None:
+            sys.stdout.fallback = stdout
+        if stderr is not None:
+            sys.stderr.fallback = stderr
+
+
+def current_output():
+    """The stream print() writes to in the current context."""
+    sink = _stdout.get()
+    if sink is not None:
+        return sink
+    return unrouted(sys.stdout)
+
+
+def unrouted(stream):
+    """The stream behind a router, for writers that must bypass job routing."""
+    if isinstance(stream, OutputRouter):
+        return stream.fallback
+    return stream
+
+
+@contextlib.contextmanager
+def route_output(stream, stderr=True):
+    """Sends print() output of the current context to `stream`.
+
+    What is written to sys.stderr goes there too, unless `stderr` is False.
+    """
+    install_output_router()
+    token = _stdout.set(stream)
+    stderr_token = _stderr.set(stream) if stderr else None
+    try:
+        yield stream
+    finally:
+        if stderr_token is not None:
+            _stderr.reset(stderr_token)
+        _stdout.reset(token)
+
+
+@contextlib.contextmanager
+def capture_output(sink=None, max_lines=200):
+    """Captures the current context's output in a JobOutput, yielding it."""
+    output = JobOutput(sink, max_lines)
+    with route_output(output):
+        try:
+            yield output
+        finally:
+            output.finish()
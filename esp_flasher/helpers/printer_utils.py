@@ -1,12 +1,30 @@
+import glob
+import logging
+import os
 import platform
+import subprocess
+import threading
+import time
+
+CUPS_PRINTERS_CONF = "/etc/cups/printers.conf"
+USB_PRINTER_GLOB = "/dev/usb/lp*"
 
 
 def list_available_printers():
+    """Returns the discovered printers from the registry cache.
+
+    Never blocks on discovery; the list may be empty until the first
+    background refresh completes.
+    """
+    return get_printer_registry().printers()
+
+
+def discover_printers():
     """Detects available printers based on OS and returns a list."""
     system = platform.system()
 
     if system == "Linux":
-        return _list_linux_printers()
+        return _list_linux_printers() + _list_brother_ql_devices()
     elif system == "Windows":
         return _list_windows_printers()
     else:
@@ -14,17 +32,47 @@ def list_available_printers():
 
 
 def _list_linux_printers():
-    """Lists available printers using lpstat (CUPS)."""
+    """Lists CUPS queues, through pycups if installed, else lpstat."""
     try:
-        import subprocess
+        import cups
 
-        result = subprocess.run(["lpstat", "-p"], stdout=subprocess.PIPE, text=True)
-        printers = [
-            line.split()[1] for line in result.stdout.splitlines() if "printer" in line
-        ]
-        return printers
-    except Exception:
+        return sorted(cups.Connection().getPrinters())
+    except ImportError:
+        pass
+    except Exception as err:
+        logging.debug(f"pycups printer listing failed: {err}")
+        return []
+
+    try:
+        result = subprocess.run(
+            ["lpstat", "-p"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=5,
+            env=dict(os.environ, LC_ALL="C"),  # Parse untranslated output
+        )
+    except (OSError, subprocess.SubprocessError):
         return []
+    # Lines look like "printer Brother_QL-600 is idle.  enabled since ..."
+    return [
+        line.split()[1]
+        for line in result.stdout.splitlines()
+        if line.startswith("printer ") and len(line.split()) > 1
+    ]
+
+
+def _list_brother_ql_devices():
+    """Lists Brother QL printers reachable directly through brother_ql."""
+    devices = []
+    for backend in ("pyusb", "linux_kernel"):
+        try:
+            from brother_ql.backends.helpers import discover
+
+            devices += [device["identifier"] for device in discover(backend)]
+        except Exception as err:  # Backend library or permissions missing
+            logging.debug(f"brother_ql {backend} discovery failed: {err}")
+    return devices
 
 
 def _list_windows_printers():
@@ -36,3 +84,128 @@ def _list_windows_printers():
         return printers
     except Exception:
         return []
+
+
+def _discovery_fingerprint():
+    """Cheap snapshot of what printer discovery depends on.
+
+    Changes when a CUPS queue is added or removed, or a USB printer is
+    plugged in or out, without running the discovery itself.
+    """
+    try:
+        cups_mtime = os.stat(CUPS_PRINTERS_CONF).st_mtime_ns
+    except OSError:
+        cups_mtime = None
+    return cups_mtime, tuple(sorted(glob.glob(USB_PRINTER_GLOB)))
+
+
+class PrinterRegistry:
+    """Cache of discovered printers, refreshed in the background.
+
+    Readers always get the cached list immediately. A background thread
+    polls a cheap fingerprint (CUPS config mtime, USB printer nodes) and
+    rediscovers when it changes or the cache is older than `ttl` seconds.
+    Listeners are called from that thread with the new list on changes.
+    """
+
+    def __init__(self, ttl=60.0, poll_interval=2.0):
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._printers = []
+        self._refreshed_at = None
+        self._fingerprint = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._refreshed = threading.Event()
+        self._force = False
+        self._worker = None
+
+    def start(self):
+        """Starts the background refresh thread."""
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run, name="PrinterRegistry", daemon=True
+        )
+        self._worker.start()
+
+    def printers(self):
+        """Returns the cached printer list without blocking."""
+        self.start()
+        with self._lock:
+            return list(self._printers)
+
+    def refresh(self, wait=None):
+        """Requests a rediscovery, optionally waiting up to `wait` seconds."""
+        self.start()
+        self._refreshed.clear()
+        with self._lock:
+            self._force = True
+        self._wakeup.set()
+        if wait:
+            self._refreshed.wait(wait)
+        return self.printers()
+
+    def add_listener(self, callback):
+        """Calls `callback(printers)` whenever the printer list changes."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _is_stale(self, fingerprint):
+        with self._lock:
+            if self._force or self._refreshed_at is None:
+                return True
+            if fingerprint != self._fingerprint:
+                return True
+            return time.monotonic() - self._refreshed_at > self.ttl
+
+    def _run(self):
+        while True:
+            fingerprint = _discovery_fingerprint()
+            if self._is_stale(fingerprint):
+                self._update(fingerprint)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _update(self, fingerprint):
+        try:
+            printers = discover_printers()
+        except Exception as err:
+            logging.error(f"Printer discovery failed: {err}")
+            printers = None
+
+        with self._lock:
+            self._force = False
+            self._refreshed_at = time.monotonic()
+            self._fingerprint = fingerprint
+            changed = printers is not None and printers != self._printers
+            if changed:
+                self._printers = printers
+            listeners = list(self._listeners)
+        self._refreshed.set()
+
+        if changed:
+            for callback in listeners:
+                try:
+                    callback(list(printers))
+                except Exception as err:
+                    logging.error(f"Printer listener failed: {err}")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_printer_registry():
+    """Returns the application wide printer registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PrinterRegistry()
+        return _registry
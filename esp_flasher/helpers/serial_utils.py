@@ -1,11 +1,269 @@
+import logging
+import os
+import sys
+import threading
+
 from esp_flasher.helpers.utils import Esp_flasherError
-import esptool
+
+PORT_ADDED = "added"
+PORT_REMOVED = "removed"
 
 
 def list_serial_ports():
+    import esptool
+
     return esptool.get_port_list()
 
 
+def port_fingerprint(port):
+    """Identifies the USB device behind a serial port.
+
+    The fingerprint changes when the device re-enumerates, e.g. after a replug.
+    Returns None if the port is not currently present.
+    """
+    from serial.tools import list_ports
+
+    for info in list_ports.comports():
+        if info.device != port:
+            continue
+        node = ()
+        try:
+            # The device node is recreated whenever the device re-enumerates
+            stat = os.stat(port)
+            node = (stat.st_ino, stat.st_ctime_ns)
+        except OSError:
+            pass
+        return (info.vid, info.pid, info.serial_number, info.location) + node
+    return None
+
+
+class SerialPortInfo:
+    """A serial port and the USB device behind it, if any."""
+
+    def __init__(
+        self,
+        device,
+        vid=None,
+        pid=None,
+        serial_number=None,
+        location=None,
+        description="",
+    ):
+        self.device = device
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+        self.location = location  # Physical USB path, e.g. "1-1.2:1.0"
+        self.description = description
+
+    @classmethod
+    def from_comport(cls, info):
+        return cls(
+            info.device,
+            info.vid,
+            info.pid,
+            info.serial_number,
+            info.location,
+            info.description or "",
+        )
+
+    def _key(self):
+        return (
+            self.device,
+            self.vid,
+            self.pid,
+            self.serial_number,
+            self.location,
+            self.description,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, SerialPortInfo) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"SerialPortInfo({self.device!r})"
+
+    def to_dict(self):
+        return {
+            "device": self.device,
+            "vid": self.vid,
+            "pid": self.pid,
+            "serial_number": self.serial_number,
+            "location": self.location,
+            "description": self.description,
+        }
+
+
+def scan_serial_ports():
+    """Returns the present serial ports as {device: SerialPortInfo}."""
+    from serial.tools import list_ports
+
+    ports = {}
+    for info in list_ports.comports():
+        # Same exclusions as esptool.get_port_list
+        if sys.platform == "darwin" and info.device.endswith(
+            ("Bluetooth-Incoming-Port", "wlan-debug")
+        ):
+            continue
+        ports[info.device] = SerialPortInfo.from_comport(info)
+    return ports
+
+
+class PortWatcher:
+    """Set of present serial ports, kept current in the background.
+
+    On Linux with pyudev installed the ports are rescanned when udev
+    reports a tty being added or removed, elsewhere they are polled every
+    `poll_interval` seconds. Listeners are called from the watcher thread
+    with (PORT_ADDED or PORT_REMOVED, SerialPortInfo) for every change.
+    """
+
+    def __init__(self, poll_interval=1.0):
+        self.poll_interval = poll_interval
+        self._ports = {}  # device -> SerialPortInfo
+        self._by_serial = {}  # USB serial number -> [SerialPortInfo]
+        self._by_location = {}  # USB location -> SerialPortInfo
+        self._listeners = []
+        self._lock = threading.Lock()
+        # Serializes scans, so listeners see the changes in order
+        self._refresh_lock = threading.RLock()
+        self._stopping = threading.Event()
+        self._worker = None
+
+    def start(self):
+        """Scans the ports once and starts watching them."""
+        with self._refresh_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stopping.clear()
+            self.refresh()
+            self._worker = threading.Thread(
+                target=self._run, name="PortWatcher", daemon=True
+            )
+            self._worker.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._worker:
+            self._worker.join(self.poll_interval + 1)
+            self._worker = None
+
+    def ports(self):
+        """Returns the present ports, sorted by device name."""
+        self.start()
+        with self._lock:
+            return [self._ports[device] for device in sorted(self._ports)]
+
+    def get(self, device):
+        self.start()
+        with self._lock:
+            return self._ports.get(device)
+
+    def find_by_serial(self, serial_number):
+        """Returns the ports of the USB adapter with this serial number."""
+        self.start()
+        with self._lock:
+            return list(self._by_serial.get(serial_number, ()))
+
+    def find_by_location(self, location):
+        """Returns the port plugged into this USB location, or None."""
+        self.start()
+        with self._lock:
+            return self._by_location.get(location)
+
+    def refresh(self):
+        """Rescans the ports now, notifying listeners of changes."""
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            ports = scan_serial_ports()
+        except Exception as err:
+            logging.error(f"Serial port scan failed: {err}")
+            return
+
+        with self._lock:
+            added = [ports[device] for device in ports if device not in self._ports]
+            removed = [
+                self._ports[device] for device in self._ports if device not in ports
+            ]
+            # A device node reused by another adapter counts as replugged
+            for device in ports:
+                if device in self._ports and ports[device] != self._ports[device]:
+                    removed.append(self._ports[device])
+                    added.append(ports[device])
+            self._ports = ports
+            self._by_serial = {}
+            self._by_location = {}
+            for port in ports.values():
+                if port.serial_number:
+                    self._by_serial.setdefault(port.serial_number, []).append(port)
+                if port.location:
+                    self._by_location[port.location] = port
+            listeners = list(self._listeners)
+
+        events = [(PORT_REMOVED, port) for port in removed]
+        events += [(PORT_ADDED, port) for port in added]
+        for event, port in events:
+            for callback in listeners:
+                try:
+                    callback(event, port)
+                except Exception as err:
+                    logging.error(f"Port listener failed: {err}")
+
+    def add_listener(self, callback):
+        """Calls `callback(event, port)` for every added or removed port."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                self._watch_udev()
+                return
+            except ImportError:
+                pass  # pyudev is optional
+            except Exception as err:
+                logging.debug(f"udev monitoring unavailable, polling ports: {err}")
+        while not self._stopping.wait(self.poll_interval):
+            self.refresh()
+
+    def _watch_udev(self):
+        import pyudev
+
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by("tty")
+        monitor.start()
+        # Catch what changed between the first scan and the monitor starting
+        self.refresh()
+        while not self._stopping.is_set():
+            # Time out regularly so stop() is noticed
+            if monitor.poll(timeout=self.poll_interval) is not None:
+                self.refresh()
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_port_watcher():
+    """Returns the application wide port watcher."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = PortWatcher()
+        return _watcher
+
+
 def select_port(args):
     if args.port:
         print(f"Using '{args.port}' as serial port.")
@@ -16,11 +274,11 @@ def select_port(args):
         raise Esp_flasherError("No serial port found!")
 
     if len(ports) == 1:
-        print(f"Auto-detected serial port: {ports[0][0]}")
-        return ports[0][0]
+        print(f"Auto-detected serial port: {ports[0]}")
+        return ports[0]
 
     print("Found multiple serial ports:")
-    for port, desc in ports:
-        print(f" * {port} ({desc})")
-    print("Please specify one using the --port argument.")
+    for port in ports:
+        print(f" * {port}")
+    print("Please specify one using the --port argument, or use --all-ports.")
     raise Esp_flasherError()
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_SLOTS_PATH = "config/slots.json"
+DEFAULT_SLOT_LOG_DIR = "logs/slots"
+
+
+def _usb_interface(location):
+    """Interface part of a USB location, e.g. "1.0" of "1-1.2:1.0"."""
+    if not location or ":" not in location:
+        return None
+    return location.rsplit(":", 1)[1]
+
+
+class Slot:
+    """A physical fixture slot and the state that belongs to it.
+
+    `location` is the USB topology path the slot's adapter is plugged into,
+    `serial_number` the adapter's USB serial. `device` is only used for
+    ports without any USB identity, e.g. built-in UARTs.
+    """
+
+    def __init__(
+        self,
+        slot_id,
+        name=None,
+        location=None,
+        serial_number=None,
+        vid=None,
+        pid=None,
+        device=None,
+        baud_rate=None,
+        stats=None,
+    ):
+        self.slot_id = slot_id
+        self.name = name or slot_id
+        self.location = location
+        self.serial_number = serial_number
+        self.vid = vid
+        self.pid = pid
+        self.device = device  # Last device path, e.g. /dev/ttyUSB3
+        self.baud_rate = baud_rate  # None uses the station default
+        self.stats = stats or {"boards": 0, "passed": 0, "failed": 0}
+
+    def serial_key(self):
+        """Adapter serial plus interface, unique even on multi-port adapters."""
+        if not self.serial_number:
+            return None
+        return (self.vid, self.pid, self.serial_number, _usb_interface(self.location))
+
+    def log_path(self, log_dir=DEFAULT_SLOT_LOG_DIR):
+        """Log file of this slot, stable across device renumbering."""
+        return os.path.join(log_dir, f"{self.slot_id}.log")
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "location": self.location,
+            "serial_number": self.serial_number,
+            "vid": self.vid,
+            "pid": self.pid,
+            "device": self.device,
+            "baud_rate": self.baud_rate,
+            "stats": self.stats,
+        }
+
+    @classmethod
+    def from_dict(cls, slot_id, data):
+        return cls(
+            slot_id,
+            name=data.get("name"),
+            location=data.get("location"),
+            serial_number=data.get("serial_number"),
+            vid=data.get("vid"),
+            pid=data.get("pid"),
+            device=data.get("device"),
+            baud_rate=data.get("baud_rate"),
+            stats=data.get("stats"),
+        )
+
+
+class SlotRegistry:
+    """Maps serial ports to stable fixture slots, persisted as JSON.
+
+    Device paths like /dev/ttyUSB3 or COM7 change across reboots and
+    replugs, so a port is matched to its slot by the adapter's USB serial
+    number first (the adapter moved to another hub port), then by its USB
+    location (an adapter without serial number, or a replaced one, in the
+    same hub port) and, for ports without USB identity, by device path.
+    Unknown ports get a new slot. Names and baud rates can be edited in
+    the file while the station is stopped.
+    """
+
+    def __init__(self, path=DEFAULT_SLOTS_PATH, log_dir=DEFAULT_SLOT_LOG_DIR):
+        self.path = path
+        self.log_dir = log_dir
+        self._slots = {}  # slot_id -> Slot
+        self._lock = threading.Lock()
+        self._load()
+
+    def slots(self):
+        with self._lock:
+            return list(self._slots.values())
+
+    def get(self, slot_id):
+        with self._lock:
+            return self._slots.get(slot_id)
+
+    def slot_for_port(self, port):
+        """Returns the slot of a SerialPortInfo, creating it if it is new."""
+        with self._lock:
+            slot = self._match(port)
+            if slot is None:
+                slot = Slot(self._next_slot_id())
+                self._slots[slot.slot_id] = slot
+                logging.info(f"New fixture slot {slot.slot_id} for {port.device}.")
+            elif slot.device != port.device:
+                logging.info(f"Slot {slot.name} is now at {port.device}.")
+
+            # Learn the current identity, e.g. a new location after a move
+            slot.device = port.device
+            slot.location = port.location or slot.location
+            slot.serial_number = port.serial_number or slot.serial_number
+            slot.vid = port.vid if port.vid is not None else slot.vid
+            slot.pid = port.pid if port.pid is not None else slot.pid
+            self._save()
+            return slot
+
+    def record_result(self, slot, ok):
+        """Counts a finished board for the slot."""
+        with self._lock:
+            slot.stats["boards"] = slot.stats.get("boards", 0) + 1
+            key = "passed" if ok else "failed"
+            slot.stats[key] = slot.stats.get(key, 0) + 1
+            slot.stats["last_board_at"] = time.time()
+            self._save()
+
+    def log_path(self, slot):
+        path = slot.log_path(self.log_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _match(self, port):
+        serial_key = None
+        if port.serial_number:
+            serial_key = (
+                port.vid,
+                port.pid,
+                port.serial_number,
+                _usb_interface(port.location),
+            )
+        for slot in self._slots.values():
+            if serial_key and slot.serial_key() == serial_key:
+                return slot
+        # A replaced adapter (new serial) in the same hub port is the same slot
+        if port.location:
+            for slot in self._slots.values():
+                if slot.location == port.location:
+                    return slot
+        if not port.location and not port.serial_number:
+            for slot in self._slots.values():
+                if not slot.location and not slot.serial_number:
+                    if slot.device == port.device:
+                        return slot
+        return None
+
+    def _next_slot_id(self):
+        number = len(self._slots) + 1
+        while f"slot-{number}" in self._slots:
+            number += 1
+        return f"slot-{number}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as slots_file:
+                data = json.load(slots_file)
+            self._slots = {
+                slot_id: Slot.from_dict(slot_id, slot)
+                for slot_id, slot in data.get("slots", {}).items()
+            }
+        except (OSError, ValueError, AttributeError) as err:
+            logging.error(f"Ignoring unreadable slot file {self.path}: {err}")
+
+    def _save(self):
+        data = {
+            "slots": {
+                slot_id: slot.to_dict() for slot_id, slot in sorted(self._slots.items())
+            }
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.path + ".tmp", "w") as slots_file:
+                json.dump(data, slots_file, indent=4)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as err:
+            logging.error(f"Saving slot file {self.path} failed: {err}")
@@ -1,7 +1,6 @@
 import datetime
-import io
-import json
 import os
+import re
 import sys
 
 import serial
@@ -11,11 +10,37 @@ class Esp_flasherError(Exception):
     pass
 
 
-from esp_flasher.core.const import HTTP_REGEX
-
 # pylint: disable=unspecified-encoding,consider-using-with
 DEVNULL = open(os.devnull, "w")
-CONFIG_PATH = "config/config.json"
+CONFIG_FILE_NAME = "config.json"
+
+_config_dir = None
+
+
+def get_app_dir():
+    """Directory of the application: next to the executable of a PyInstaller
+    build, the repository root when run from source."""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def set_config_dir(path):
+    """Overrides the config directory, e.g. from --config-dir."""
+    global _config_dir
+    _config_dir = os.path.abspath(path) if path else None
+
+
+def get_config_dir():
+    """Directory holding config.json and the caches kept next to it.
+
+    It doesn't depend on the working directory the tool is started from.
+    """
+    return _config_dir or os.path.join(get_app_dir(), "config")
+
+
+def get_config_path():
+    return os.path.join(get_config_dir(), CONFIG_FILE_NAME)
 
 
 def open_downloadable_binary(path):
@@ -23,25 +48,10 @@ def open_downloadable_binary(path):
         path.seek(0)
         return path
 
-    if HTTP_REGEX.match(path) is not None:
-        import requests
-
-        try:
-            response = requests.get(path)
-            response.raise_for_status()
-        except requests.exceptions.Timeout as err:
-            raise Esp_flasherError(
-                f"Timeout while retrieving firmware file '{path}': {err}"
-            ) from err
-        except requests.exceptions.RequestException as err:
-            raise Esp_flasherError(
-                f"Error while retrieving firmware file '{path}': {err}"
-            ) from err
-
-        binary = io.BytesIO()
-        binary.write(response.content)
-        binary.seek(0)
-        return binary
+    from esp_flasher.helpers.firmware_download import fetch_firmware
+
+    # URLs are streamed into the firmware cache and opened from there
+    path = fetch_firmware(path)
 
     try:
         return open(path, "rb")
@@ -50,31 +60,21 @@ def open_downloadable_binary(path):
 
 
 def prevent_print(func, *args, **kwargs):
-    orig_sys_stdout = sys.stdout
-    sys.stdout = DEVNULL
+    # Only silences stdout of the calling context, errors still show and
+    # concurrent jobs keep their output
+    from esp_flasher.helpers.output_router import route_output
+
     try:
-        return func(*args, **kwargs)
+        with route_output(DEVNULL, stderr=False):
+            return func(*args, **kwargs)
     except serial.SerialException as err:
-        from esp_flasher.core.chip_utils import EspflasherError
-
-        raise EspflasherError("Serial port closed: {}".format(err))
-    finally:
-        sys.stdout = orig_sys_stdout
-        sys.stdout.isatty = lambda: False
-        pass
+        raise Esp_flasherError("Serial port closed: {}".format(err))
 
 
-def load_config(path=CONFIG_PATH):
-    """Loads configuration from the .config JSON file."""
-    if not os.path.exists(path):
-        raise Esp_flasherError(f"Config file {path} not found.")
-
-    try:
-        with open(path, "r") as config_file:
-            config = json.load(config_file)
-            return config
-    except json.JSONDecodeError as e:
-        raise Esp_flasherError(f"Error parsing config file: {e}")
+def firmware_version_from_path(firmware_path):
+    """Extracts the version from a release package name, e.g. app_v1.2.3.zip."""
+    match = re.search(r"v?\d+\.\d+(\.\d+)?", os.path.basename(firmware_path or ""))
+    return match.group(0) if match else ""
 
 
 def get_device_dir(device_name=None, mac_address=None):
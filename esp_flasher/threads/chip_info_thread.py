@@ -1,20 +1,24 @@
 import logging
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import pyqtSignal
 
+from esp_flasher.threads.engine_task import EngineTask
 
-class ChipInfoThread(QThread):
+
+class ChipInfoThread(EngineTask):
     mac_address_signal = pyqtSignal(str)  # Signal to send MAC address
+    error_signal = pyqtSignal(str)
 
     def __init__(self, port):
         super().__init__()
         self._port = port
 
-    def run(self):
+    async def run(self):
         try:
-            from esp_flasher.cli.chip_info import dump_info
+            from esp_flasher.core.engine import read_chip_info
 
-            info = dump_info(self._port)
+            info = await read_chip_info(self._port)
 
             self.mac_address_signal.emit(info.mac)  # Emit MAC address
         except Exception as e:
             logging.error(f"Error retrieving chip info: {str(e)}")
+            self.error_signal.emit(str(e))
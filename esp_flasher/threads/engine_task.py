@@ -0,0 +1,70 @@
+import logging
+import threading
+from PyQt5.QtCore import QObject
+
+
+class EngineTask(QObject):
+    """A GUI operation run as a coroutine on the device engine.
+
+    Keeps the start()/isRunning()/wait() API of the QThreads it replaces.
+    Signals are emitted from the engine thread and Qt queues them to the
+    receivers on the GUI thread. Everything the operation prints is logged
+    line by line and kept in `output`, apart from other operations' output.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._task = None
+        self._cancelled = False
+        self.output = None  # JobOutput of the last run
+        self._done = threading.Event()
+        self._done.set()
+
+    async def run(self):
+        raise NotImplementedError
+
+    def start(self):
+        if self.isRunning():
+            return
+        self._cancelled = False
+        self._done.clear()
+        # asyncio is only imported once the first operation runs
+        from esp_flasher.core.engine import get_engine
+
+        get_engine().submit(self._main())
+
+    def isRunning(self):
+        return not self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Waits until the coroutine returned, True if it did."""
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        """Cancels the coroutine; wait() returns once it has wound down."""
+        if self.isRunning():
+            from esp_flasher.core.engine import get_engine
+
+            get_engine().call_soon(self._cancel_on_loop)
+
+    def _cancel_on_loop(self):
+        self._cancelled = True
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _main(self):
+        import asyncio
+        from esp_flasher.helpers.output_router import capture_output
+
+        self._task = asyncio.current_task()
+        try:
+            with capture_output(sink=logging.info) as self.output:
+                if not self._cancelled:
+                    await self.run()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.error(f"{type(self).__name__} failed: {e}")
+        finally:
+            self._task = None
+            self._done.set()
@@ -1,23 +1,36 @@
 import logging
-from PyQt5.QtCore import QThread, pyqtSignal
-from esp_flasher.__main__ import run_esp_flasher
+from PyQt5.QtCore import pyqtSignal
 
+from esp_flasher.threads.engine_task import EngineTask
 
-class FlashingThread(QThread):
+
+class FlashingThread(EngineTask):
     success_signal = pyqtSignal(str)
     error_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool)  # Signal to indicate success
+    progress_signal = pyqtSignal(object)  # FlashProgress, about 10 per second
 
     def __init__(self, firmware, port):
         super().__init__()
         self._firmware = firmware
         self._port = port
 
-    def run(self):
+    async def run(self):
         """Executes the flashing process safely."""
         try:
+            from esp_flasher.core.engine import run_blocking
+            from esp_flasher.core.flash_progress import ProgressTracker
+            from esp_flasher.core.flasher import run_esp_flasher
 
-            run_esp_flasher(self._port, self._firmware, baud_rate=460800)
+            progress = ProgressTracker(self.progress_signal.emit, self._port)
+            # esptool is blocking, it runs on the engine's worker pool
+            await run_blocking(
+                run_esp_flasher,
+                self._port,
+                self._firmware,
+                baud_rate=460800,
+                progress=progress,
+            )
 
             logging.info("Flashing completed successfully!")
             self.finished_signal.emit(True)  # Notify ActionsSection of success
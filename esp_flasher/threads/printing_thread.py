@@ -1,42 +1,28 @@
 import logging
-from PyQt5.QtCore import QThread, pyqtSignal
-from esp_flasher.backend.printer import get_printer
+from PyQt5.QtCore import pyqtSignal
+from esp_flasher.backend.print_spooler import get_print_spooler, JOB_DONE
+from esp_flasher.threads.engine_task import EngineTask
 
 
-class PrintingThread(QThread):
+class PrintingThread(EngineTask):
     success_signal = pyqtSignal(str)
 
-    def __init__(
-        self,
-        printer_name,
-        message,
-        label_width=62,
-        x_offset=100,
-        y_offset=100,
-        text_rotation=270,
-        font=20,
-    ):
+    def __init__(self, printer_name, label, layout=None):
         super().__init__()
         self.printer_name = printer_name
-        self.message = message
-        self.label_width = label_width
-        self.text_rotation = text_rotation
-        self.x_offset = x_offset
-        self.y_offset = y_offset
-        self.font = font
+        self.label = label  # LabelData or plain text
+        self.layout = layout  # LabelLayout, defaults when None
 
-    def run(self):
-        """Runs the print job safely with configurable parameters."""
+    async def run(self):
+        """Queues the label on the print spooler and waits for the result."""
         try:
-            printer = get_printer(self.printer_name)
-            result = printer.print_label(
-                self.message,
-                label_width=self.label_width,
-                x_offset=self.x_offset,
-                y_offset=self.y_offset,
-                text_rotation=self.text_rotation,
-                font_size=self.font,
-            )
-            logging.info(result)
+            from esp_flasher.core.engine import wait_print_job
+
+            job = get_print_spooler().submit(self.printer_name, self.label, self.layout)
+            if await wait_print_job(job) == JOB_DONE:
+                logging.info("Print job sent successfully.")
+                self.success_signal.emit(job.label.device_name)
+            else:
+                logging.error(f"Error printing label: {job.error}")
         except Exception as e:
             logging.error(f"Printing Error: {str(e)}")
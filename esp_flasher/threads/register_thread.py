@@ -1,10 +1,12 @@
 import logging
-from PyQt5.QtCore import QThread, pyqtSignal
-from esp_flasher.backend.api_client import publish_mac_address
+from PyQt5.QtCore import pyqtSignal
 
+from esp_flasher.threads.engine_task import EngineTask
 
-class RegisterThread(QThread):
+
+class RegisterThread(EngineTask):
     device_name_signal = pyqtSignal(str)  # Signal for successful registration
+    error_signal = pyqtSignal(str)
 
     def __init__(self, api_endpoint, api_key, api_secret, mac_address):
         super().__init__()
@@ -13,12 +15,18 @@ class RegisterThread(QThread):
         self._api_secret = api_secret
         self._mac = mac_address
 
-    def run(self):
+    async def run(self):
         """Publishes MAC address and handles API response."""
         try:
+            from esp_flasher.backend.api_client import publish_mac_address
+            from esp_flasher.core.engine import run_blocking
 
-            device_name, error_message = publish_mac_address(
-                self._api_endpoint, self._api_key, self._api_secret, self._mac
+            device_name, error_message = await run_blocking(
+                publish_mac_address,
+                self._api_endpoint,
+                self._api_key,
+                self._api_secret,
+                self._mac,
             )
 
             if device_name:
@@ -27,6 +35,8 @@ class RegisterThread(QThread):
                 )  # Emit device name if successful
             else:
                 logging.error(error_message)  # Emit error if request failed
+                self.error_signal.emit(error_message)
 
         except Exception as e:
             logging.error(f"Unexpected error: {e}")  # Handle unexpected errors
+            self.error_signal.emit(str(e))
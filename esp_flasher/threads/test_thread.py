@@ -13,6 +13,7 @@ class TestThread(QObject):
     def __init__(self, model):
         super().__init__()
         self.model = model
+        self.passed = None  # Result once the test stopped
         self._timer = QTimer()
         self._timer.setSingleShot(True)
         self._timer.timeout.connect(self._on_timeout)
@@ -34,11 +35,13 @@ class TestThread(QObject):
         if self.model.regex and isinstance(self.model.regex, str):
             if re.search(self.model.regex, line):
                 logging.info("Result: PASS!")
+                self.passed = True
                 self.stop_test()
                 self.test_success_signal.emit("Device testing passed!")
 
     def _on_timeout(self):
         if self.model.is_testing:
             logging.error("Result: FAIL!")
+            self.passed = False
             self.stop_test()
             self.test_timeout_signal.emit("Device testing failed!")
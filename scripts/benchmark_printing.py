@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""Measures label printing throughput against the virtual printer."""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp_flasher.backend.printers.label_layout import (  # noqa: E402
+    LabelData,
+    LabelLayout,
+)
+from esp_flasher.backend.printers.label_template import (  # noqa: E402
+    DEFAULT_MODEL,
+    get_label_template,
+)
+
+
+def make_labels(count):
+    return [
+        LabelData(
+            f"ESP_DEVICE_{i:06d}",
+            mac_address=":".join(
+                f"{(i >> shift) & 0xFF:02X}" for shift in range(40, -8, -8)
+            ),
+            firmware_version="v1.0.0",
+        )
+        for i in range(count)
+    ]
+
+
+def bench_render(labels, layout, model):
+    """Render path only: template lookup and raster job per label."""
+    start = time.perf_counter()
+    template = get_label_template(model, layout)
+    first = time.perf_counter() - start
+    for label in labels:
+        template.render_job([label])
+    return time.perf_counter() - start, first
+
+
+def bench_threads(labels, layout, printer_name, spool_dir):
+    """Full GUI path: one PrintingThread per label through the spooler."""
+    from PyQt5.QtCore import QCoreApplication
+    from esp_flasher.backend.print_spooler import get_print_spooler
+    from esp_flasher.threads.printing_thread import PrintingThread
+
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841
+    get_print_spooler({"spool_dir": spool_dir})
+
+    start = time.perf_counter()
+    threads = [PrintingThread(printer_name, label, layout) for label in labels]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.wait()
+    elapsed = time.perf_counter() - start
+    get_print_spooler().stop()
+    return elapsed
+
+
+def report(name, count, elapsed, extra=None):
+    result = {
+        "path": name,
+        "labels": count,
+        "elapsed_s": round(elapsed, 3),
+        "labels_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+        "ms_per_label": round(1000 * elapsed / count, 3) if count else 0.0,
+    }
+    result.update(extra or {})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark label rendering and printing with the virtual printer."
+    )
+    parser.add_argument("--labels", type=int, default=200, help="Labels to print")
+    parser.add_argument(
+        "--code",
+        choices=["none", "qr", "datamatrix"],
+        default="none",
+        help="2D code printed next to the text",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["raster", "png"],
+        default="raster",
+        help="What the virtual printer writes",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Simulated printer time per label in seconds",
+    )
+    parser.add_argument(
+        "--model", default=DEFAULT_MODEL, help="brother_ql printer model"
+    )
+    parser.add_argument(
+        "--output", help="Directory for the printed output (default: a temp dir)"
+    )
+    parser.add_argument(
+        "--skip-threads",
+        action="store_true",
+        help="Only benchmark the render path, not PrintingThread",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    layout = LabelLayout(code=None if args.code == "none" else args.code)
+    labels = make_labels(args.labels)
+    results = []
+
+    elapsed, first = bench_render(labels, layout, args.model)
+    results.append(
+        report(
+            "render",
+            len(labels),
+            elapsed,
+            {"template_build_ms": round(1000 * first, 3)},
+        )
+    )
+
+    if not args.skip_threads:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_dir = args.output or os.path.join(temp_dir, "labels")
+            printer_name = (
+                f"virtual:{output_dir}?format={args.format}"
+                f"&latency={args.latency}&model={args.model}"
+            )
+            elapsed = bench_threads(
+                labels, layout, printer_name, os.path.join(temp_dir, "spool")
+            )
+            results.append(report("printing_thread", len(labels), elapsed))
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for result in results:
+            print(
+                f"{result['path']:16s} {result['labels']:6d} labels  "
+                f"{result['elapsed_s']:8.3f} s  {result['labels_per_s']:9.1f} labels/s  "
+                f"{result['ms_per_label']:8.3f} ms/label"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""Measures cold start of the CLI and GUI entry points.
+
+Every sample runs in a fresh interpreter. Exits non-zero when an entry point
+imports a module it should only load on first use, or exceeds its time
+budget, so CI can use it as a regression gate.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules an entry point must not load before they are needed
+CLI_LAZY_MODULES = [
+    "PyQt5",
+    "esptool",
+    "espefuse",
+    "espsecure",
+    "requests",
+    "brother_ql",
+    "numpy",
+    "PIL",
+    "win32ui",
+]
+GUI_LAZY_MODULES = [
+    "esptool",
+    "esptool.targets",
+    "espefuse",
+    "espsecure",
+    "requests",
+    "brother_ql",
+    "numpy",
+    "PIL",
+    "win32ui",
+]
+# The printer registry's background discovery may load brother_ql and Pillow
+# while the window comes up; that doesn't delay the window
+FIRST_WINDOW_LAZY_MODULES = [
+    module for module in GUI_LAZY_MODULES if module not in ("brother_ql", "PIL")
+]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": 1000 * elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+WINDOW_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from esp_flasher.gui.main_window import MainWindow
+app = QApplication(sys.argv)
+window = MainWindow()
+window.show()
+app.processEvents()
+elapsed = time.perf_counter() - start
+sys.__stdout__.write(json.dumps({"ms": 1000 * elapsed, "modules": sorted(sys.modules)}))
+sys.__stdout__.write("\\n")
+window.close()
+"""
+
+
+def run_probe(code, cwd):
+    """Runs a probe in a fresh interpreter, returns its JSON result."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [REPO_ROOT, env.get("PYTHONPATH")])
+    )
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench(name, code, runs, cwd, lazy_modules, budget_ms):
+    samples = [run_probe(code, cwd) for _ in range(runs)]
+    times = [sample["ms"] for sample in samples]
+    loaded = sorted(
+        module
+        for module in lazy_modules
+        if any(module in sample["modules"] for sample in samples)
+    )
+    median = statistics.median(times)
+    return {
+        "path": name,
+        "runs": runs,
+        "median_ms": round(median, 1),
+        "min_ms": round(min(times), 1),
+        "max_ms": round(max(times), 1),
+        "budget_ms": budget_ms,
+        "eagerly_loaded": loaded,
+        "ok": not loaded and median <= budget_ms,
+    }
+
+
+# Budgets are a few times the medians measured on a developer machine (CLI
+# import ~5 ms, GUI import ~75 ms, first window ~150 ms), leaving headroom for
+# slower CI runners while still failing on a realistic regression
+DEFAULT_CLI_IMPORT_BUDGET_MS = 25.0
+DEFAULT_GUI_IMPORT_BUDGET_MS = 250.0
+DEFAULT_FIRST_WINDOW_BUDGET_MS = 500.0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark import time and time-to-first-window."
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Samples per path")
+    parser.add_argument(
+        "--max-cli-import-ms",
+        type=float,
+        default=DEFAULT_CLI_IMPORT_BUDGET_MS,
+        help="Budget for importing the CLI entry point",
+    )
+    parser.add_argument(
+        "--max-gui-import-ms",
+        type=float,
+        default=DEFAULT_GUI_IMPORT_BUDGET_MS,
+        help="Budget for importing the main window",
+    )
+    parser.add_argument(
+        "--max-first-window-ms",
+        type=float,
+        default=DEFAULT_FIRST_WINDOW_BUDGET_MS,
+        help="Budget from the first import until the main window is shown",
+    )
+    parser.add_argument(
+        "--skip-window",
+        action="store_true",
+        help="Skip time-to-first-window, e.g. without a Qt platform plugin",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        # The window creates its spool directory in the working directory,
+        # config.json is found in the source checkout
+
+        results.append(
+            bench(
+                "cli_import",
+                IMPORT_PROBE.format(module="esp_flasher.__main__"),
+                args.runs,
+                work_dir,
+                CLI_LAZY_MODULES,
+                args.max_cli_import_ms,
+            )
+        )
+        results.append(
+            bench(
+                "gui_import",
+                IMPORT_PROBE.format(module="esp_flasher.gui.main_window"),
+                args.runs,
+                work_dir,
+                GUI_LAZY_MODULES,
+                args.max_gui_import_ms,
+            )
+        )
+        if not args.skip_window:
+            results.append(
+                bench(
+                    "first_window",
+                    WINDOW_PROBE,
+                    args.runs,
+                    work_dir,
+                    FIRST_WINDOW_LAZY_MODULES,
+                    args.max_first_window_ms,
+                )
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for result in results:
+            status = "ok" if result["ok"] else "FAIL"
+            print(
+                f"{result['path']:14s} median {result['median_ms']:8.1f} ms  "
+                f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f}, "
+                f"budget {result['budget_ms']:.0f})  {status}"
+            )
+            if result["eagerly_loaded"]:
+                print(f"  loaded eagerly: {', '.join(result['eagerly_loaded'])}")
+
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
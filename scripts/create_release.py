@@ -6,8 +6,17 @@ import argparse
 import tempfile
 import shutil
 import re
+import hashlib
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
 from espsecure import digest_sbv2_public_key
+from esptool.cmds import _update_image_flash_params
+from esptool.targets import CHIP_DEFS
+from esptool.util import pad_to
+
+PACKAGE_FORMAT = 2
 
 
 def find_project_root(start_path=None, markers=(".git")):
@@ -166,6 +175,17 @@ BAUD=460800
 
 echo "🚀 Flashing ESP32..."
 
+"""
+
+    # Delta packages only hold the images changed since their base release
+    if "delta" in flash_data:
+        base_package = flash_data["delta"]["base_package"]
+        script_content += f"""
+echo "🔀 This is a delta package against {base_package}."
+echo "   - Only the changed images are written."
+echo "   - Flash it only onto devices running that release."
+echo "   - The ESP Flasher GUI checks the unchanged images on the device first."
+echo ""
 """
 
     # Secure Boot Warning
@@ -216,8 +236,340 @@ fi
     return temp_script_path
 
 
-def create_zip_package(build_dir, temp_dir, flash_data, output_zip):
-    """Creates a zip archive with the modified flash files, flasher_args.json, and flash script."""
+def prepare_flash_payload(chip, offset, image_path, payload_path, flash_settings):
+    """Writes the zlib stream esptool would send for an image.
+
+    The image is padded and, at the bootloader offset, gets the flash
+    settings patched into its header exactly as `esptool write_flash` does,
+    so a station can send the stream as is. Runs in worker processes.
+    """
+
+    class MockEsptoolArgs:
+        def __init__(self, chip, flash_settings):
+            self.chip = chip
+            self.flash_mode = flash_settings["flash_mode"]
+            self.flash_freq = flash_settings["flash_freq"]
+            self.flash_size = flash_settings["flash_size"]
+
+    with open(image_path, "rb") as f:
+        image = pad_to(f.read(), 4)
+    image = _update_image_flash_params(
+        CHIP_DEFS[chip], offset, MockEsptoolArgs(chip, flash_settings), image
+    )
+    compressed = zlib.compress(image, 9)
+    with open(payload_path, "wb") as f:
+        f.write(compressed)
+
+    return {
+        "size": len(image),
+        "md5": hashlib.md5(image).hexdigest(),
+        "compressed_size": len(compressed),
+    }
+
+
+def add_image_manifest(build_dir, temp_dir, flash_data, precompress=True, jobs=None):
+    """Adds per-image integrity data, and optionally flash payloads, to flash_data.
+
+    Every flashed file gets its size, SHA-256 and MD5 under "images", keyed
+    by offset like "flash_files". Plain (unsecured) packages also carry the
+    pre-compressed stream esptool sends, so stations neither hash nor
+    compress images at flash time.
+    """
+    print("🧾 Adding image manifest...")
+
+    security = flash_data.get("security", {})
+    # Secure Boot and encryption change how esptool writes the images
+    precompress = precompress and not (
+        security.get("secure_boot") or security.get("encryption")
+    )
+    chip = flash_data["extra_esptool_args"]["chip"]
+
+    images = {}
+    payloads = []
+    for offset, file_path in flash_data["flash_files"].items():
+        abs_path = os.path.join(build_dir, file_path)
+        if not os.path.exists(abs_path):
+            raise FileNotFoundError(f"❌ Flash file not found: {abs_path}")
+
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5()
+        with open(abs_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+                md5.update(chunk)
+        images[offset] = {
+            "file": file_path,
+            "size": os.path.getsize(abs_path),
+            "sha256": sha256.hexdigest(),
+            "md5": md5.hexdigest(),
+        }
+
+        if precompress:
+            payload_file = file_path + ".zlib"
+            payload_path = os.path.join(temp_dir, payload_file)
+            os.makedirs(os.path.dirname(payload_path), exist_ok=True)
+            payloads.append((offset, payload_file, abs_path, payload_path))
+
+    if payloads:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                offset: executor.submit(
+                    prepare_flash_payload,
+                    chip,
+                    int(offset, 16),
+                    abs_path,
+                    payload_path,
+                    flash_data["flash_settings"],
+                )
+                for offset, _, abs_path, payload_path in payloads
+            }
+            for offset, payload_file, _, _ in payloads:
+                payload = futures[offset].result()
+                images[offset]["compressed"] = dict(file=payload_file, **payload)
+
+    flash_data["package_format"] = PACKAGE_FORMAT
+    flash_data["images"] = images
+
+    print(
+        f"✅ Image manifest added ({len(payloads)} of {len(images)} images pre-compressed)."
+    )
+    return flash_data
+
+
+def read_base_images(base_zip):
+    """Returns {offset: (sha256, size)} of the images in a full release package.
+
+    Uses the image manifest of v2 packages, hashes the members of v1 ones.
+    """
+    if not os.path.exists(base_zip):
+        raise FileNotFoundError(f"❌ Base package not found: {base_zip}")
+
+    with zipfile.ZipFile(base_zip) as zipf:
+        base_args = json.loads(zipf.read("flasher_args.json"))
+        if "delta" in base_args:
+            raise RuntimeError(
+                "❌ The base package must be a full release, not a delta"
+            )
+
+        images = {}
+        for offset, file_path in base_args["flash_files"].items():
+            manifest = base_args.get("images", {}).get(offset)
+            if manifest:
+                images[offset] = (manifest["sha256"], manifest["size"])
+                continue
+            sha256 = hashlib.sha256()
+            with zipf.open(file_path) as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha256.update(chunk)
+            images[offset] = (sha256.hexdigest(), zipf.getinfo(file_path).file_size)
+    return images
+
+
+def make_delta_package(flash_data, base_zip):
+    """Drops the images unchanged since `base_zip` from a v2 package.
+
+    Unchanged images are listed under "delta" with the size and MD5 they
+    have on flash, so the flasher can check that a device runs the base
+    release before writing only the changed images.
+    """
+    print(f"🔀 Creating delta package against {os.path.basename(base_zip)}...")
+
+    security = flash_data.get("security", {})
+    if security.get("secure_boot") or security.get("encryption"):
+        raise RuntimeError(
+            "❌ Delta packages are not supported with Secure Boot or encryption"
+        )
+
+    base_images = read_base_images(base_zip)
+    unchanged = {}
+    for offset, image in list(flash_data["images"].items()):
+        if base_images.get(offset) != (image["sha256"], image["size"]):
+            continue
+        # What the flasher finds on the device: the image as esptool wrote it
+        unchanged[offset] = {
+            "file": image["file"],
+            "size": image["compressed"]["size"],
+            "md5": image["compressed"]["md5"],
+        }
+        del flash_data["images"][offset]
+        del flash_data["flash_files"][offset]
+
+    if not flash_data["flash_files"]:
+        raise RuntimeError("❌ Nothing changed since the base package")
+
+    flash_data["delta"] = {
+        "base_package": os.path.basename(base_zip),
+        "unchanged": unchanged,
+    }
+
+    print(
+        f"✅ Delta package: {len(flash_data['flash_files'])} changed, "
+        f"{len(unchanged)} unchanged images."
+    )
+    return flash_data
+
+
+# Fixed entry metadata so identical inputs give byte-identical packages
+ZIP_DOS_TIME = 0
+ZIP_DOS_DATE = (0 << 9) | (1 << 5) | 1  # 1980-01-01
+ZIP_FILE_MODE = 0o100644
+ZIP_EXEC_MODE = 0o100755
+ZIP_CREATE_SYSTEM = 3  # Unix, so the file modes above are honoured
+ZIP_VERSION = 20
+INPUTS_COMMENT_KEY = "package_inputs"
+
+
+def hash_file(path):
+    """Returns the SHA-256 of a file, read in chunks."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def deflate_file(path, level=9):
+    """Compresses a file as a raw deflate stream, as stored in a ZIP member.
+
+    Runs in worker processes, so it takes and returns plain values only.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    crc = 0
+    size = 0
+    chunks = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            chunks.append(compressor.compress(chunk))
+    chunks.append(compressor.flush())
+    return crc, size, b"".join(chunks)
+
+
+def read_previous_package(path):
+    """Returns {arcname: (input_sha256, crc, size, raw deflate data)} of a package.
+
+    Only members written by this script, whose input hashes are recorded in
+    the archive comment, can be reused.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+
+    try:
+        with zipfile.ZipFile(path) as zipf:
+            inputs = json.loads(zipf.comment.decode("utf-8") or "{}").get(
+                INPUTS_COMMENT_KEY, {}
+            )
+            members = {}
+            with open(path, "rb") as raw:
+                for info in zipf.infolist():
+                    if info.filename not in inputs:
+                        continue
+                    if info.compress_type != zipfile.ZIP_DEFLATED:
+                        continue
+                    # Skip the local header to reach the compressed bytes
+                    raw.seek(info.header_offset + 26)
+                    name_len, extra_len = struct.unpack("<HH", raw.read(4))
+                    raw.seek(name_len + extra_len, os.SEEK_CUR)
+                    members[info.filename] = (
+                        inputs[info.filename],
+                        info.CRC,
+                        info.file_size,
+                        raw.read(info.compress_size),
+                    )
+            return members
+    except (zipfile.BadZipFile, ValueError, OSError) as e:
+        print(f"⚠️ Previous package {path} is not reusable: {e}")
+        return {}
+
+
+def write_deterministic_zip(output_zip, entries, comment):
+    """Writes pre-compressed entries as a ZIP with fixed metadata.
+
+    `entries` are (arcname, mode, crc, size, raw deflate data), written in
+    the given order.
+    """
+    central_directory = []
+    temp_zip = output_zip + ".tmp"
+    with open(temp_zip, "wb") as f:
+        for arcname, mode, crc, size, data in entries:
+            name = arcname.encode("utf-8")
+            if size > 0xFFFFFFFF or len(data) > 0xFFFFFFFF:
+                raise ValueError(f"{arcname} is too large for a ZIP without ZIP64")
+            offset = f.tell()
+            f.write(
+                struct.pack(
+                    "<IHHHHHIIIHH",
+                    0x04034B50,
+                    ZIP_VERSION,
+                    0x0800,  # UTF-8 file names
+                    zipfile.ZIP_DEFLATED,
+                    ZIP_DOS_TIME,
+                    ZIP_DOS_DATE,
+                    crc,
+                    len(data),
+                    size,
+                    len(name),
+                    0,
+                )
+            )
+            f.write(name)
+            f.write(data)
+            central_directory.append(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,
+                    (ZIP_CREATE_SYSTEM << 8) | ZIP_VERSION,
+                    ZIP_VERSION,
+                    0x0800,
+                    zipfile.ZIP_DEFLATED,
+                    ZIP_DOS_TIME,
+                    ZIP_DOS_DATE,
+                    crc,
+                    len(data),
+                    size,
+                    len(name),
+                    0,
+                    0,
+                    0,
+                    0,
+                    mode << 16,
+                    offset,
+                )
+                + name
+            )
+
+        directory_offset = f.tell()
+        for record in central_directory:
+            f.write(record)
+        directory_size = f.tell() - directory_offset
+        f.write(
+            struct.pack(
+                "<IHHHHIIH",
+                0x06054B50,
+                0,
+                0,
+                len(entries),
+                len(entries),
+                directory_size,
+                directory_offset,
+                len(comment),
+            )
+        )
+        f.write(comment)
+    os.replace(temp_zip, output_zip)
+
+
+def create_zip_package(
+    build_dir, temp_dir, flash_data, output_zip, previous_zip=None, jobs=None
+):
+    """Creates a zip archive with the modified flash files, flasher_args.json, and flash script.
+
+    Members whose input is unchanged since `previous_zip` are copied without
+    recompressing; the others are compressed in parallel worker processes.
+    Entries are sorted and carry fixed metadata, so identical inputs give a
+    byte-identical package.
+    """
     print("📦 Creating ZIP package...")
 
     # Save modified version in temp directory
@@ -225,19 +577,66 @@ def create_zip_package(build_dir, temp_dir, flash_data, output_zip):
     with open(temp_flasher_args_path, "w") as f:
         json.dump(flash_data, f, indent=4)
 
-    with zipfile.ZipFile(output_zip, "w", zipfile.ZIP_DEFLATED) as zipf:
-        zipf.write(os.path.join(temp_dir, "flasher_args.json"), "flasher_args.json")
-        zipf.write(os.path.join(temp_dir, "flash.sh"), "flash.sh")
+    # arcname -> source path
+    sources = {
+        "flasher_args.json": temp_flasher_args_path,
+        "flash.sh": os.path.join(temp_dir, "flash.sh"),
+    }
 
-        # Package digest file if secure boot is enabled.
-        if flash_data.get("security", {}).get("secure_boot", False):
-            zipf.write(os.path.join(temp_dir, "digest.bin"), "digest.bin")
+    # Package digest file if secure boot is enabled.
+    if flash_data.get("security", {}).get("secure_boot", False):
+        sources["digest.bin"] = os.path.join(temp_dir, "digest.bin")
+
+    # Add all relevant flash files
+    for file_path in flash_data["flash_files"].values():
+        abs_path = os.path.join(build_dir, file_path)
+        if os.path.exists(abs_path):
+            sources[file_path] = abs_path
+
+    # Pre-compressed flash payloads of a v2 package
+    for image in flash_data.get("images", {}).values():
+        if "compressed" in image:
+            payload_file = image["compressed"]["file"]
+            sources[payload_file] = os.path.join(temp_dir, payload_file)
+
+    input_hashes = {arcname: hash_file(path) for arcname, path in sources.items()}
+    previous = read_previous_package(previous_zip)
+
+    members = {}  # arcname -> (crc, size, raw deflate data)
+    to_compress = []
+    for arcname in sorted(sources):
+        reusable = previous.get(arcname)
+        if reusable and reusable[0] == input_hashes[arcname]:
+            members[arcname] = reusable[1:]
+        else:
+            to_compress.append(arcname)
+
+    if len(to_compress) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(
+                deflate_file, [sources[arcname] for arcname in to_compress]
+            )
+            members.update(zip(to_compress, results))
+    elif to_compress:
+        members[to_compress[0]] = deflate_file(sources[to_compress[0]])
+
+    print(
+        f"♻️  Reused {len(sources) - len(to_compress)} unchanged members, "
+        f"compressed {len(to_compress)}."
+    )
 
-        # Add all relevant flash files
-        for file_path in flash_data["flash_files"].values():
-            abs_path = os.path.join(build_dir, file_path)
-            if os.path.exists(abs_path):
-                zipf.write(abs_path, file_path)
+    entries = [
+        (
+            arcname,
+            ZIP_EXEC_MODE if arcname.endswith(".sh") else ZIP_FILE_MODE,
+            *members[arcname],
+        )
+        for arcname in sorted(members)
+    ]
+    comment = json.dumps(
+        {INPUTS_COMMENT_KEY: input_hashes}, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+    write_deterministic_zip(output_zip, entries, comment)
 
     print(f"✅ Release ZIP package created: {output_zip}")
 
@@ -265,6 +664,14 @@ def generate_release_filename(project_info):
     return release_name
 
 
+def generate_delta_filename(release_name, base_zip):
+    """Names a delta package after its release and the base version."""
+    base_name = os.path.splitext(os.path.basename(base_zip))[0]
+    version_match = re.search(r"v?\d+\.\d+(\.\d+)?", base_name)
+    base_version = version_match.group(0) if version_match else base_name
+    return f"{os.path.splitext(release_name)[0]}_delta_from_{base_version}.zip"
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Package ESP32 flashing files into a zip archive."
@@ -282,7 +689,40 @@ def main():
         help="Path to Secure Boot V2 public signing key",
     )
 
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse unchanged compressed members of the previous package",
+    )
+    parser.add_argument(
+        "--previous",
+        type=str,
+        default=None,
+        help="Package to reuse members from (default: the output package itself)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for compression (default: one per CPU)",
+    )
+
+    parser.add_argument(
+        "--no-precompress",
+        action="store_true",
+        help="Do not package pre-compressed flash payloads",
+    )
+
+    parser.add_argument(
+        "--base",
+        type=str,
+        default=None,
+        help="Full release package to create a delta package against",
+    )
+
     args = parser.parse_args()
+    if args.base and args.no_precompress:
+        parser.error("--base needs the pre-compressed payloads, drop --no-precompress")
 
     # Determine the build directory
     project_root = find_project_root()
@@ -302,8 +742,6 @@ def main():
     # Generate release zip filename
     release_name = generate_release_filename(project_info)
 
-    temp_script = create_flash_script(temp_dir, flash_data)
-
     # Determine output directory
     output_dir = (
         args.output_dir if args.output_dir else os.path.join(project_root, "release")
@@ -314,8 +752,23 @@ def main():
     if flash_data.get("security", {}).get("secure_boot", False):
         flash_data = generate_secure_boot_digest(args.signing_key, flash_data, temp_dir)
 
+    flash_data = add_image_manifest(
+        build_dir, temp_dir, flash_data, not args.no_precompress, args.jobs
+    )
+
+    if args.base:
+        flash_data = make_delta_package(flash_data, args.base)
+        release_name = generate_delta_filename(release_name, args.base)
+
+    temp_script = create_flash_script(temp_dir, flash_data)
+
     output_zip = os.path.join(output_dir, release_name)
-    create_zip_package(build_dir, temp_dir, flash_data, output_zip)
+    previous_zip = None
+    if args.incremental:
+        previous_zip = args.previous or output_zip
+    create_zip_package(
+        build_dir, temp_dir, flash_data, output_zip, previous_zip, args.jobs
+    )
 
     shutil.rmtree(temp_dir)
     print(f"🎉 Flash package ready: {output_zip}")
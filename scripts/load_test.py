@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""Drives the registration backend at high concurrency and reports latency."""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp_flasher.backend.api_client import (  # noqa: E402
+    confirm_device_names,
+    lease_device_names,
+    publish_batch,
+    publish_mac_address,
+)
+
+_thread_state = threading.local()
+
+
+def random_mac():
+    return ":".join(f"{random.randint(0, 255):02X}" for _ in range(6))
+
+
+def get_session(reuse_connections):
+    """Returns the calling worker's session, or None for one session per call."""
+    if not reuse_connections:
+        return None
+    if not hasattr(_thread_state, "session"):
+        _thread_state.session = requests.Session()
+    return _thread_state.session
+
+
+def run_publish(args):
+    _, error_message = publish_mac_address(
+        args.endpoint,
+        args.api_key,
+        args.api_secret,
+        random_mac(),
+        session=get_session(args.reuse_connections),
+        timeout=args.timeout,
+    )
+    return error_message
+
+
+def run_batch(args):
+    """One publish_batch call registering --batch-size MAC addresses."""
+    mac_addresses = [random_mac() for _ in range(args.batch_size)]
+    devices, error_message = publish_batch(
+        args.endpoint,
+        args.api_key,
+        args.api_secret,
+        mac_addresses,
+        session=get_session(args.reuse_connections),
+        timeout=args.timeout,
+    )
+    if devices is None:
+        return error_message
+    missing = [mac for mac in mac_addresses if not devices.get(mac)]
+    if missing:
+        return f"{len(missing)} MAC addresses not registered"
+    return None
+
+
+def run_lease(args):
+    """One lease of --batch-size names followed by one confirmation batch."""
+    session = get_session(args.reuse_connections)
+    lease, error_message = lease_device_names(
+        args.endpoint,
+        args.api_key,
+        args.api_secret,
+        args.batch_size,
+        session=session,
+        timeout=args.timeout,
+    )
+    if lease is None:
+        return error_message
+
+    bindings = [
+        {
+            "lease_id": lease.get("lease_id"),
+            "device_name": name,
+            "mac_address": random_mac(),
+        }
+        for name in lease["device_names"]
+    ]
+    result, error_message = confirm_device_names(
+        args.confirm_endpoint,
+        args.api_key,
+        args.api_secret,
+        bindings,
+        session=session,
+        timeout=args.timeout,
+    )
+    if result is None:
+        return error_message
+    if result["rejected"]:
+        return f"{len(result['rejected'])} bindings rejected"
+    return None
+
+
+def timed_call(func, args):
+    start = time.perf_counter()
+    error_message = func(args)
+    return time.perf_counter() - start, error_message
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed, registrations_per_call):
+    latencies = sorted(latency for latency, _ in results)
+    errors = Counter(error for _, error in results if error)
+    succeeded = len(results) - sum(errors.values())
+    return {
+        "requests": len(results),
+        "succeeded": succeeded,
+        "failed": sum(errors.values()),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "registrations_per_s": (
+            round(succeeded * registrations_per_call / elapsed, 1) if elapsed else 0.0
+        ),
+        "latency_ms": {
+            "mean": (
+                round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0.0
+            ),
+            "p50": round(1000 * percentile(latencies, 0.50), 2),
+            "p90": round(1000 * percentile(latencies, 0.90), 2),
+            "p99": round(1000 * percentile(latencies, 0.99), 2),
+            "p999": round(1000 * percentile(latencies, 0.999), 2),
+            "max": round(1000 * latencies[-1], 2) if latencies else 0.0,
+        },
+        "errors": dict(errors.most_common(10)),
+    }
+
+
+def print_report(report):
+    print(f"Requests:      {report['requests']} ({report['failed']} failed)")
+    print(f"Elapsed:       {report['elapsed_s']} s")
+    print(f"Throughput:    {report['throughput_rps']} req/s")
+    print(f"Registrations: {report['registrations_per_s']} boards/s")
+    latency = report["latency_ms"]
+    print(
+        "Latency (ms):  "
+        f"mean {latency['mean']}  p50 {latency['p50']}  p90 {latency['p90']}  "
+        f"p99 {latency['p99']}  p99.9 {latency['p999']}  max {latency['max']}"
+    )
+    for message, count in report["errors"].items():
+        print(f"  {count:6d} x {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load generator for the device registration backend."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["publish", "batch", "lease"],
+        default="publish",
+        help="publish: one publish_mac_address call per request; "
+        "batch: register --batch-size MAC addresses with one publish_batch call; "
+        "lease: lease a block of names and confirm it as one batch",
+    )
+    parser.add_argument(
+        "--endpoint",
+        default="http://127.0.0.1:5000/publish",
+        help="Publish endpoint; /publish/batch is used with --mode batch and "
+        "/lease with --mode lease unless another endpoint is given",
+    )
+    parser.add_argument(
+        "--confirm-endpoint",
+        default="http://127.0.0.1:5000/confirm",
+        help="Confirm endpoint used with --mode lease",
+    )
+    parser.add_argument("--api-key", default="TEST_KEY")
+    parser.add_argument("--api-secret", default="TEST_SECRET")
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="Total number of calls"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Number of concurrent callers"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=20,
+        help="MAC addresses per call in batch mode, names per lease in lease mode",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=10, help="Per-request timeout in seconds"
+    )
+    parser.add_argument(
+        "--reuse-connections",
+        action="store_true",
+        help="Keep one HTTP session per caller instead of one per request",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.mode == "batch" and args.endpoint.endswith("/publish"):
+        args.endpoint += "/batch"
+    if args.mode == "lease" and args.endpoint.endswith("/publish"):
+        args.endpoint = args.endpoint[: -len("/publish")] + "/lease"
+
+    func = {"publish": run_publish, "batch": run_batch, "lease": run_lease}[args.mode]
+    registrations_per_call = 1 if args.mode == "publish" else args.batch_size
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(
+            executor.map(lambda _: timed_call(func, args), range(args.requests))
+        )
+    elapsed = time.perf_counter() - start
+
+    report = summarize(results, elapsed, registrations_per_call)
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
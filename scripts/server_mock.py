@@ -1,7 +1,99 @@
+#!/usr/bin/env python
+import argparse
+import itertools
+import random
+import threading
+import time
+import uuid
+
 from flask import Flask, request, jsonify
 
 app = Flask(__name__)
 
+# Lease bookkeeping for the batch lease/confirm endpoints
+_state_lock = threading.Lock()
+_name_counter = itertools.count(1)
+_leases = {}  # lease_id -> set of leased, unconfirmed device names
+_bindings = {}  # mac_address -> device_name
+
+
+class BackendBehaviour:
+    """Latency, error and rate-limit injection applied to every request."""
+
+    def __init__(
+        self,
+        latency="none",
+        latency_ms=0.0,
+        jitter_ms=0.0,
+        error_rate=0.0,
+        error_status=503,
+        rate_limit=0.0,
+        burst=1,
+    ):
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def sample_latency(self):
+        """Returns the delay for one request in seconds."""
+        mean = self.latency_ms
+        if self.latency == "fixed":
+            delay = mean
+        elif self.latency == "uniform":
+            delay = random.uniform(mean - self.jitter_ms, mean + self.jitter_ms)
+        elif self.latency == "normal":
+            delay = random.gauss(mean, self.jitter_ms)
+        elif self.latency == "exponential":
+            delay = random.expovariate(1.0 / mean) if mean > 0 else 0.0
+        elif self.latency == "lognormal":
+            # Long-tailed: median `latency_ms`, `jitter_ms` widens the tail
+            sigma = self.jitter_ms / mean if mean > 0 else 0.0
+            delay = random.lognormvariate(0.0, sigma) * mean
+        else:
+            delay = 0.0
+        return max(0.0, delay) / 1000.0
+
+    def take_token(self):
+        """Token bucket: returns False when the request exceeds the rate limit."""
+        if self.rate_limit <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last_refill) * self.rate_limit
+            )
+            self._last_refill = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+behaviour = BackendBehaviour()
+
+
+@app.before_request
+def inject_behaviour():
+    if not behaviour.take_token():
+        return jsonify({"message": "Rate limit exceeded"}), 429
+
+    delay = behaviour.sample_latency()
+    if delay:
+        time.sleep(delay)
+
+    if behaviour.should_fail():
+        return jsonify({"message": "Injected backend error"}), behaviour.error_status
+
 
 @app.route("/publish", methods=["POST"])
 def mock_publish():
@@ -15,5 +107,115 @@ def mock_publish():
         return jsonify({"message": "Missing MAC address"}), 400
 
 
+@app.route("/publish/batch", methods=["POST"])
+def mock_publish_batch():
+    mac_addresses = (request.json or {}).get("mac_addresses")
+    if not isinstance(mac_addresses, list):
+        return jsonify({"message": "Missing MAC addresses"}), 400
+
+    with _state_lock:
+        devices = [
+            {"mac_address": mac, "device_name": f"TEST_NAME_{next(_name_counter):06d}"}
+            for mac in mac_addresses
+        ]
+    return jsonify({"devices": devices}), 201
+
+
+@app.route("/lease", methods=["POST"])
+def mock_lease():
+    count = (request.json or {}).get("count")
+    if not isinstance(count, int) or count <= 0:
+        return jsonify({"message": "Invalid lease count"}), 400
+
+    lease_id = uuid.uuid4().hex
+    with _state_lock:
+        names = [f"TEST_NAME_{next(_name_counter):06d}" for _ in range(count)]
+        _leases[lease_id] = set(names)
+
+    return jsonify({"lease_id": lease_id, "device_names": names}), 201
+
+
+@app.route("/confirm", methods=["POST"])
+def mock_confirm():
+    bindings = (request.json or {}).get("bindings")
+    if not isinstance(bindings, list):
+        return jsonify({"message": "Missing bindings"}), 400
+
+    confirmed = []
+    rejected = []
+    with _state_lock:
+        for binding in bindings:
+            name = binding.get("device_name")
+            mac = binding.get("mac_address")
+            leased = _leases.get(binding.get("lease_id"), set())
+
+            if _bindings.get(mac) == name:
+                confirmed.append(binding)
+            elif mac in _bindings:
+                rejected.append(dict(binding, message="MAC address already bound"))
+            elif name not in leased:
+                rejected.append(dict(binding, message="Device name not leased"))
+            else:
+                leased.discard(name)
+                _bindings[mac] = name
+                confirmed.append(binding)
+
+    return jsonify({"confirmed": confirmed, "rejected": rejected}), 200
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mock device registration backend with fault injection."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=5000, help="Port to listen on")
+    parser.add_argument(
+        "--latency",
+        choices=["none", "fixed", "uniform", "normal", "exponential", "lognormal"],
+        default="none",
+        help="Latency distribution applied to every request",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Mean (or median) latency"
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=float,
+        default=0.0,
+        help="Spread of the latency distribution",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with --error-status (0.0 - 1.0)",
+    )
+    parser.add_argument(
+        "--error-status", type=int, default=503, help="Status code of injected errors"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Allowed requests per second, excess is answered with 429 (0 = off)",
+    )
+    parser.add_argument(
+        "--burst", type=int, default=10, help="Token bucket size for --rate-limit"
+    )
+    args = parser.parse_args()
+
+    global behaviour
+    behaviour = BackendBehaviour(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
 if __name__ == "__main__":
-    app.run(port=5000)
+    main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 """esp32_gui_flasher setup script."""
+
 import os
 
 from setuptools import setup, find_packages
@@ -46,6 +47,10 @@ setup(
     install_requires=REQUIRES,
     extras_require={
         "windows": ["pywin32"],  # Only install on Windows
+        "datamatrix": ["pylibdmtx"],  # Also needs the libdmtx system library
+        "cups": ["pycups"],  # Faster printer discovery on Linux
+        # Serial logs read by the event loop instead of polled on Windows
+        "async-serial": ["pyserial-asyncio"],
     },
     long_description=LONG_DESCRIPTION,
     long_description_content_type="text/markdown",